@@ -50,6 +50,7 @@ import bpy
 def register():
     utils.bl_class_registry.BlClassRegistry.register()
     properties.init_props(bpy.types.Scene)
+    common.add_texture_size_cache_handlers()
     user_prefs = utils.compatibility.get_user_preferences(bpy.context)
     if user_prefs.addons['magic_uv'].preferences.enable_builtin_menu:
         preferences.add_builtin_menu()
@@ -57,6 +58,7 @@ def register():
 
 def unregister():
     preferences.remove_builtin_menu()
+    common.remove_texture_size_cache_handlers()
     properties.clear_props(bpy.types.Scene)
     utils.bl_class_registry.BlClassRegistry.unregister()
 
@@ -7,17 +7,22 @@ __status__ = "production"
 __version__ = "6.6"
 __date__ = "22 Apr 2022"
 
-from collections import defaultdict
+from collections import defaultdict, OrderedDict
+from concurrent.futures import ProcessPoolExecutor
 from pprint import pprint
-from math import fabs, sqrt
+from math import fabs, gcd, sqrt
+import multiprocessing
 import os
+import sys
 
 import bpy
 from mathutils import Vector
 import bmesh
+import numpy as np
 
 from .utils import compatibility as compat
 from .utils.graph import Graph, Node
+from .utils.disjoint_set import DisjointSet
 
 
 __DEBUG_MODE = False
@@ -181,6 +186,454 @@ def create_new_uv_map(obj, name=None):
     return new
 
 
+def calc_signed_polygon_areas(points, face_offsets):
+    """
+    Calculate signed areas of polygons by the shoelace formula.
+    The vertices of i-th polygon are placed in
+    points[face_offsets[i]:face_offsets[i + 1]].
+    The area is negative if the polygon is clock-wise.
+    """
+
+    num_points = len(points)
+    if num_points == 0:
+        return np.zeros(len(face_offsets) - 1, dtype=np.float64)
+
+    nexts = np.arange(1, num_points + 1)
+    nexts[face_offsets[1:] - 1] = face_offsets[:-1]
+    cross = points[:, 0] * points[nexts, 1] - points[:, 1] * points[nexts, 0]
+
+    return np.add.reduceat(cross, face_offsets[:-1]) * 0.5
+
+
+def get_uvs_from_faces(faces, uv_layer):
+    """
+    Return UV coordinates of the loops of faces as (num_loops, 2) array
+    """
+
+    coords = [c for f in faces for l in f.loops for c in l[uv_layer].uv]
+    return np.array(coords, dtype=np.float64).reshape(-1, 2)
+
+
+def set_uvs_to_faces(faces, uv_layer, uvs):
+    """
+    Write UV coordinates returned by get_uvs_from_faces() back to the loops
+    """
+
+    uv_list = uvs.tolist()
+    i = 0
+    for f in faces:
+        for l in f.loops:
+            l[uv_layer].uv = uv_list[i]
+            i += 1
+
+
+def calc_uv_origin(uvs, origin):
+    """
+    Calculate the origin of UV coordinates.
+    uvs: (N, 2) array of UV coordinates
+    origin: 'CENTER', 'LEFT_TOP', 'LEFT_CENTER', 'LEFT_BOTTOM',
+            'CENTER_TOP', 'CENTER_BOTTOM', 'RIGHT_TOP', 'RIGHT_CENTER' or
+            'RIGHT_BOTTOM'
+    The sides are taken from the bounding box, and the center is the
+    average of UV coordinates.
+    """
+
+    if origin == 'CENTER':
+        return uvs.mean(axis=0)
+
+    try:
+        horizontal, vertical = origin.split('_')
+    except ValueError as e:
+        raise ValueError("Invalid origin: {}".format(origin)) from e
+    if horizontal == 'LEFT':
+        x = uvs[:, 0].min()
+    elif horizontal == 'CENTER':
+        x = uvs[:, 0].mean()
+    elif horizontal == 'RIGHT':
+        x = uvs[:, 0].max()
+    else:
+        raise ValueError("Invalid origin: {}".format(origin))
+    if vertical == 'TOP':
+        y = uvs[:, 1].max()
+    elif vertical == 'CENTER':
+        y = uvs[:, 1].mean()
+    elif vertical == 'BOTTOM':
+        y = uvs[:, 1].min()
+    else:
+        raise ValueError("Invalid origin: {}".format(origin))
+
+    return np.array([x, y], dtype=np.float64)
+
+
+def calc_uv_group_origins(uvs, groups, num_groups, origin):
+    """
+    Calculate the origin of UV coordinates for each group.
+    uvs: (N, 2) array of UV coordinates
+    groups: (N,) group index of each UV coordinate.  Negative index means
+            that the coordinate belongs to no group.
+    origin: origin accepted by calc_uv_origin()
+    Return (num_groups, 2) array.  The origin of the empty group is NaN.
+    """
+
+    in_group = groups >= 0
+    uvs = uvs[in_group]
+    groups = groups[in_group]
+    counts = np.bincount(groups, minlength=num_groups).astype(np.float64)
+    counts[counts == 0] = np.nan
+
+    def group_mean(axis):
+        return np.bincount(groups, uvs[:, axis], minlength=num_groups) / \
+            counts
+
+    def group_min(axis):
+        values = np.full(num_groups, np.inf, dtype=np.float64)
+        np.minimum.at(values, groups, uvs[:, axis])
+        return values
+
+    def group_max(axis):
+        values = np.full(num_groups, -np.inf, dtype=np.float64)
+        np.maximum.at(values, groups, uvs[:, axis])
+        return values
+
+    if origin == 'CENTER':
+        return np.stack([group_mean(0), group_mean(1)], axis=1)
+
+    try:
+        horizontal, vertical = origin.split('_')
+    except ValueError as e:
+        raise ValueError("Invalid origin: {}".format(origin)) from e
+    funcs = {'LEFT': group_min, 'CENTER': group_mean, 'RIGHT': group_max}
+    if horizontal not in funcs:
+        raise ValueError("Invalid origin: {}".format(origin))
+    x = funcs[horizontal](0)
+    funcs = {'TOP': group_max, 'CENTER': group_mean, 'BOTTOM': group_min}
+    if vertical not in funcs:
+        raise ValueError("Invalid origin: {}".format(origin))
+    y = funcs[vertical](1)
+
+    return np.stack([x, y], axis=1)
+
+
+def scale_uv_groups(uvs, groups, num_groups, origin, factors):
+    """
+    Scale UV coordinates of each group around the origin of the group and
+    return the new array.  The coordinates in no group are not changed.
+    uvs: (N, 2) array of UV coordinates
+    groups: (N,) group index of each UV coordinate (negative: no group)
+    origin: origin accepted by calc_uv_origin()
+    factors: (num_groups,) scaling factors, or (num_groups, 2) factors
+             along U and V axis
+    """
+
+    new_uvs = uvs.copy()
+    in_group = groups >= 0
+    if not in_group.any():
+        return new_uvs
+
+    origins = calc_uv_group_origins(uvs, groups, num_groups, origin)
+    factors = np.asarray(factors, dtype=np.float64)
+    if factors.ndim == 1:
+        factors = factors[:, np.newaxis]
+    g = groups[in_group]
+    new_uvs[in_group] = origins[g] + (uvs[in_group] - origins[g]) * factors[g]
+
+    return new_uvs
+
+
+def scale_uvs(uvs, origin, factor):
+    """
+    Scale UV coordinates around the origin and return the new array.
+    uvs: (N, 2) array of UV coordinates
+    origin: origin accepted by calc_uv_origin()
+    factor: scaling factor, or the pair of factors along U and V axis
+    """
+
+    if len(uvs) == 0:
+        return uvs.copy()
+
+    center = calc_uv_origin(uvs, origin)
+    return center + (uvs - center) * np.asarray(factor, dtype=np.float64)
+
+
+class MeshArrays:
+    """
+    Loop and face data of the mesh gathered into contiguous NumPy arrays.
+
+    Loops are stored in the order of faces, so the loops of i-th face are
+    placed in the range [face_offsets[i], face_offsets[i + 1]).
+    The mesh data is read in bulk by foreach_get. On edit mode, the mesh
+    data is not accessible while editing, so the edit-mesh is written to a
+    scratch mesh by BMesh.to_mesh() and read from it. This copies the whole
+    mesh, so the cost is O(number of loops) even if only a few faces are
+    needed, though it runs in C. The scratch mesh is reused to avoid
+    creating a datablock on every call.
+    If obj is None, the data is read from bm.
+
+      uvs:           (num_loops, 2) UV coordinates
+      loop_vert_cos: (num_loops, 3) vertex coordinates of each loop
+      loop_verts:    (num_loops,) vertex indices of each loop
+      face_offsets:  (num_faces + 1,) offsets to the first loop of faces
+      face_select:   (num_faces,) face selection
+      tri_loops:     (num_triangles, 3) loop indices of triangles
+                     (only if with_triangles is True)
+      tri_faces:     (num_triangles,) face index of triangles
+                     (only if with_triangles is True)
+    """
+
+    def __init__(self, obj, bm=None, uv_layer=None, with_triangles=False):
+        self.obj = obj
+        self.bm = None
+        self.uv_layer_name = None
+        self.with_triangles = with_triangles
+        self.tri_loops = None
+        self.tri_faces = None
+
+        if obj is None or obj.mode == 'EDIT':
+            if bm is None:
+                bm = bmesh.from_edit_mesh(obj.data)
+            if uv_layer is None and bm.loops.layers.uv:
+                uv_layer = bm.loops.layers.uv.verify()
+            self.bm = bm
+            mesh = self.__get_scratch_mesh()
+            bm.to_mesh(mesh)
+            self.__read_mesh(mesh, uv_layer.name if uv_layer else None)
+            # Free the copied data, and keep only the datablock.
+            if hasattr(mesh, "clear_geometry"):
+                mesh.clear_geometry()
+        else:
+            mesh = obj.data
+            uv_layer_name = None
+            if mesh.uv_layers.active is not None:
+                uv_layer_name = mesh.uv_layers.active.name
+            if uv_layer is not None:
+                uv_layer_name = uv_layer.name
+            self.__read_mesh(mesh, uv_layer_name)
+
+    # The name starts with '.' to hide the scratch mesh from the UI.
+    SCRATCH_MESH_NAME = ".muv_mesh_arrays"
+
+    @classmethod
+    def __get_scratch_mesh(cls):
+        # The mesh is looked up by name on every call, because the reference
+        # is invalidated by undo or loading a file.
+        mesh = bpy.data.meshes.get(cls.SCRATCH_MESH_NAME)
+        if mesh is None:
+            mesh = bpy.data.meshes.new(cls.SCRATCH_MESH_NAME)
+        return mesh
+
+    def __read_mesh(self, mesh, uv_layer_name):
+        self.uv_layer_name = uv_layer_name
+
+        num_verts = len(mesh.vertices)
+        num_loops = len(mesh.loops)
+        num_faces = len(mesh.polygons)
+
+        # Coordinates are read in single precision which is the precision
+        # of the mesh data, since foreach_get copies the data much faster
+        # when the type matches.
+        vert_cos = np.empty(num_verts * 3, dtype=np.float32)
+        mesh.vertices.foreach_get("co", vert_cos)
+        self.vert_cos = vert_cos.reshape(-1, 3).astype(np.float64)
+
+        self.loop_verts = np.empty(num_loops, dtype=np.int64)
+        mesh.loops.foreach_get("vertex_index", self.loop_verts)
+        self.loop_vert_cos = self.vert_cos[self.loop_verts]
+
+        loop_starts = np.empty(num_faces, dtype=np.int64)
+        mesh.polygons.foreach_get("loop_start", loop_starts)
+        self.loop_totals = np.empty(num_faces, dtype=np.int64)
+        mesh.polygons.foreach_get("loop_total", self.loop_totals)
+        self.face_offsets = np.append(loop_starts, num_loops)
+
+        self.face_select = np.empty(num_faces, dtype=bool)
+        mesh.polygons.foreach_get("select", self.face_select)
+
+        uvs = np.zeros(num_loops * 2, dtype=np.float32)
+        if uv_layer_name is not None:
+            mesh.uv_layers[uv_layer_name].data.foreach_get("uv", uvs)
+        self.uvs = uvs.reshape(-1, 2).astype(np.float64)
+
+        if self.with_triangles:
+            self.__read_triangles(mesh)
+
+    def __read_triangles(self, mesh):
+        if compat.check_version(2, 80, 0) >= 0:
+            mesh.calc_loop_triangles()
+            num_tris = len(mesh.loop_triangles)
+            tri_loops = np.empty(num_tris * 3, dtype=np.int64)
+            mesh.loop_triangles.foreach_get("loops", tri_loops)
+            self.tri_loops = tri_loops.reshape(-1, 3)
+            if hasattr(mesh, "loop_triangle_polygons"):
+                tri_faces = np.empty(num_tris, dtype=np.int32)
+                mesh.loop_triangle_polygons.foreach_get("value", tri_faces)
+                self.tri_faces = tri_faces.astype(np.int64)
+            else:
+                self.tri_faces = np.empty(num_tris, dtype=np.int64)
+                mesh.loop_triangles.foreach_get("polygon_index",
+                                                self.tri_faces)
+        else:
+            # Mesh.loop_triangles is not available, so the faces are
+            # tessellated by BMesh.
+            bm = self.bm
+            if bm is None:
+                bm = bmesh.new()
+                bm.from_mesh(mesh)
+            try:
+                self.__read_triangles_from_bmesh(bm)
+            finally:
+                if bm is not self.bm:
+                    bm.free()
+
+    def __read_triangles_from_bmesh(self, bm):
+        # BMesh.calc_tessface() is renamed to calc_loop_triangles() in 2.80.
+        if hasattr(bm, "calc_loop_triangles"):
+            tris = bm.calc_loop_triangles()
+        else:
+            tris = bm.calc_tessface()
+        bm.verts.index_update()
+        bm.faces.index_update()
+
+        num_tris = len(tris)
+        self.tri_faces = np.fromiter((t[0].face.index for t in tris),
+                                     dtype=np.int64, count=num_tris)
+        tri_verts = np.fromiter((l.vert.index for t in tris for l in t),
+                                dtype=np.int64, count=num_tris * 3)
+
+        # A face has each vertex only once, so the loop index is found from
+        # the pair of the face index and the vertex index.
+        num_verts = len(self.vert_cos)
+        loop_keys = self.loop_faces() * num_verts + self.loop_verts
+        order = np.argsort(loop_keys, kind='mergesort')
+        tri_keys = np.repeat(self.tri_faces, 3) * num_verts + tri_verts
+        self.tri_loops = order[np.searchsorted(loop_keys[order], tri_keys)]\
+            .reshape(-1, 3)
+
+    @property
+    def num_faces(self):
+        return len(self.loop_totals)
+
+    @property
+    def num_loops(self):
+        return len(self.loop_verts)
+
+    def loop_faces(self):
+        """
+        Return face index of each loop
+        """
+
+        return np.repeat(np.arange(self.num_faces), self.loop_totals)
+
+    def face_loop_mask(self, face_mask):
+        """
+        Expand the mask of faces to the mask of loops
+        """
+
+        return np.repeat(face_mask, self.loop_totals)
+
+    def face_sums(self, loop_values):
+        """
+        Sum up the loop values for each face
+        """
+
+        return np.add.reduceat(loop_values, self.face_offsets[:-1], axis=0)
+
+    def face_any(self, loop_mask):
+        """
+        Return True for the faces which have at least one masked loop
+        """
+
+        return np.logical_or.reduceat(loop_mask, self.face_offsets[:-1])
+
+    def face_uv_areas(self):
+        """
+        Return signed UV area of each face
+        """
+
+        return calc_signed_polygon_areas(self.uvs, self.face_offsets)
+
+    def face_mesh_areas(self):
+        """
+        Return 3D area of each face as the sum of the areas of its triangles
+        """
+
+        cos = self.loop_vert_cos[self.tri_loops]
+        cross = np.cross(cos[:, 1] - cos[:, 0], cos[:, 2] - cos[:, 0])
+        areas = 0.5 * np.sqrt(np.einsum('ij,ij->i', cross, cross))
+        return np.bincount(self.tri_faces, areas, minlength=self.num_faces)
+
+    def face_triangle_uv_areas(self):
+        """
+        Return UV area of each face as the sum of the unsigned areas of its
+        triangles
+        """
+
+        uvs = self.uvs[self.tri_loops]
+        v1 = uvs[:, 1] - uvs[:, 0]
+        v2 = uvs[:, 2] - uvs[:, 0]
+        areas = 0.5 * np.abs(v1[:, 0] * v2[:, 1] - v1[:, 1] * v2[:, 0])
+        return np.bincount(self.tri_faces, areas, minlength=self.num_faces)
+
+    def uv_select(self, bm, uv_layer):
+        """
+        Return UV selection of each loop.
+        UV selection is read from BMesh because it is not exposed as the
+        mesh data in all versions.
+        """
+
+        return np.fromiter(
+            (l[uv_layer].select for f in bm.faces for l in f.loops),
+            dtype=bool, count=self.num_loops)
+
+    def write_uvs(self, uvs=None, loop_mask=None):
+        """
+        Write back UV coordinates to the mesh.
+        If loop_mask is specified, only masked loops are written.
+        """
+
+        if uvs is None:
+            uvs = self.uvs
+        if self.num_faces == 0:
+            return
+
+        if self.bm is None:
+            mesh = self.obj.data
+            if loop_mask is not None:
+                uvs = np.where(loop_mask[:, np.newaxis], uvs, self.uvs)
+            mesh.uv_layers[self.uv_layer_name].data.foreach_set(
+                "uv", np.ascontiguousarray(uvs, dtype=np.float64).ravel())
+            mesh.update()
+            return
+
+        # BMesh does not support foreach_set, so we write UVs only for the
+        # faces which have the masked loops.
+        bm = self.bm
+        uv_layer = bm.loops.layers.uv[self.uv_layer_name]
+        if loop_mask is None:
+            loop_mask = np.ones(len(uvs), dtype=bool)
+        # Number of masked loops per face. The faces whose loops are all
+        # masked (most common case) are written without per-loop checks.
+        num_masked = np.add.reduceat(loop_mask.astype(np.int64),
+                                     self.face_offsets[:-1])
+        face_states = np.where(num_masked == self.loop_totals, 2,
+                               np.minimum(num_masked, 1)).tolist()
+        uv_iter = iter(uvs[loop_mask].tolist())
+        mask_list = None
+        for fidx, (f, state) in enumerate(zip(bm.faces, face_states)):
+            if state == 0:
+                continue
+            if state == 2:
+                for l, uv in zip(f.loops, uv_iter):
+                    l[uv_layer].uv = uv
+                continue
+            if mask_list is None:
+                mask_list = loop_mask.tolist()
+            lidx = int(self.face_offsets[fidx])
+            for l in f.loops:
+                if mask_list[lidx]:
+                    l[uv_layer].uv = next(uv_iter)
+                lidx += 1
+
+
 def __get_island_info(uv_layer, islands):
     """
     get information about each island
@@ -266,6 +719,45 @@ def __get_island(bm, face_to_verts, vert_to_faces):
     return uv_island_lists
 
 
+def __get_island_by_union_find(faces, uv_layer):
+    """
+    Get island list by using disjoint-set (union-find)
+    """
+
+    # Give an integer ID to each UV vertex (a pair of UV coordinate and
+    # vertex index), and unite all UV vertices which belong to same face.
+    uv_vert_ids = {}    # { (UV, vertex index): UV vertex ID }
+    dset = DisjointSet()
+    face_to_uv_vert = []
+    for f in faces:
+        first_id = None
+        for l in f.loops:
+            key = (l[uv_layer].uv.to_tuple(5), l.vert.index)
+            id_ = uv_vert_ids.get(key)
+            if id_ is None:
+                id_ = dset.add()
+                uv_vert_ids[key] = id_
+            if first_id is None:
+                first_id = id_
+            else:
+                dset.union(first_id, id_)
+        face_to_uv_vert.append(first_id)
+
+    # Faces whose UV vertices have same root belong to same island.
+    root_to_island = {}     # { root UV vertex ID: island }
+    uv_island_lists = []
+    for f, id_ in zip(faces, face_to_uv_vert):
+        root = dset.find(id_)
+        island = root_to_island.get(root)
+        if island is None:
+            island = []
+            root_to_island[root] = island
+            uv_island_lists.append(island)
+        island.append({'face': f})
+
+    return uv_island_lists
+
+
 def __create_vert_face_db(faces, uv_layer):
     # create mesh database for all faces
     face_to_verts = defaultdict(set)
@@ -279,12 +771,244 @@ def __create_vert_face_db(faces, uv_layer):
     return (face_to_verts, vert_to_faces)
 
 
-def get_island_info(obj, only_selected=True):
+# Island cache
+#   Islands are cached for each mesh, UV layer and face selection mode,
+#   and are reused while the fingerprint of the faces is not changed.
+#   When only a few faces are changed, only the islands around the changed
+#   faces are rebuilt.
+#   Every call still reads the edit-mesh into MeshArrays, which writes the
+#   whole mesh to a scratch mesh by BMesh.to_mesh() and copies it by
+#   foreach_get. When the BMesh, its element counts and the checksum of the
+#   arrays are not changed, the cached island information is returned
+#   without hashing each face or building the information in Python.
+#
+# Format:
+#
+# {
+#   (mesh pointer, UV layer name, only_selected): {
+#     bm: BMesh (BMesh which the islands are built from)
+#     counts: (number of vertices, edges and faces)
+#     checksum: int (hash of all UVs, vertices and face selection)
+#     island_info: [island information, ...]
+#     face_hashes: numpy.ndarray (hash of UVs and vertices of each face)
+#     face_in_set: numpy.ndarray (True if face is the target of islands)
+#     face_islands: numpy.ndarray (island index of each face, or -1)
+#     islands: [[face index, ...], ...]
+#   },
+#   ...
+# }
+__island_cache = OrderedDict()
+__ISLAND_CACHE_MAX_ENTRIES = 32
+# Islands are rebuilt from scratch when the ratio of changed faces exceeds.
+__ISLAND_CACHE_REPAIR_RATIO = 0.1
+
+
+def clear_island_cache():
+    __island_cache.clear()
+
+
+def __mix_hash(x):
+    # splitmix64 finalizer
+    x = (x ^ (x >> np.uint64(30))) * np.uint64(0xbf58476d1ce4e5b9)
+    x = (x ^ (x >> np.uint64(27))) * np.uint64(0x94d049bb133111eb)
+    return x ^ (x >> np.uint64(31))
+
+
+def __calc_face_hashes(arrays):
+    """
+    Calculate hash of UV coordinates and vertices for each face
+    """
+
+    if arrays.num_faces == 0:
+        return np.zeros(0, dtype=np.uint64)
+
+    uv_bits = np.ascontiguousarray(arrays.uvs).view(np.uint64)
+    loop_pos = np.arange(arrays.num_loops) - \
+        np.repeat(arrays.face_offsets[:-1], arrays.loop_totals)
+    h = __mix_hash(uv_bits[:, 0])
+    h = __mix_hash(h ^ uv_bits[:, 1])
+    h = __mix_hash(h ^ arrays.loop_verts.astype(np.uint64))
+    h = __mix_hash(h ^ loop_pos.astype(np.uint64))
+
+    return np.add.reduceat(h, arrays.face_offsets[:-1])
+
+
+def __build_islands(bm, uv_layer, face_indices):
+    """
+    Build islands from faces, and return the list of face indices of islands
+    """
+
+    faces = [bm.faces[i] for i in face_indices]
+    islands = __get_island_by_union_find(faces, uv_layer)
+    return [[f['face'].index for f in isl] for isl in islands]
+
+
+def __repair_islands(bm, uv_layer, entry, changed, face_in_set):
+    """
+    Rebuild only the islands which relate to the changed faces
+    """
+
+    face_islands = entry["face_islands"]
+
+    # Islands which include changed faces or are connected to the changed
+    # faces via the shared vertex may be merged or split.
+    affected = set(face_islands[changed].tolist())
+    for fidx in changed.tolist():
+        for v in bm.faces[fidx].verts:
+            for f in v.link_faces:
+                affected.add(int(face_islands[f.index]))
+    affected.discard(-1)
+
+    face_indices = set(changed.tolist())
+    for isl_idx in affected:
+        face_indices.update(entry["islands"][isl_idx])
+    face_indices = [i for i in sorted(face_indices) if face_in_set[i]]
+    rebuilt = __build_islands(bm, uv_layer, face_indices)
+
+    islands = [isl for i, isl in enumerate(entry["islands"])
+               if i not in affected]
+    islands.extend(rebuilt)
+    # Keep the order which is same as the order of the full build.
+    islands.sort(key=lambda isl: isl[0])
+
+    return islands
+
+
+def __get_island_info_from_arrays(bm, arrays, islands):
+    """
+    Get information about each island from the mesh arrays
+    """
+
+    if not islands:
+        return []
+
+    starts = arrays.face_offsets[:-1]
+    face_max = np.maximum.reduceat(arrays.uvs, starts)
+    face_min = np.minimum.reduceat(arrays.uvs, starts)
+    face_sum = np.add.reduceat(arrays.uvs, starts)
+    face_ave = face_sum / arrays.loop_totals[:, np.newaxis]
+
+    order = np.concatenate(islands)
+    isl_starts = np.cumsum([0] + [len(isl) for isl in islands[:-1]])
+    isl_max = np.maximum.reduceat(face_max[order], isl_starts).tolist()
+    isl_min = np.minimum.reduceat(face_min[order], isl_starts).tolist()
+    isl_sum = np.add.reduceat(face_sum[order], isl_starts)
+    isl_num_uv = np.add.reduceat(arrays.loop_totals[order], isl_starts)
+    isl_center = (isl_sum / isl_num_uv[:, np.newaxis]).tolist()
+    isl_num_uv = isl_num_uv.tolist()
+    face_max = face_max.tolist()
+    face_min = face_min.tolist()
+    face_ave = face_ave.tolist()
+
+    island_info = []
+    for i, isl in enumerate(islands):
+        faces = [{'face': bm.faces[fidx],
+                  'max_uv': Vector(face_max[fidx]),
+                  'min_uv': Vector(face_min[fidx]),
+                  'ave_uv': Vector(face_ave[fidx])} for fidx in isl]
+        max_uv = Vector(isl_max[i])
+        min_uv = Vector(isl_min[i])
+        island_info.append({
+            'center': Vector(isl_center[i]),
+            'size': max_uv - min_uv,
+            'num_uv': isl_num_uv[i],
+            'group': -1,
+            'faces': faces,
+            'max': max_uv,
+            'min': min_uv,
+        })
+
+    return island_info
+
+
+def __calc_checksum(arrays, face_in_set):
+    return hash((arrays.uvs.tobytes(), arrays.loop_verts.tobytes(),
+                 arrays.loop_totals.tobytes(), face_in_set.tobytes()))
+
+
+def __copy_island_info(island_info):
+    # Callers update the island information (ex. 'group', 'sorted'), so
+    # return the copy of them to keep the cached ones unchanged.
+    return [dict(info) for info in island_info]
+
+
+def __is_island_cache_hit(entry, bm, counts, checksum):
+    if entry is None:
+        return False
+    if entry["bm"] is not bm or not bm.is_valid:
+        return False
+    if entry["counts"] != counts or entry["checksum"] != checksum:
+        return False
+    # Faces may be replaced by the other faces with the same data.
+    return all(f['face'].is_valid
+               for info in entry["island_info"] for f in info['faces'])
+
+
+def get_island_info(obj, only_selected=True, use_cache=True):
     bm = bmesh.from_edit_mesh(obj.data)
     if check_version(2, 73, 0) >= 0:
         bm.faces.ensure_lookup_table()
 
-    return get_island_info_from_bmesh(bm, only_selected)
+    if not use_cache:
+        return get_island_info_from_bmesh(bm, only_selected)
+
+    if not bm.loops.layers.uv:
+        return None
+    uv_layer = bm.loops.layers.uv.verify()
+
+    arrays = MeshArrays(obj, bm, uv_layer)
+    if only_selected:
+        face_in_set = arrays.face_select
+    else:
+        face_in_set = np.ones(arrays.num_faces, dtype=bool)
+    counts = (len(bm.verts), len(bm.edges), len(bm.faces))
+    checksum = __calc_checksum(arrays, face_in_set)
+
+    key = (obj.data.as_pointer(), uv_layer.name, only_selected)
+    entry = __island_cache.pop(key, None)
+    if __is_island_cache_hit(entry, bm, counts, checksum):
+        __island_cache[key] = entry
+        debug_print("Island cache: Hit")
+        return __copy_island_info(entry["island_info"])
+
+    face_hashes = __calc_face_hashes(arrays)
+    if entry is None or len(entry["face_hashes"]) != arrays.num_faces:
+        changed = None
+    else:
+        changed = np.flatnonzero((entry["face_hashes"] != face_hashes) |
+                                 (entry["face_in_set"] != face_in_set))
+
+    if changed is None or \
+            len(changed) > arrays.num_faces * __ISLAND_CACHE_REPAIR_RATIO:
+        islands = __build_islands(bm, uv_layer,
+                                  np.flatnonzero(face_in_set).tolist())
+        debug_print("Island cache: Build")
+    elif len(changed) > 0:
+        islands = __repair_islands(bm, uv_layer, entry, changed, face_in_set)
+        debug_print("Island cache: Repair {} faces".format(len(changed)))
+    else:
+        # Faces are not changed, but the BMesh is changed.
+        islands = entry["islands"]
+        debug_print("Island cache: Reuse islands")
+
+    island_info = __get_island_info_from_arrays(bm, arrays, islands)
+    face_islands = np.full(arrays.num_faces, -1, dtype=np.int64)
+    for i, isl in enumerate(islands):
+        face_islands[isl] = i
+    __island_cache[key] = {
+        "bm": bm,
+        "counts": counts,
+        "checksum": checksum,
+        "island_info": island_info,
+        "face_hashes": face_hashes,
+        "face_in_set": face_in_set,
+        "face_islands": face_islands,
+        "islands": islands,
+    }
+    while len(__island_cache) > __ISLAND_CACHE_MAX_ENTRIES:
+        __island_cache.popitem(last=False)
+
+    return __copy_island_info(island_info)
 
 
 # Return island info.
@@ -325,11 +1049,13 @@ def get_island_info_from_bmesh(bm, only_selected=True):
     return get_island_info_from_faces(bm, selected_faces, uv_layer)
 
 
-def get_island_info_from_faces(bm, faces, uv_layer):
-    ftv, vtf = __create_vert_face_db(faces, uv_layer)
-
+def get_island_info_from_faces(bm, faces, uv_layer, use_union_find=True):
     # Get island information
-    uv_island_lists = __get_island(bm, ftv, vtf)
+    if use_union_find:
+        uv_island_lists = __get_island_by_union_find(faces, uv_layer)
+    else:
+        ftv, vtf = __create_vert_face_db(faces, uv_layer)
+        uv_island_lists = __get_island(bm, ftv, vtf)
     island_info = __get_island_info(uv_layer, uv_island_lists)
 
     return island_info
@@ -369,7 +1095,7 @@ def calc_tris_3d_area(points):
     return 0.5 * area
 
 
-def get_faces_list(bm, method, only_selected):
+def get_faces_list(bm, method, only_selected, obj=None):
     faces_list = []
     if method == 'MESH':
         if only_selected:
@@ -380,16 +1106,16 @@ def get_faces_list(bm, method, only_selected):
         if not bm.loops.layers.uv:
             return None
         uv_layer = bm.loops.layers.uv.verify()
-        if only_selected:
+        if obj is not None:
+            islands = get_island_info(obj, only_selected)
+        elif only_selected:
             faces = [f for f in bm.faces if f.select]
             islands = get_island_info_from_faces(bm, faces, uv_layer)
-            for isl in islands:
-                faces_list.append([f["face"] for f in isl["faces"]])
         else:
             faces = [f for f in bm.faces]
             islands = get_island_info_from_faces(bm, faces, uv_layer)
-            for isl in islands:
-                faces_list.append([f["face"] for f in isl["faces"]])
+        for isl in islands:
+            faces_list.append([f["face"] for f in isl["faces"]])
     elif method == 'FACE':
         if only_selected:
             for f in bm.faces:
@@ -404,21 +1130,27 @@ def get_faces_list(bm, method, only_selected):
     return faces_list
 
 
+def __get_face_area_arrays(bm, uv_layer=None):
+    bm.faces.index_update()
+    return MeshArrays(None, bm, uv_layer, with_triangles=True)
+
+
 def measure_all_faces_mesh_area(bm):
-    if compat.check_version(2, 80, 0) >= 0:
-        triangle_loops = bm.calc_loop_triangles()
-    else:
-        triangle_loops = bm.calc_tessface()
+    """
+    Return 3D area of each face as the array indexed by the face index
+    """
 
-    areas = {face: 0.0 for face in bm.faces}
+    return __get_face_area_arrays(bm).face_mesh_areas()
 
-    for loops in triangle_loops:
-        face = loops[0].face
-        area = areas[face]
-        area += calc_tris_3d_area([l.vert.co for l in loops])
-        areas[face] = area
 
-    return areas
+def measure_all_faces_area(bm, uv_layer):
+    """
+    Return 3D and UV areas of each face as the arrays indexed by the face
+    index.  The mesh is triangulated only once.
+    """
+
+    arrays = __get_face_area_arrays(bm, uv_layer)
+    return arrays.face_mesh_areas(), arrays.face_triangle_uv_areas()
 
 
 def measure_mesh_area(obj, calc_method, only_selected):
@@ -428,24 +1160,27 @@ def measure_mesh_area(obj, calc_method, only_selected):
         bm.edges.ensure_lookup_table()
         bm.faces.ensure_lookup_table()
 
-    faces_list = get_faces_list(bm, calc_method, only_selected)
+    faces_list = get_faces_list(bm, calc_method, only_selected, obj)
+    face_areas = measure_all_faces_mesh_area(bm)
 
     areas = []
     for faces in faces_list:
-        areas.append(measure_mesh_area_from_faces(bm, faces))
+        areas.append(measure_mesh_area_from_faces(bm, faces, face_areas))
 
     return areas
 
 
-def measure_mesh_area_from_faces(bm, faces):
-    face_areas = measure_all_faces_mesh_area(bm)
+def measure_mesh_area_from_faces(bm, faces, face_areas=None):
+    """
+    face_areas: 3D area of each face returned by measure_all_faces_area()
+                or measure_all_faces_mesh_area().  If it is None, it is
+                measured in this function.
+    """
 
-    mesh_area = 0.0
-    for f in faces:
-        if f in face_areas:
-            mesh_area += face_areas[f]
+    if face_areas is None:
+        face_areas = measure_all_faces_mesh_area(bm)
 
-    return mesh_area
+    return float(face_areas[[f.index for f in faces]].sum())
 
 
 def find_texture_layer(bm):
@@ -485,6 +1220,118 @@ def find_texture_nodes(obj):
     return nodes
 
 
+# Names of the images of the texture nodes in the material.
+# The size of the image is not cached because resizing the image does not
+# always update the depsgraph.  Image itself is not cached because undo and
+# redo invalidate the reference, so the image is looked up by name.
+# The cache is cleared when any material, node tree or image is updated, or
+# on loading a file, undo and redo.
+# {
+#   (material pointer, material session UID, node tree pointer): [str]
+# }
+__texture_size_cache = {}
+__TEXTURE_SIZE_CACHE_ENABLED = False
+
+
+def clear_texture_size_cache():
+    __texture_size_cache.clear()
+
+
+@bpy.app.handlers.persistent
+def __on_depsgraph_update_for_texture_size(_, depsgraph):
+    for id_type in ('MATERIAL', 'NODETREE', 'IMAGE'):
+        if depsgraph.id_type_updated(id_type):
+            __texture_size_cache.clear()
+            return
+
+
+@bpy.app.handlers.persistent
+def __on_reset_for_texture_size(*_):
+    __texture_size_cache.clear()
+
+
+def add_texture_size_cache_handlers():
+    # pylint: disable=W0603
+    global __TEXTURE_SIZE_CACHE_ENABLED
+
+    # Depsgraph update handler is not available in <2.80, so the texture
+    # sizes are not cached.
+    if compat.check_version(2, 80, 0) < 0:
+        return
+
+    handlers = bpy.app.handlers
+    if __on_depsgraph_update_for_texture_size not in \
+            handlers.depsgraph_update_post:
+        handlers.depsgraph_update_post.append(
+            __on_depsgraph_update_for_texture_size)
+    for handler_list in (handlers.load_post, handlers.undo_post,
+                         handlers.redo_post):
+        if __on_reset_for_texture_size not in handler_list:
+            handler_list.append(__on_reset_for_texture_size)
+    __TEXTURE_SIZE_CACHE_ENABLED = True
+
+
+def remove_texture_size_cache_handlers():
+    # pylint: disable=W0603
+    global __TEXTURE_SIZE_CACHE_ENABLED
+
+    handlers = bpy.app.handlers
+    if compat.check_version(2, 80, 0) >= 0:
+        if __on_depsgraph_update_for_texture_size in \
+                handlers.depsgraph_update_post:
+            handlers.depsgraph_update_post.remove(
+                __on_depsgraph_update_for_texture_size)
+    for handler_list in (handlers.load_post, handlers.undo_post,
+                         handlers.redo_post):
+        if __on_reset_for_texture_size in handler_list:
+            handler_list.remove(__on_reset_for_texture_size)
+    __TEXTURE_SIZE_CACHE_ENABLED = False
+    __texture_size_cache.clear()
+
+
+def __get_material_texture_sizes(mtrl):
+    if not __TEXTURE_SIZE_CACHE_ENABLED:
+        return [tuple(n.image.size)
+                for n in find_texture_nodes_from_material(mtrl)]
+
+    # The pointer of the deleted material can be reused, so the session
+    # UID is also used to identify the material.
+    key = (mtrl.as_pointer(), getattr(mtrl, "session_uid", None),
+           mtrl.node_tree.as_pointer() if mtrl.node_tree else None)
+    names = __texture_size_cache.get(key)
+    if names is not None:
+        images = [bpy.data.images.get(name) for name in names]
+        # The image may be renamed or removed.
+        if None not in images:
+            return [tuple(img.size) for img in images]
+
+    images = [n.image for n in find_texture_nodes_from_material(mtrl)]
+    __texture_size_cache[key] = [img.name for img in images]
+
+    return [tuple(img.size) for img in images]
+
+
+def find_texture_sizes(obj, face=None, tex_layer=None):
+    """
+    Return the sizes of the images which find_images() returns.
+    The sizes of the images in the materials are cached.
+    """
+
+    # try to find from texture_layer
+    if tex_layer and face:
+        if face[tex_layer].image is not None:
+            return [tuple(face[tex_layer].image.size)]
+
+    # not found, then try to search from node
+    sizes = []
+    for slot in obj.material_slots:
+        if not slot.material:
+            continue
+        sizes.extend(__get_material_texture_sizes(slot.material))
+
+    return sizes
+
+
 def find_image(obj, face=None, tex_layer=None):
     images = find_images(obj, face, tex_layer)
 
@@ -514,86 +1361,78 @@ def find_images(obj, face=None, tex_layer=None):
 
 
 def measure_all_faces_uv_area(bm, uv_layer):
-    if compat.check_version(2, 80, 0) >= 0:
-        triangle_loops = bm.calc_loop_triangles()
-    else:
-        triangle_loops = bm.calc_tessface()
+    """
+    Return UV area of each face as the array indexed by the face index
+    """
 
-    areas = {face: 0.0 for face in bm.faces}
+    return __get_face_area_arrays(bm, uv_layer).face_triangle_uv_areas()
 
-    for loops in triangle_loops:
-        face = loops[0].face
-        area = areas[face]
-        area += calc_tris_2d_area([l[uv_layer].uv for l in loops])
-        areas[face] = area
 
-    return areas
+def __get_texture_size(obj, face, tex_layer, tex_selection_method, tex_size):
+    # user specified
+    if tex_selection_method == 'USER_SPECIFIED' and tex_size is not None:
+        return tex_size
+
+    img_sizes = find_texture_sizes(obj, face, tex_layer)
+    # can not find from node, so we can not get texture size
+    if not img_sizes:
+        return None
+
+    # first texture if there are more than 2 textures assigned
+    # to the object
+    if tex_selection_method == 'FIRST':
+        if len(img_sizes) >= 2:
+            raise RuntimeError("Find more than 2 images")
+        return img_sizes[0]
+    # average texture size
+    if tex_selection_method == 'AVERAGE':
+        return [sum(size[0] for size in img_sizes) / len(img_sizes),
+                sum(size[1] for size in img_sizes) / len(img_sizes)]
+    # max texture size
+    if tex_selection_method == 'MAX':
+        return [max(size[0] for size in img_sizes),
+                max(size[1] for size in img_sizes)]
+    # min texture size
+    if tex_selection_method == 'MIN':
+        return [min(size[0] for size in img_sizes),
+                min(size[1] for size in img_sizes)]
+
+    raise RuntimeError("Unexpected method: {}".format(tex_selection_method))
 
 
 def measure_uv_area_from_faces(obj, bm, faces, uv_layer, tex_layer,
-                               tex_selection_method, tex_size):
+                               tex_selection_method, tex_size,
+                               face_areas=None):
+    """
+    face_areas: UV area of each face returned by measure_all_faces_area()
+                or measure_all_faces_uv_area().  If it is None, it is
+                measured in this function.
+    """
 
-    face_areas = measure_all_faces_uv_area(bm, uv_layer)
+    if not faces:
+        return 0.0
 
-    uv_area = 0.0
-    for f in faces:
-        if f not in face_areas:
-            continue
+    if face_areas is None:
+        face_areas = measure_all_faces_uv_area(bm, uv_layer)
+    uv_areas = face_areas[[f.index for f in faces]]
 
-        f_uv_area = face_areas[f]
-
-        # user specified
-        if tex_selection_method == 'USER_SPECIFIED' and tex_size is not None:
-            img_size = tex_size
-        # first texture if there are more than 2 textures assigned
-        # to the object
-        elif tex_selection_method == 'FIRST':
-            img = find_image(obj, f, tex_layer)
-            # can not find from node, so we can not get texture size
-            if not img:
-                return None
-            img_size = img.size
-        # average texture size
-        elif tex_selection_method == 'AVERAGE':
-            imgs = find_images(obj, f, tex_layer)
-            if not imgs:
-                return None
-
-            img_size_total = [0.0, 0.0]
-            for img in imgs:
-                img_size_total = [img_size_total[0] + img.size[0],
-                                  img_size_total[1] + img.size[1]]
-            img_size = [img_size_total[0] / len(imgs),
-                        img_size_total[1] / len(imgs)]
-        # max texture size
-        elif tex_selection_method == 'MAX':
-            imgs = find_images(obj, f, tex_layer)
-            if not imgs:
-                return None
-
-            img_size_max = [-99999999.0, -99999999.0]
-            for img in imgs:
-                img_size_max = [max(img_size_max[0], img.size[0]),
-                                max(img_size_max[1], img.size[1])]
-            img_size = img_size_max
-        # min texture size
-        elif tex_selection_method == 'MIN':
-            imgs = find_images(obj, f, tex_layer)
-            if not imgs:
-                return None
-
-            img_size_min = [99999999.0, 99999999.0]
-            for img in imgs:
-                img_size_min = [min(img_size_min[0], img.size[0]),
-                                min(img_size_min[1], img.size[1])]
-            img_size = img_size_min
-        else:
-            raise RuntimeError("Unexpected method: {}"
-                               .format(tex_selection_method))
+    # Texture can be assigned to each face only by the texture layer.
+    if tex_layer is None:
+        img_size = __get_texture_size(obj, None, None, tex_selection_method,
+                                      tex_size)
+        if img_size is None:
+            return None
+        return float(uv_areas.sum()) * img_size[0] * img_size[1]
 
-        uv_area += f_uv_area * img_size[0] * img_size[1]
+    img_areas = np.empty(len(faces), dtype=np.float64)
+    for i, f in enumerate(faces):
+        img_size = __get_texture_size(obj, f, tex_layer, tex_selection_method,
+                                      tex_size)
+        if img_size is None:
+            return None
+        img_areas[i] = img_size[0] * img_size[1]
 
-    return uv_area
+    return float(np.dot(uv_areas, img_areas))
 
 
 def measure_uv_area(obj, calc_method, tex_selection_method,
@@ -608,14 +1447,15 @@ def measure_uv_area(obj, calc_method, tex_selection_method,
         return None
     uv_layer = bm.loops.layers.uv.verify()
     tex_layer = find_texture_layer(bm)
-    faces_list = get_faces_list(bm, calc_method, only_selected)
+    faces_list = get_faces_list(bm, calc_method, only_selected, obj)
+    face_areas = measure_all_faces_uv_area(bm, uv_layer)
 
     # measure
     uv_areas = []
     for faces in faces_list:
         uv_area = measure_uv_area_from_faces(
             obj, bm, faces, uv_layer, tex_layer,
-            tex_selection_method, tex_size)
+            tex_selection_method, tex_size, face_areas)
         if uv_area is None:
             return None
         uv_areas.append(uv_area)
@@ -623,6 +1463,105 @@ def measure_uv_area(obj, calc_method, tex_selection_method,
     return uv_areas
 
 
+def __get_face_image_areas(obj, bm, tex_layer, tex_selection_method,
+                           tex_size, face_indices):
+    """
+    Return the image area of each face in face_indices, or the image area
+    shared by all faces if the texture layer is not available.
+    Return None if the texture size can not be found.
+    """
+
+    # Texture can be assigned to each face only by the texture layer.
+    if tex_layer is None:
+        img_size = __get_texture_size(obj, None, None, tex_selection_method,
+                                      tex_size)
+        if img_size is None:
+            return None
+        return img_size[0] * img_size[1]
+
+    if check_version(2, 73, 0) >= 0:
+        bm.faces.ensure_lookup_table()
+    img_areas = np.empty(len(face_indices), dtype=np.float64)
+    for i, fidx in enumerate(face_indices):
+        img_size = __get_texture_size(obj, bm.faces[fidx], tex_layer,
+                                      tex_selection_method, tex_size)
+        if img_size is None:
+            return None
+        img_areas[i] = img_size[0] * img_size[1]
+
+    return img_areas
+
+
+def measure_all_faces_texel_density(obj, bm, uv_layer, tex_selection_method,
+                                    tex_size, arrays=None):
+    """
+    Return texel density of each face as the array indexed by the face index.
+    The density of the faces without 3D area is 0.0.
+    Return None if the texture size can not be found.
+    arrays: MeshArrays read from bm with triangles.  If it is None, it is
+            read in this function.
+    """
+
+    if arrays is None:
+        arrays = __get_face_area_arrays(bm, uv_layer)
+    mesh_areas = arrays.face_mesh_areas()
+    uv_areas = arrays.face_triangle_uv_areas()
+
+    img_areas = __get_face_image_areas(
+        obj, bm, find_texture_layer(bm), tex_selection_method, tex_size,
+        range(arrays.num_faces))
+    if img_areas is None:
+        return None
+    uv_areas *= img_areas
+
+    densities = np.zeros(len(mesh_areas), dtype=np.float64)
+    valid = mesh_areas > 0.0
+    densities[valid] = np.sqrt(uv_areas[valid] / mesh_areas[valid])
+
+    return densities
+
+
+def get_face_groups(num_faces, faces_list):
+    """
+    Return the group index of each face from the list of face groups
+    returned by get_faces_list().  The faces in no group are -1.
+    Face groups must not share faces, and the faces must be indexed.
+    """
+
+    face_groups = np.full(num_faces, -1, dtype=np.int64)
+    for i, faces in enumerate(faces_list):
+        face_groups[[f.index for f in faces]] = i
+
+    return face_groups
+
+
+def measure_face_groups_area(obj, bm, arrays, face_groups, num_groups,
+                             tex_selection_method, tex_size):
+    """
+    Measure 3D and UV areas of all face groups at once.
+    arrays: MeshArrays read from bm with triangles
+    face_groups: group index of each face returned by get_face_groups()
+    Return the arrays of 3D areas and UV areas of the groups.  The UV areas
+    are None if the texture size can not be found.
+    """
+
+    in_group = face_groups >= 0
+    groups = face_groups[in_group]
+    mesh_areas = np.bincount(groups, arrays.face_mesh_areas()[in_group],
+                             minlength=num_groups)
+
+    img_areas = __get_face_image_areas(
+        obj, bm, find_texture_layer(bm), tex_selection_method, tex_size,
+        np.flatnonzero(in_group).tolist())
+    if img_areas is None:
+        return mesh_areas, None
+    uv_areas = np.bincount(
+        groups, arrays.face_triangle_uv_areas()[in_group] * img_areas,
+        minlength=num_groups)
+
+    return mesh_areas, uv_areas
+
+
 def diff_point_to_segment(a, b, p):
     ab = b - a
     normal_ab = ab.normalized()
@@ -1195,6 +2134,168 @@ def __do_weiler_atherton_cliping(clip_uvs, subject_uvs, mode,
     return True, polygons
 
 
+def __cross_2d(o, a, b):
+    return (a.x - o.x) * (b.y - o.y) - (a.y - o.y) * (b.x - o.x)
+
+
+def __get_convex_polygon(uvs):
+    """
+    Return the counter-clock-wise list of the points if the polygon is
+    strictly convex, otherwise None
+    """
+
+    num_uvs = len(uvs)
+    area = 0.0
+    for i in range(num_uvs):
+        uv1 = uvs[i]
+        uv2 = uvs[(i + 1) % num_uvs]
+        area += uv1.x * uv2.y - uv1.y * uv2.x
+    if area == 0.0:
+        return None
+    points = uvs if area > 0.0 else list(reversed(uvs))
+
+    for i in range(num_uvs):
+        if __cross_2d(points[i], points[(i + 1) % num_uvs],
+                      points[(i + 2) % num_uvs]) <= 0.0:
+            return None
+
+    return points
+
+
+def __is_separated_by_edges(points_1, points_2):
+    """
+    Return True if points_2 is outside of one of the edges of the convex
+    polygon points_1 (Touching is treated as separated)
+    """
+
+    num_points = len(points_1)
+    for i in range(num_points):
+        start = points_1[i]
+        end = points_1[(i + 1) % num_points]
+        for p in points_2:
+            if __cross_2d(start, end, p) > 0.0:
+                break
+        else:
+            return True
+
+    return False
+
+
+def __is_on_edges(points_1, points_2):
+    """
+    Return True if one of points_1 is on the edge of the polygon points_2
+    """
+
+    num_points = len(points_2)
+    for p in points_1:
+        for i in range(num_points):
+            start = points_2[i]
+            end = points_2[(i + 1) % num_points]
+            if __cross_2d(start, end, p) != 0.0:
+                continue
+            if min(start.x, end.x) <= p.x <= max(start.x, end.x) and \
+                    min(start.y, end.y) <= p.y <= max(start.y, end.y):
+                return True
+
+    return False
+
+
+def __is_inside_convex_polygon(points, convex_points):
+    num_points = len(convex_points)
+    for i in range(num_points):
+        start = convex_points[i]
+        end = convex_points[(i + 1) % num_points]
+        for p in points:
+            if __cross_2d(start, end, p) <= 0.0:
+                return False
+
+    return True
+
+
+def __clip_convex_polygon(clip_points, subject_points):
+    """
+    Clip the convex polygon by the convex polygon with Sutherland-Hodgman
+    algorithm
+    """
+
+    output = subject_points
+    num_clip_points = len(clip_points)
+    for i in range(num_clip_points):
+        start = clip_points[i]
+        end = clip_points[(i + 1) % num_clip_points]
+        points = output
+        output = []
+        for j, p in enumerate(points):
+            prev = points[j - 1]
+            p_side = __cross_2d(start, end, p)
+            prev_side = __cross_2d(start, end, prev)
+            if (p_side > 0.0) != (prev_side > 0.0):
+                t = prev_side / (prev_side - p_side)
+                output.append(prev + (p - prev) * t)
+            if p_side > 0.0:
+                output.append(p.copy())
+        if not output:
+            break
+
+    return output
+
+
+# clip: reference polygon
+# subject: tested polygon
+def __do_convex_clipping(clip_points, subject_points, same_polygon_threshold):
+    """
+    Fast path of __do_weiler_atherton_cliping for the convex polygons.
+    The polygons must be counter-clock-wise.
+    Return None if the polygons touch each other in the overlapped region,
+    because the result depends on the special handling of the Weiler-Atherton
+    algorithm.
+    """
+
+    # check if clip and subject is overlapped completely
+    if __is_polygon_same(RingBuffer(clip_points), RingBuffer(subject_points),
+                         same_polygon_threshold):
+        return True, [list(subject_points)]
+
+    # separating axis test by the edges of the polygons
+    if __is_separated_by_edges(clip_points, subject_points) or \
+            __is_separated_by_edges(subject_points, clip_points):
+        return False, None
+
+    if __is_on_edges(clip_points, subject_points) or \
+            __is_on_edges(subject_points, clip_points):
+        return None
+
+    # check if subject is in clip, or clip is in subject
+    if __is_inside_convex_polygon(subject_points, clip_points) or \
+            __is_inside_convex_polygon(clip_points, subject_points):
+        return True, [list(subject_points)]
+
+    # clip and subject is overlapped partially
+    return True, [__clip_convex_polygon(clip_points, subject_points)]
+
+
+def __do_polygon_clipping(clip_uvs, subject_uvs, mode, same_polygon_threshold,
+                          path_stats):
+    """
+    Clip the polygons by the convex fast path if possible, otherwise by
+    the Weiler-Atherton algorithm. The number of the pairs processed by each
+    path is counted up in path_stats.
+    """
+
+    clip_points = __get_convex_polygon(clip_uvs)
+    subject_points = __get_convex_polygon(subject_uvs)
+    if clip_points is not None and subject_points is not None:
+        result = __do_convex_clipping(clip_points, subject_points,
+                                      same_polygon_threshold)
+        if result is not None:
+            path_stats["num_convex_clipping_pairs"] += 1
+            return result
+
+    path_stats["num_weiler_atherton_pairs"] += 1
+    return __do_weiler_atherton_cliping(clip_uvs, subject_uvs, mode,
+                                        same_polygon_threshold)
+
+
 def __is_polygon_flipped(points):
     area = 0.0
     for i in range(len(points)):
@@ -1254,109 +2355,594 @@ def get_uv_editable_objects(context):
     return objs
 
 
+def __is_bounding_box_overlapped(min_1, max_1, min_2, max_2):
+    if (max_1.x < min_2.x) or (max_2.x < min_1.x) or \
+       (max_1.y < min_2.y) or (max_2.y < min_1.y):
+        return False
+    return True
+
+
+# The face which spans more cells than this is not registered to the grid,
+# and tested with all other faces.
+__MAX_CELLS_PER_FACE = 64
+
+
+def __get_candidate_face_pairs(face_bounds):
+    """
+    Get the pairs of the faces whose UV bounding boxes are overlapped.
+    Uniform grid is used as the broad phase, so only the faces which share
+    the cell are tested.
+
+    face_bounds: [(min_uv, max_uv), ...]
+    Return: [(face index 1, face index 2), ...] (face index 1 < face index 2)
+    """
+
+    if len(face_bounds) < 2:
+        return []
+
+    # Cell size is an average size of the bounding boxes.
+    extent = 0.0
+    for mi, ma in face_bounds:
+        extent += max(ma.x - mi.x, ma.y - mi.y)
+    cell_size = extent / len(face_bounds)
+    if cell_size <= 0.0:
+        cell_size = 1.0
+
+    def to_cell(x, y):
+        return (int(x // cell_size), int(y // cell_size))
+
+    grid = defaultdict(list)    # { (cell x, cell y): [face index] }
+    large_faces = []
+    for i, (mi, ma) in enumerate(face_bounds):
+        min_cell = to_cell(mi.x, mi.y)
+        max_cell = to_cell(ma.x, ma.y)
+        num_cells = (max_cell[0] - min_cell[0] + 1) * \
+            (max_cell[1] - min_cell[1] + 1)
+        if num_cells > __MAX_CELLS_PER_FACE:
+            large_faces.append(i)
+            continue
+        for cx in range(min_cell[0], max_cell[0] + 1):
+            for cy in range(min_cell[1], max_cell[1] + 1):
+                grid[(cx, cy)].append(i)
+
+    pairs = []
+    for cell, indices in grid.items():
+        for n, i1 in enumerate(indices):
+            min_1, max_1 = face_bounds[i1]
+            for i2 in indices[n + 1:]:
+                min_2, max_2 = face_bounds[i2]
+                if not __is_bounding_box_overlapped(min_1, max_1,
+                                                    min_2, max_2):
+                    continue
+                # Same pair is registered to the several cells.
+                # The pair is reported only from the cell which includes
+                # the minimum corner of the overlapped region.
+                if to_cell(max(min_1.x, min_2.x),
+                           max(min_1.y, min_2.y)) != cell:
+                    continue
+                pairs.append((min(i1, i2), max(i1, i2)))
+
+    large_face_set = set(large_faces)
+    for i1 in large_faces:
+        min_1, max_1 = face_bounds[i1]
+        for i2, (min_2, max_2) in enumerate(face_bounds):
+            if i1 == i2:
+                continue
+            # Pairs of the large faces are tested only once.
+            if i2 in large_face_set and i2 < i1:
+                continue
+            if not __is_bounding_box_overlapped(min_1, max_1, min_2, max_2):
+                continue
+            pairs.append((min(i1, i2), max(i1, i2)))
+
+    pairs.sort()
+
+    return pairs
+
+
+def __unique_pairs(pairs, num_items):
+    """
+    Remove the duplicated pairs and sort them.
+    np.unique() with axis argument is not used, because it requires
+    NumPy 1.13 or later.
+    """
+
+    keys = np.unique(pairs[:, 0] * num_items + pairs[:, 1])
+    return np.column_stack((keys // num_items, keys % num_items))
+
+
+def __get_face_pairs_with_targets(face_min, face_max, targets):
+    """
+    Get the pairs of the target face and the other face whose UV bounding
+    boxes are overlapped.  The uniform grid same as
+    __get_candidate_face_pairs() is used as the broad phase.
+
+    face_min, face_max: (num_faces, 2) UV bounding boxes
+    targets: indices of the target faces
+    Return: (num_pairs, 2) array of (target face index, other face index)
+    """
+
+    num_faces = len(face_min)
+    if num_faces < 2 or len(targets) == 0:
+        return np.empty((0, 2), dtype=np.int64)
+
+    cell_size = np.max(face_max - face_min, axis=1).mean()
+    if cell_size <= 0.0:
+        cell_size = 1.0
+    min_cells = np.floor(face_min / cell_size).astype(np.int64)
+    max_cells = np.floor(face_max / cell_size).astype(np.int64)
+    cell_dims = max_cells - min_cells + 1
+    num_cells = cell_dims[:, 0] * cell_dims[:, 1]
+    is_large = num_cells > __MAX_CELLS_PER_FACE
+    origin = min_cells.min(axis=0)
+    num_rows = max_cells[:, 1].max() - origin[1] + 1
+
+    def expand_to_cells(indices):
+        counts = num_cells[indices]
+        faces = np.repeat(indices, counts)
+        local = np.arange(len(faces)) - \
+            np.repeat(np.cumsum(counts) - counts, counts)
+        widths = cell_dims[faces, 0]
+        cx = min_cells[faces, 0] + local % widths - origin[0]
+        cy = min_cells[faces, 1] + local // widths - origin[1]
+        return faces, cx * num_rows + cy
+
+    grid_faces, grid_keys = expand_to_cells(np.flatnonzero(~is_large))
+    order = np.argsort(grid_keys, kind='mergesort')
+    grid_faces = grid_faces[order]
+    grid_keys = grid_keys[order]
+
+    # The small target faces are tested with the faces sharing the cell.
+    small_targets = targets[~is_large[targets]]
+    target_faces, target_keys = expand_to_cells(small_targets)
+    lower = np.searchsorted(grid_keys, target_keys, side='left')
+    upper = np.searchsorted(grid_keys, target_keys, side='right')
+    counts = upper - lower
+    first = np.cumsum(counts) - counts
+    pair_targets = [np.repeat(target_faces, counts)]
+    pair_others = [grid_faces[np.arange(counts.sum()) +
+                              np.repeat(lower - first, counts)]]
+
+    # The large faces are not registered to the grid, so they are tested
+    # with all other faces.
+    large_faces = np.flatnonzero(is_large)
+    pair_targets.append(np.repeat(small_targets, len(large_faces)))
+    pair_others.append(np.tile(large_faces, len(small_targets)))
+    large_targets = targets[is_large[targets]]
+    pair_targets.append(np.repeat(large_targets, num_faces))
+    pair_others.append(np.tile(np.arange(num_faces), len(large_targets)))
+
+    pairs = np.stack([np.concatenate(pair_targets),
+                      np.concatenate(pair_others)], axis=1)
+    pairs = pairs[pairs[:, 0] != pairs[:, 1]]
+    min_1, max_1 = face_min[pairs[:, 0]], face_max[pairs[:, 0]]
+    min_2, max_2 = face_min[pairs[:, 1]], face_max[pairs[:, 1]]
+    overlapped = ~np.any((max_1 < min_2) | (max_2 < min_1), axis=1)
+
+    return __unique_pairs(pairs[overlapped], num_faces)
+
+
+# Overlapped UVs are re-detected from scratch when the ratio of the faces
+# whose UVs are changed exceeds.
+__OVERLAP_CACHE_REPAIR_RATIO = 0.1
+
+
+def __get_face_uv_states(bm_list, faces_list, uv_layer_list):
+    """
+    Get the states of faces to detect the changes of UVs
+    Return: [(face mask, UV hashes, UV bounding box min, UV bounding box max)]
+    """
+
+    states = []
+    for bm, faces, uv_layer in zip(bm_list, faces_list, uv_layer_list):
+        bm.faces.index_update()
+        arrays = MeshArrays(None, bm, uv_layer)
+        mask = np.zeros(arrays.num_faces, dtype=bool)
+        mask[[f.index for f in faces]] = True
+        if arrays.num_faces == 0:
+            face_min = face_max = np.empty((0, 2), dtype=np.float64)
+        else:
+            starts = arrays.face_offsets[:-1]
+            face_min = np.minimum.reduceat(arrays.uvs, starts)
+            face_max = np.maximum.reduceat(arrays.uvs, starts)
+        states.append((mask, __calc_face_hashes(arrays), face_min, face_max))
+
+    return states
+
+
+def __store_overlapped_uv_cache(cache, bm_list, faces_list, uv_layer_list,
+                                face_list, mode, same_polygon_threshold,
+                                overlapped_uvs):
+    bm_indices = {bm: i for i, bm in enumerate(bm_list)}
+    states = __get_face_uv_states(bm_list, faces_list, uv_layer_list)
+    face_ranks = [np.full(len(mask), -1, dtype=np.int64)
+                  for mask, _, _, _ in states]
+    for rank, (bm, _, f) in enumerate(face_list):
+        face_ranks[bm_indices[bm]][f["face"].index] = rank
+
+    cache.clear()
+    cache["mode"] = mode
+    cache["same_polygon_threshold"] = same_polygon_threshold
+    cache["bm_list"] = list(bm_list)
+    cache["uv_layer_names"] = [l.name for l in uv_layer_list]
+    cache["face_masks"] = [mask for mask, _, _, _ in states]
+    cache["face_hashes"] = [hashes for _, hashes, _, _ in states]
+    cache["face_ranks"] = face_ranks
+    cache["overlapped_info"] = list(overlapped_uvs)
+
+
+def __update_overlapped_uv_info(cache, bm_list, faces_list, uv_layer_list,
+                                mode, same_polygon_threshold, stats):
+    """
+    Re-detect overlapped UVs only for the faces whose UVs are changed
+    since the cached result, and their neighbours found by the broad phase.
+    Return None if the cached result can not be reused.
+    """
+
+    if not cache:
+        return None
+    if cache["mode"] != mode or \
+            cache["same_polygon_threshold"] != same_polygon_threshold:
+        return None
+    if len(cache["bm_list"]) != len(bm_list) or \
+            any(b1 is not b2 for b1, b2 in zip(cache["bm_list"], bm_list)):
+        return None
+    if cache["uv_layer_names"] != [l.name for l in uv_layer_list]:
+        return None
+
+    states = __get_face_uv_states(bm_list, faces_list, uv_layer_list)
+    changed_masks = []
+    for (mask, hashes, _, _), old_mask, old_hashes in zip(
+            states, cache["face_masks"], cache["face_hashes"]):
+        # Faces to be inspected are changed.
+        if len(mask) != len(old_mask) or np.any(mask != old_mask):
+            return None
+        changed_masks.append((hashes != old_hashes) & mask)
+
+    num_changed = sum(int(m.sum()) for m in changed_masks)
+    num_faces = sum(int(mask.sum()) for mask, _, _, _ in states)
+    if num_changed > num_faces * __OVERLAP_CACHE_REPAIR_RATIO:
+        return None
+
+    bm_indices = {bm: i for i, bm in enumerate(bm_list)}
+    face_ranks = cache["face_ranks"]
+
+    # Keep the results which are not related to the changed faces.
+    kept_uvs = []
+    for info in cache["overlapped_info"]:
+        if not info["clip_face"].is_valid or \
+                not info["subject_face"].is_valid:
+            return None
+        clip_bm_idx = bm_indices[info["clip_bmesh"]]
+        subject_bm_idx = bm_indices[info["subject_bmesh"]]
+        if changed_masks[clip_bm_idx][info["clip_face"].index] or \
+                changed_masks[subject_bm_idx][info["subject_face"].index]:
+            continue
+        kept_uvs.append(info)
+
+    # broad phase, find the faces whose bounding boxes are overlapped with
+    # the changed faces
+    bm_offsets = np.cumsum([0] + [len(mask) for mask, _, _, _ in states])
+    in_set = np.flatnonzero(np.concatenate([s[0] for s in states]))
+    face_min = np.concatenate([s[2] for s in states])[in_set]
+    face_max = np.concatenate([s[3] for s in states])[in_set]
+    targets = np.searchsorted(
+        in_set, np.flatnonzero(np.concatenate(changed_masks)))
+    pairs = in_set[__get_face_pairs_with_targets(face_min, face_max,
+                                                 targets)]
+
+    # The face which comes later in the order of the full detection is
+    # treated as the subject face.
+    ranks = np.concatenate(face_ranks)
+    pair_ranks = ranks[pairs]
+    swap = pair_ranks[:, 0] > pair_ranks[:, 1]
+    pairs[swap] = pairs[swap][:, ::-1]
+    pairs = __unique_pairs(pairs, int(bm_offsets[-1]))
+
+    # narrow phase
+    face_uvs = {}   # { face: UV coordinates }
+
+    def get_face(idx):
+        bm_idx = int(np.searchsorted(bm_offsets, idx, side='right')) - 1
+        bm = bm_list[bm_idx]
+        uv_layer = uv_layer_list[bm_idx]
+        face = bm.faces[int(idx - bm_offsets[bm_idx])]
+        if face not in face_uvs:
+            face_uvs[face] = [l[uv_layer].uv.copy() for l in face.loops]
+        return bm, uv_layer, face, face_uvs[face]
+
+    path_stats = {
+        "num_convex_clipping_pairs": 0,
+        "num_weiler_atherton_pairs": 0,
+    }
+    new_uvs = []
+    for i1, i2 in pairs.tolist():
+        clip_bm, clip_uv_layer, clip_face, clip_uvs = get_face(i1)
+        subject_bm, subject_uv_layer, subject_face, subject_uvs = \
+            get_face(i2)
+        result, polygons = \
+            __do_polygon_clipping(clip_uvs, subject_uvs, mode,
+                                  same_polygon_threshold, path_stats)
+        if result:
+            new_uvs.append({"clip_bmesh": clip_bm,
+                            "subject_bmesh": subject_bm,
+                            "clip_face": clip_face,
+                            "subject_face": subject_face,
+                            "clip_uv_layer": clip_uv_layer,
+                            "subject_uv_layer": subject_uv_layer,
+                            "subject_uvs": subject_uvs,
+                            "polygons": polygons})
+
+    def sort_key(info):
+        clip_ranks = face_ranks[bm_indices[info["clip_bmesh"]]]
+        subject_ranks = face_ranks[bm_indices[info["subject_bmesh"]]]
+        return (clip_ranks[info["clip_face"].index],
+                subject_ranks[info["subject_face"].index])
+
+    overlapped_uvs = sorted(kept_uvs + new_uvs, key=sort_key)
+
+    cache["face_hashes"] = [hashes for _, hashes, _, _ in states]
+    cache["overlapped_info"] = list(overlapped_uvs)
+
+    pair_stats = {
+        "num_faces": num_faces,
+        "num_changed_faces": num_changed,
+        "num_candidate_pairs": len(pairs),
+        "num_overlapped_pairs": len(overlapped_uvs),
+    }
+    pair_stats.update(path_stats)
+    debug_print(pair_stats)
+    if stats is not None:
+        stats.update(pair_stats)
+
+    return overlapped_uvs
+
+
+# The candidate pairs are processed by the process pool only if there are
+# more pairs than this, because starting the worker processes takes time.
+__MIN_PAIRS_FOR_PARALLEL = 2000
+
+# Number of the chunks per worker.  The candidate pairs are not uniform in
+# cost, so that the pairs are split into small chunks to balance the load.
+__NUM_CHUNKS_PER_WORKER = 4
+
+# Face UVs shared with the worker processes.
+__OVERLAP_WORKER_DATA = {}
+
+
+def __is_process_pool_available():
+    # mp_context, initializer and initargs of ProcessPoolExecutor require
+    # Python 3.7 or later.  The worker processes must be forked, because
+    # the spawned process is a plain Python interpreter which can not import
+    # bpy and mathutils.  Forking Blender is only tested on Linux.
+    if sys.version_info < (3, 7):
+        return False
+    if not sys.platform.startswith("linux"):
+        return False
+    return "fork" in multiprocessing.get_all_start_methods()
+
+
+def __init_overlap_worker(uvs, face_offsets, mode, same_polygon_threshold):
+    __OVERLAP_WORKER_DATA["uvs"] = uvs
+    __OVERLAP_WORKER_DATA["face_offsets"] = face_offsets
+    __OVERLAP_WORKER_DATA["mode"] = mode
+    __OVERLAP_WORKER_DATA["same_polygon_threshold"] = same_polygon_threshold
+
+
+def __detect_overlapped_pairs(pairs):
+    """
+    Run the narrow phase for the pairs in the worker process.
+    Return: ([(face index 1, face index 2, polygons)], path_stats)
+    """
+
+    uvs = __OVERLAP_WORKER_DATA["uvs"]
+    face_offsets = __OVERLAP_WORKER_DATA["face_offsets"]
+    mode = __OVERLAP_WORKER_DATA["mode"]
+    threshold = __OVERLAP_WORKER_DATA["same_polygon_threshold"]
+
+    def get_face_uvs(idx):
+        start, end = face_offsets[idx], face_offsets[idx + 1]
+        return [Vector(uv) for uv in uvs[start:end].tolist()]
+
+    results = []
+    path_stats = {
+        "num_convex_clipping_pairs": 0,
+        "num_weiler_atherton_pairs": 0,
+    }
+    for i1, i2 in pairs:
+        result, polygons = \
+            __do_polygon_clipping(get_face_uvs(i1), get_face_uvs(i2), mode,
+                                  threshold, path_stats)
+        if result:
+            # mathutils.Vector can not be pickled.
+            results.append((i1, i2, [[tuple(p) for p in poly]
+                                     for poly in polygons]))
+
+    return results, path_stats
+
+
+def __detect_overlapped_pairs_parallel(face_list, pairs, mode,
+                                       same_polygon_threshold, num_workers):
+    """
+    Split the candidate pairs across the process pool.
+    Return None if the process pool is not available.
+    """
+
+    if not __is_process_pool_available():
+        return None
+
+    # Export the face UVs to the flat arrays.
+    coords = []
+    face_offsets = [0]
+    for _, uv_layer, f in face_list:
+        for l in f["face"].loops:
+            coords.extend(l[uv_layer].uv)
+        face_offsets.append(len(coords) // 2)
+    uvs = np.array(coords, dtype=np.float64).reshape(-1, 2)
+    face_offsets = np.array(face_offsets, dtype=np.int64)
+
+    chunk_size = -(-len(pairs) // (num_workers * __NUM_CHUNKS_PER_WORKER))
+    chunks = [pairs[i:i + chunk_size]
+              for i in range(0, len(pairs), chunk_size)]
+
+    results = []
+    path_stats = {
+        "num_convex_clipping_pairs": 0,
+        "num_weiler_atherton_pairs": 0,
+    }
+    try:
+        with ProcessPoolExecutor(
+                max_workers=num_workers,
+                mp_context=multiprocessing.get_context("fork"),
+                initializer=__init_overlap_worker,
+                initargs=(uvs, face_offsets, mode,
+                          same_polygon_threshold)) as executor:
+            for chunk_results, chunk_stats in executor.map(
+                    __detect_overlapped_pairs, chunks):
+                results.extend(chunk_results)
+                for key, value in chunk_stats.items():
+                    path_stats[key] += value
+    # Fall back to the serial detection on any error.
+    except Exception as e:  # pylint: disable=W0703
+        debug_print("Failed to detect overlapped UVs in parallel: {}"
+                    .format(e))
+        return None
+
+    return results, path_stats
+
+
 def get_overlapped_uv_info(bm_list, faces_list, uv_layer_list,
-                           mode, same_polygon_threshold=0.0000001):
-    # at first, check island overlapped
-    isl = []
+                           mode, same_polygon_threshold=0.0000001,
+                           stats=None, num_workers=1, cache=None):
+    """
+    Get the pairs of faces whose UVs are overlapped.
+    If the dictionary is specified to stats, the number of the tested face
+    pairs and the number of the pairs processed by the convex fast path and
+    the Weiler-Atherton algorithm are stored to it.
+    If num_workers is more than 1, the candidate pairs are tested by the
+    process pool.  The result is same as the one without the process pool,
+    and whether the process pool was used is stored to stats as "parallel".
+    If the dictionary is specified to cache, the result and the hashes of
+    face UVs are stored to it.  On the next call with the same cache, only
+    the faces whose UVs are changed and their neighbours are re-tested, and
+    the cached result is patched.
+    """
+
+    if cache is not None:
+        overlapped_uvs = __update_overlapped_uv_info(
+            cache, bm_list, faces_list, uv_layer_list, mode,
+            same_polygon_threshold, stats)
+        if overlapped_uvs is not None:
+            return overlapped_uvs
+
+    # Faces are ordered by island, and the face which comes later in the
+    # order is treated as the subject face.
+    face_list = []      # [(BMesh, UV layer, face info)]
     for bm, uv_layer, faces in zip(bm_list, uv_layer_list, faces_list):
         info = get_island_info_from_faces(bm, faces, uv_layer)
-        isl.extend([(i, uv_layer, bm) for i in info])
-
-    overlapped_isl_pairs = []
-    overlapped_uv_layer_pairs = []
-    overlapped_bm_paris = []
-    for i, (i1, uv_layer_1, bm_1) in enumerate(isl):
-        for i2, uv_layer_2, bm_2 in isl[i + 1:]:
-            if (i1["max"].x < i2["min"].x) or (i2["max"].x < i1["min"].x) or \
-               (i1["max"].y < i2["min"].y) or (i2["max"].y < i1["min"].y):
-                continue
-            overlapped_isl_pairs.append([i1, i2])
-            overlapped_uv_layer_pairs.append([uv_layer_1, uv_layer_2])
-            overlapped_bm_paris.append([bm_1, bm_2])
+        for isl in info:
+            face_list.extend([(bm, uv_layer, f) for f in isl["faces"]])
+
+    # broad phase, find candidate pairs by the bounding boxes
+    pairs = __get_candidate_face_pairs(
+        [(f["min_uv"], f["max_uv"]) for _, _, f in face_list])
+
+    # narrow phase, apply Weiler-Atherton cliping algorithm
+    face_uvs = {}   # { face list index: UV coordinates }
+
+    def get_face_uvs(idx):
+        if idx not in face_uvs:
+            _, uv_layer, f = face_list[idx]
+            face_uvs[idx] = [l[uv_layer].uv.copy() for l in f["face"].loops]
+        return face_uvs[idx]
+
+    parallel_result = None
+    if num_workers > 1 and len(pairs) >= __MIN_PAIRS_FOR_PARALLEL:
+        parallel_result = __detect_overlapped_pairs_parallel(
+            face_list, pairs, mode, same_polygon_threshold, num_workers)
+
+    if parallel_result is not None:
+        results, path_stats = parallel_result
+        overlapped_pairs = [
+            (i1, i2, [[Vector(p) for p in poly] for poly in polygons])
+            for i1, i2, polygons in results]
+    else:
+        overlapped_pairs = []
+        path_stats = {
+            "num_convex_clipping_pairs": 0,
+            "num_weiler_atherton_pairs": 0,
+        }
+        for i1, i2 in pairs:
+            result, polygons = \
+                __do_polygon_clipping(get_face_uvs(i1), get_face_uvs(i2),
+                                      mode, same_polygon_threshold,
+                                      path_stats)
+            if result:
+                overlapped_pairs.append((i1, i2, polygons))
 
-    # check polygon overlapped (inter UV islands)
     overlapped_uvs = []
-    for oip, uvlp, bmp in zip(overlapped_isl_pairs,
-                              overlapped_uv_layer_pairs,
-                              overlapped_bm_paris):
-        for clip in oip[0]["faces"]:
-            f_clip = clip["face"]
-            clip_uvs = [l[uvlp[0]].uv.copy() for l in f_clip.loops]
-            for subject in oip[1]["faces"]:
-                f_subject = subject["face"]
-
-                # fast operation, apply bounding box algorithm
-                if (clip["max_uv"].x < subject["min_uv"].x) or \
-                   (subject["max_uv"].x < clip["min_uv"].x) or \
-                   (clip["max_uv"].y < subject["min_uv"].y) or \
-                   (subject["max_uv"].y < clip["min_uv"].y):
-                    continue
+    for i1, i2, polygons in overlapped_pairs:
+        clip_bm, clip_uv_layer, clip = face_list[i1]
+        subject_bm, subject_uv_layer, subject = face_list[i2]
+        subject_uvs = get_face_uvs(i2)
+        overlapped_uvs.append({"clip_bmesh": clip_bm,
+                               "subject_bmesh": subject_bm,
+                               "clip_face": clip["face"],
+                               "subject_face": subject["face"],
+                               "clip_uv_layer": clip_uv_layer,
+                               "subject_uv_layer": subject_uv_layer,
+                               "subject_uvs": subject_uvs,
+                               "polygons": polygons})
+
+    num_faces = len(face_list)
+    pair_stats = {
+        "num_faces": num_faces,
+        "num_face_pairs": num_faces * (num_faces - 1) // 2,
+        "num_candidate_pairs": len(pairs),
+        "num_overlapped_pairs": len(overlapped_uvs),
+        "parallel": parallel_result is not None,
+    }
+    pair_stats.update(path_stats)
+    debug_print(pair_stats)
+    if stats is not None:
+        stats.update(pair_stats)
+
+    if cache is not None:
+        __store_overlapped_uv_cache(cache, bm_list, faces_list, uv_layer_list,
+                                    face_list, mode, same_polygon_threshold,
+                                    overlapped_uvs)
 
-                subject_uvs = [l[uvlp[1]].uv.copy() for l in f_subject.loops]
-                # slow operation, apply Weiler-Atherton cliping algorithm
-                result, polygons = \
-                    __do_weiler_atherton_cliping(clip_uvs, subject_uvs,
-                                                 mode, same_polygon_threshold)
-                if result:
-                    overlapped_uvs.append({"clip_bmesh": bmp[0],
-                                           "subject_bmesh": bmp[1],
-                                           "clip_face": f_clip,
-                                           "subject_face": f_subject,
-                                           "clip_uv_layer": uvlp[0],
-                                           "subject_uv_layer": uvlp[1],
-                                           "subject_uvs": subject_uvs,
-                                           "polygons": polygons})
-
-    # check polygon overlapped (intra UV island)
-    for info, uv_layer, bm in isl:
-        for i in range(len(info["faces"])):
-            clip = info["faces"][i]
-            f_clip = clip["face"]
-            clip_uvs = [l[uv_layer].uv.copy() for l in f_clip.loops]
-            for j in range(len(info["faces"])):
-                if j <= i:
-                    continue
-
-                subject = info["faces"][j]
-                f_subject = subject["face"]
+    return overlapped_uvs
 
-                # fast operation, apply bounding box algorithm
-                if (clip["max_uv"].x < subject["min_uv"].x) or \
-                   (subject["max_uv"].x < clip["min_uv"].x) or \
-                   (clip["max_uv"].y < subject["min_uv"].y) or \
-                   (subject["max_uv"].y < clip["min_uv"].y):
-                    continue
 
-                subject_uvs = [l[uv_layer].uv.copy() for l in f_subject.loops]
-                # slow operation, apply Weiler-Atherton cliping algorithm
-                result, polygons = \
-                    __do_weiler_atherton_cliping(clip_uvs, subject_uvs,
-                                                 mode, same_polygon_threshold)
-                if result:
-                    overlapped_uvs.append({"clip_bmesh": bm,
-                                           "subject_bmesh": bm,
-                                           "clip_face": f_clip,
-                                           "subject_face": f_subject,
-                                           "clip_uv_layer": uv_layer,
-                                           "subject_uv_layer": uv_layer,
-                                           "subject_uvs": subject_uvs,
-                                           "polygons": polygons})
+def get_flipped_face_indices(uvs, face_offsets):
+    """
+    Return indices of the faces whose UVs are clock-wise
+    """
 
-    return overlapped_uvs
+    areas = calc_signed_polygon_areas(uvs, face_offsets)
+    return np.flatnonzero(areas < 0.0)
 
 
 def get_flipped_uv_info(bm_list, faces_list, uv_layer_list):
     flipped_uvs = []
     for bm, faces, uv_layer in zip(bm_list, faces_list, uv_layer_list):
+        arrays = MeshArrays(None, bm, uv_layer)
+        flipped = np.zeros(arrays.num_faces, dtype=bool)
+        flipped[get_flipped_face_indices(arrays.uvs,
+                                         arrays.face_offsets)] = True
+        flipped = flipped.tolist()
+        bm.faces.index_update()
         for f in faces:
-            polygon = RingBuffer([l[uv_layer].uv.copy() for l in f.loops])
-            if __is_polygon_flipped(polygon):
-                uvs = [l[uv_layer].uv.copy() for l in f.loops]
-                flipped_uvs.append({"bmesh": bm,
-                                    "face": f,
-                                    "uv_layer": uv_layer,
-                                    "uvs": uvs,
-                                    "polygons": [polygon.as_list()]})
+            if not flipped[f.index]:
+                continue
+            flipped_uvs.append({"bmesh": bm,
+                                "face": f,
+                                "uv_layer": uv_layer,
+                                "uvs": [l[uv_layer].uv.copy()
+                                        for l in f.loops],
+                                "polygons": [[l[uv_layer].uv.copy()
+                                              for l in f.loops]]})
 
     return flipped_uvs
 
@@ -1380,62 +2966,273 @@ def __is_polygon_same(points1, points2, threshold):
     return True
 
 
-def _is_uv_loop_connected(l1, l2, uv_layer):
-    uv1 = l1[uv_layer].uv
-    uv2 = l2[uv_layer].uv
-    return uv1.x == uv2.x and uv1.y == uv2.y
-
-
 def create_uv_graph(loops, uv_layer):
-    # For looking up faster.
-    loop_index_to_loop = {}     # { loop index: loop }
-    for l in loops:
-        loop_index_to_loop[l.index] = l
-
     # Setup relationship between uv_vert and loops.
     # uv_vert is a representative of the loops which shares same
-    # UV coordinate.
-    uv_vert_to_loops = {}   # { uv_vert: loops belonged to uv_vert }
-    loop_to_uv_vert = {}    # { loop: uv_vert belonged to }
+    # vertex and UV coordinate.
+    uv_vert_ids = {}        # { (UV, vert index): uv_vert id }
+    uv_verts = []           # [ uv_vert ]
+    uv_vert_loops = []      # [ loops belonged to uv_vert ]
+    loop_to_uv_vert = {}    # { loop: uv_vert id belonged to }
     for l in loops:
-        found = False
-        for k in uv_vert_to_loops.keys():
-            if _is_uv_loop_connected(k, l, uv_layer):
-                uv_vert_to_loops[k].append(l)
-                loop_to_uv_vert[l] = k
-                found = True
-                break
-        if not found:
-            uv_vert_to_loops[l] = [l]
-            loop_to_uv_vert[l] = l
-
-    # Collect adjacent uv_vert.
-    uv_adj_verts = {}       # { uv_vert: adj uv_vert list }
-    for v, vs in uv_vert_to_loops.items():
-        uv_adj_verts[v] = []
-        for ll in vs:
-            ln = ll.link_loop_next
-            lp = ll.link_loop_prev
-            uv_adj_verts[v].append(loop_to_uv_vert[ln])
-            uv_adj_verts[v].append(loop_to_uv_vert[lp])
-        uv_adj_verts[v] = list(set(uv_adj_verts[v]))
+        key = (l[uv_layer].uv.to_tuple(5), l.vert.index)
+        vid = uv_vert_ids.get(key)
+        if vid is None:
+            vid = len(uv_verts)
+            uv_vert_ids[key] = vid
+            uv_verts.append(l)
+            uv_vert_loops.append([])
+        uv_vert_loops[vid].append(l)
+        loop_to_uv_vert[l] = vid
+
+    # Collect edges between adjacent uv_vert.
+    # The edge to the previous loop is the edge from the next loop of
+    # the previous loop, so only the next loop needs to be checked.
+    edges = []
+    for l, vid in loop_to_uv_vert.items():
+        nid = loop_to_uv_vert[l.link_loop_next]
+        if vid != nid:
+            edges.append((vid, nid))
+    edges = np.array(edges, dtype=np.int64).reshape(-1, 2)
+    num_uv_verts = len(uv_verts)
+    edges = __unique_pairs(np.sort(edges, axis=1), num_uv_verts)
+
+    # Store the adjacency of uv_vert in CSR form.
+    src = np.concatenate((edges[:, 0], edges[:, 1]))
+    dst = np.concatenate((edges[:, 1], edges[:, 0]))
+    order = np.lexsort((dst, src))
+    adjacency = dst[order]
+    adjacency_offsets = np.zeros(num_uv_verts + 1, dtype=np.int64)
+    np.cumsum(np.bincount(src, minlength=num_uv_verts),
+              out=adjacency_offsets[1:])
 
     # Setup uv_vert graph.
-    graph = Graph()
-    for v in uv_adj_verts.keys():
-        graph.add_node(
-            Node(v.index, {"uv_vert": v, "loops": uv_vert_to_loops[v]})
-        )
-    edges = []
-    for v, adjs in uv_adj_verts.items():
-        n1 = graph.get_node(v.index)
-        for a in adjs:
-            n2 = graph.get_node(a.index)
-            edges.append(tuple(sorted((n1.key, n2.key))))
-    edges = list(set(edges))
-    for e in edges:
-        n1 = graph.get_node(e[0])
-        n2 = graph.get_node(e[1])
-        graph.add_edge(n1, n2)
+    nodes = [Node(vid, {"uv_vert": v, "loops": uv_vert_loops[vid]})
+             for vid, v in enumerate(uv_verts)]
+    graph = Graph.from_adjacency_arrays(nodes, adjacency_offsets, adjacency)
 
     return graph
+
+
+# Height of the tiles which the image is split into on rasterization.
+__RASTER_TILE_HEIGHT = 256
+
+# Maximum number of the pixels which are tested at once on rasterization.
+__RASTER_PIXELS_PER_CHUNK = 1 << 20
+
+# The tiles are rasterized by the process pool only if there are more
+# triangles than this.
+__MIN_TRIANGLES_FOR_PARALLEL = 10000
+
+# Triangles shared with the worker processes.
+__RASTER_WORKER_DATA = {}
+
+
+def __rasterize_triangles_in_tile(tris, ids, mins, maxs, width, y0, y1):
+    """
+    Rasterize triangles into the tile [y0, y1) of the image.
+    mins and maxs are the range of the pixels whose center is in the
+    bounding box of the triangles.
+    Return (y1 - y0, width) array whose pixels have the largest ID of
+    the triangles covering the pixel center, or -1.
+    """
+
+    buf = np.full((y1 - y0, width), -1, dtype=np.int32)
+
+    in_tile = np.flatnonzero((mins[:, 1] < y1) & (maxs[:, 1] >= y0))
+    tris = tris[in_tile]
+    ids = ids[in_tile]
+    mins = mins[in_tile]
+    maxs = maxs[in_tile]
+
+    xs0 = np.maximum(mins[:, 0], 0)
+    ys0 = np.maximum(mins[:, 1], y0)
+    widths = np.minimum(maxs[:, 0], width - 1) - xs0 + 1
+    heights = np.minimum(maxs[:, 1], y1 - 1) - ys0 + 1
+    valid = (widths > 0) & (heights > 0)
+    if not np.any(valid):
+        return buf
+
+    tris = tris[valid]
+    ids = ids[valid]
+    xs0 = xs0[valid]
+    ys0 = ys0[valid]
+    widths = widths[valid]
+    heights = heights[valid]
+
+    # Edge functions of the triangles w = A * x + B * y + C, which are
+    # non-negative inside the triangle.  Degenerate triangles are skipped.
+    ax, ay = tris[:, 0, 0], tris[:, 0, 1]
+    bx, by = tris[:, 1, 0], tris[:, 1, 1]
+    cx, cy = tris[:, 2, 0], tris[:, 2, 1]
+    orient = np.sign((bx - ax) * (cy - ay) - (by - ay) * (cx - ax))
+    edges = []
+    for (sx, sy, ex, ey) in ((ax, ay, bx, by), (bx, by, cx, cy),
+                             (cx, cy, ax, ay)):
+        coef_a = -(ey - sy) * orient
+        coef_b = (ex - sx) * orient
+        coef_c = -(coef_a * sx + coef_b * sy)
+        edges.append((coef_a, coef_b, coef_c))
+
+    # Triangles are grouped by the size of the bounding box, so that the
+    # triangles in a group are tested with the same size of pixel grid.
+    width_classes = np.ceil(np.log2(widths)).astype(np.int64)
+    height_classes = np.ceil(np.log2(heights)).astype(np.int64)
+    size_classes = width_classes * 64 + height_classes
+    size_classes[orient == 0] = -1
+    for size_class in np.unique(size_classes):
+        if size_class < 0:
+            continue
+        indices = np.flatnonzero(size_classes == size_class)
+        grid_w = 1 << int(size_class // 64)
+        grid_h = 1 << int(size_class % 64)
+        chunk_size = max(1, __RASTER_PIXELS_PER_CHUNK // (grid_w * grid_h))
+        offsets_x = np.arange(grid_w)
+        offsets_y = np.arange(grid_h)
+        for start in range(0, len(indices), chunk_size):
+            chunk = indices[start:start + chunk_size]
+            # Centers of the pixels in the grid.  The pixels out of the
+            # bounding box are excluded by the infinite bias.
+            px = (xs0[chunk, np.newaxis, np.newaxis]
+                  + offsets_x[np.newaxis, np.newaxis, :]) + 0.5
+            py = (ys0[chunk, np.newaxis, np.newaxis]
+                  + offsets_y[np.newaxis, :, np.newaxis]) + 0.5
+            bias_x = np.where(offsets_x[np.newaxis, np.newaxis, :]
+                              < widths[chunk, np.newaxis, np.newaxis],
+                              0.0, -np.inf)
+            bias_y = np.where(offsets_y[np.newaxis, :, np.newaxis]
+                              < heights[chunk, np.newaxis, np.newaxis],
+                              0.0, -np.inf)
+
+            inside = None
+            for coef_a, coef_b, coef_c in edges:
+                w = ((coef_a[chunk, np.newaxis, np.newaxis] * px + bias_x)
+                     + (coef_b[chunk, np.newaxis, np.newaxis] * py
+                        + coef_c[chunk, np.newaxis, np.newaxis] + bias_y))
+                if inside is None:
+                    inside = w >= 0.0
+                else:
+                    inside &= w >= 0.0
+
+            tidx, oy, ox = np.nonzero(inside)
+            np.maximum.at(
+                buf, (ys0[chunk][tidx] + oy - y0, xs0[chunk][tidx] + ox),
+                ids[chunk][tidx])
+
+    return buf
+
+
+def __init_raster_worker(tris, ids, mins, maxs, width):
+    __RASTER_WORKER_DATA["tris"] = tris
+    __RASTER_WORKER_DATA["ids"] = ids
+    __RASTER_WORKER_DATA["mins"] = mins
+    __RASTER_WORKER_DATA["maxs"] = maxs
+    __RASTER_WORKER_DATA["width"] = width
+
+
+def __rasterize_tile(tile):
+    y0, y1 = tile
+    data = __RASTER_WORKER_DATA
+    return y0, __rasterize_triangles_in_tile(
+        data["tris"], data["ids"], data["mins"], data["maxs"], data["width"],
+        y0, y1)
+
+
+def __rasterize_tiles_parallel(tris, ids, mins, maxs, width, tiles, buf,
+                               num_workers):
+    """
+    Rasterize the tiles by the process pool.
+    Return False if the process pool is not available.
+    """
+
+    if not __is_process_pool_available():
+        return False
+
+    try:
+        with ProcessPoolExecutor(
+                max_workers=num_workers,
+                mp_context=multiprocessing.get_context("fork"),
+                initializer=__init_raster_worker,
+                initargs=(tris, ids, mins, maxs, width)) as executor:
+            for y0, tile_buf in executor.map(__rasterize_tile, tiles):
+                buf[y0:y0 + len(tile_buf)] = tile_buf
+    # Fall back to the serial rasterization on any error.
+    except Exception as e:  # pylint: disable=W0703
+        debug_print("Failed to rasterize triangles in parallel: {}"
+                    .format(e))
+        return False
+
+    return True
+
+
+def rasterize_triangles(tris, ids, width, height, num_workers=1):
+    """
+    Rasterize triangles to the image.
+    tris is (num_triangles, 3, 2) array of the triangle vertices in the
+    pixel coordinates, and ids is (num_triangles,) array of the
+    non-negative IDs of the triangles.
+    Return (height, width) array whose pixels have the ID of the triangle
+    covering the pixel center, or -1 if no triangles cover it.  If the
+    pixel is covered by several triangles, the largest ID is taken.
+    If num_workers is more than 1, the image is split into tiles which are
+    rasterized by the process pool.
+    """
+
+    tris = np.asarray(tris, dtype=np.float64).reshape(-1, 3, 2)
+    ids = np.asarray(ids, dtype=np.int32).ravel()
+    buf = np.full((height, width), -1, dtype=np.int32)
+    if len(tris) == 0 or width <= 0 or height <= 0:
+        return buf
+
+    # Range of the pixels whose center is in the bounding box.
+    mins = np.ceil(tris.min(axis=1) - 0.5).astype(np.int64)
+    maxs = np.floor(tris.max(axis=1) - 0.5).astype(np.int64)
+
+    tiles = [(y0, min(y0 + __RASTER_TILE_HEIGHT, height))
+             for y0 in range(0, height, __RASTER_TILE_HEIGHT)]
+    if num_workers > 1 and len(tiles) > 1 and \
+            len(tris) >= __MIN_TRIANGLES_FOR_PARALLEL:
+        if __rasterize_tiles_parallel(tris, ids, mins, maxs, width, tiles,
+                                      buf, num_workers):
+            return buf
+
+    for y0, y1 in tiles:
+        buf[y0:y1] = __rasterize_triangles_in_tile(
+            tris, ids, mins, maxs, width, y0, y1)
+
+    return buf
+
+
+def create_unique_colors(num_colors):
+    """
+    Create colors which are different from each other.
+    The colors are taken from the cells of k x k x k grid in RGB space
+    except black, where k is the smallest size to have num_colors cells.
+    Any two colors differ by 1 / (k - 1) or more in at least one channel.
+    The cells are visited by the step of the golden ratio, so that the
+    successive colors are far from each other.
+    """
+
+    if num_colors <= 0:
+        return []
+
+    k = 2
+    while k ** 3 - 1 < num_colors:
+        k += 1
+    num_cells = k ** 3 - 1
+
+    # The step must be coprime to the number of cells to visit each cell
+    # only once.
+    step = max(1, int(round(num_cells * 2.0 / (1.0 + sqrt(5.0)))))
+    while gcd(step, num_cells) != 1:
+        step += 1
+
+    colors = []
+    for i in range(num_colors):
+        # The cell 0 (black) is skipped.
+        cell = (i * step) % num_cells + 1
+        colors.append([(cell // (k * k)) / (k - 1),
+                       (cell // k % k) / (k - 1),
+                       (cell % k) / (k - 1)])
+
+    return colors
@@ -9,8 +9,10 @@ __date__ = "22 Apr 2022"
 
 if "bpy" in locals():
     import importlib
+    importlib.reload(batch_renderer)
     importlib.reload(bglx)
 else:
+    from . import batch_renderer
     from . import bglx
 
 import bpy
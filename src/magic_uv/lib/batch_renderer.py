@@ -0,0 +1,265 @@
+# SPDX-License-Identifier: GPL-2.0-or-later
+
+# <pep8-80 compliant>
+
+import bpy
+import gpu
+from gpu_extras.batch import batch_for_shader
+
+if bpy.app.version < (3, 0, 0):
+    import bgl
+
+
+# Shaders are compiled once and shared by all renderers.
+_SHADER_CACHE = {}
+
+
+def _get_builtin_shader(name_2d, name_3d, name, dims):
+    # Built-in shaders for 2D and 3D are unified after Blender 3.4.
+    if bpy.app.version >= (3, 4, 0):
+        key = name
+    else:
+        key = name_2d if dims == 2 else name_3d
+    shader = _SHADER_CACHE.get(key)
+    if shader is None:
+        shader = gpu.shader.from_builtin(key)
+        _SHADER_CACHE[key] = shader
+    return shader
+
+
+def get_flat_color_shader(dims=2):
+    """
+    Get built-in shader which takes "pos" and "color" attributes
+    """
+
+    return _get_builtin_shader(
+        '2D_FLAT_COLOR', '3D_FLAT_COLOR', 'FLAT_COLOR', dims)
+
+
+def get_uniform_color_shader(dims=2):
+    """
+    Get built-in shader which takes "pos" attribute and "color" uniform
+    """
+
+    return _get_builtin_shader(
+        '2D_UNIFORM_COLOR', '3D_UNIFORM_COLOR', 'UNIFORM_COLOR', dims)
+
+
+def get_image_shader():
+    """
+    Get shader which renders texture with a constant transparency.
+    The shader takes "pos" and "texCoord" attributes, and "image" sampler,
+    "alpha" and "ModelViewProjectionMatrix" uniforms.
+    """
+
+    shader = _SHADER_CACHE.get("IMAGE_ALPHA")
+    if shader is not None:
+        return shader
+
+    vertex_shader = '''
+    uniform mat4 ModelViewProjectionMatrix;
+
+    in vec2 pos;
+    in vec2 texCoord;
+    out vec2 uvInterp;
+
+    void main()
+    {
+        uvInterp = texCoord;
+        gl_Position = ModelViewProjectionMatrix * vec4(pos.xy, 0.0, 1.0);
+        gl_Position.z = 1.0;
+    }
+    '''
+
+    fragment_shader = '''
+    uniform sampler2D image;
+    uniform float alpha;
+
+    in vec2 uvInterp;
+    out vec4 fragColor;
+
+    void main()
+    {
+        fragColor = texture(image, uvInterp);
+        fragColor.a = alpha;
+    }
+    '''
+
+    shader = gpu.types.GPUShader(vertex_shader, fragment_shader)
+    _SHADER_CACHE["IMAGE_ALPHA"] = shader
+    return shader
+
+
+def set_line_width(width):
+    if bpy.app.version < (3, 0, 0):
+        bgl.glLineWidth(width)
+    else:
+        gpu.state.line_width_set(width)
+
+
+def _fan_indices(offset, num_verts):
+    return [(offset, offset + i, offset + i + 1)
+            for i in range(1, num_verts - 1)]
+
+
+class BatchRenderer:
+    """
+    Retained renderer which draws all registered primitives at once.
+
+    Primitives are registered by add_* methods when the data to be drawn
+    is changed. Registered primitives are uploaded to one triangle batch
+    and one line batch on the first draw() and the batches are reused until
+    clear() is called, so draw() issues at most two draw calls.
+    """
+
+    def __init__(self, dims=2):
+        self.dims = dims
+        self.clear()
+
+    def clear(self):
+        self.__tri_coords = []
+        self.__tri_colors = []
+        self.__tri_indices = []
+        self.__line_coords = []
+        self.__line_colors = []
+        self.__line_indices = []
+        self.__tri_batch = None
+        self.__line_batch = None
+
+    def is_empty(self):
+        return not self.__tri_indices and not self.__line_indices
+
+    def __add_tri_verts(self, coords, color):
+        offset = len(self.__tri_coords)
+        self.__tri_coords.extend(coords)
+        self.__tri_colors.extend([color] * len(coords))
+        self.__tri_batch = None
+        return offset
+
+    def __add_line_verts(self, coords, color):
+        offset = len(self.__line_coords)
+        self.__line_coords.extend(coords)
+        self.__line_colors.extend([color] * len(coords))
+        self.__line_batch = None
+        return offset
+
+    def add_triangles(self, coords, color):
+        offset = self.__add_tri_verts(coords, color)
+        self.__tri_indices.extend(
+            [(offset + i, offset + i + 1, offset + i + 2)
+             for i in range(0, len(coords) - 2, 3)])
+
+    def add_triangle_fan(self, coords, color):
+        offset = self.__add_tri_verts(coords, color)
+        self.__tri_indices.extend(_fan_indices(offset, len(coords)))
+
+    def add_quads(self, coords, color):
+        offset = self.__add_tri_verts(coords, color)
+        for i in range(offset, offset + len(coords) - 3, 4):
+            self.__tri_indices.extend([(i, i + 1, i + 2), (i + 2, i + 3, i)])
+
+    def add_triangle_arrays(self, coords, colors, indices):
+        """
+        Add triangles from arrays at once.
+        coords and colors are per vertex, and indices are indices of coords
+        for each triangle.
+        """
+
+        offset = len(self.__tri_coords)
+        self.__tri_coords.extend(coords)
+        self.__tri_colors.extend(colors)
+        self.__tri_indices.extend(
+            [(offset + i0, offset + i1, offset + i2)
+             for i0, i1, i2 in indices])
+        self.__tri_batch = None
+
+    def add_lines(self, coords, color):
+        offset = self.__add_line_verts(coords, color)
+        self.__line_indices.extend(
+            [(offset + i, offset + i + 1)
+             for i in range(0, len(coords) - 1, 2)])
+
+    def add_line_strip(self, coords, color, closed=False):
+        offset = self.__add_line_verts(coords, color)
+        self.__line_indices.extend(
+            [(offset + i, offset + i + 1) for i in range(len(coords) - 1)])
+        if closed and len(coords) >= 3:
+            self.__line_indices.append((offset + len(coords) - 1, offset))
+
+    def draw(self, line_width=None):
+        shader = get_flat_color_shader(self.dims)
+
+        if self.__tri_batch is None and self.__tri_indices:
+            self.__tri_batch = batch_for_shader(
+                shader, 'TRIS',
+                {"pos": self.__tri_coords, "color": self.__tri_colors},
+                indices=self.__tri_indices)
+        if self.__line_batch is None and self.__line_indices:
+            self.__line_batch = batch_for_shader(
+                shader, 'LINES',
+                {"pos": self.__line_coords, "color": self.__line_colors},
+                indices=self.__line_indices)
+
+        shader.bind()
+        if self.__tri_batch is not None:
+            self.__tri_batch.draw(shader)
+        if self.__line_batch is not None:
+            if line_width is not None:
+                set_line_width(line_width)
+            self.__line_batch.draw(shader)
+            if line_width is not None:
+                set_line_width(1.0)
+
+
+class ImageBatchRenderer:
+    """
+    Retained renderer which draws textured quads at once.
+    """
+
+    def __init__(self):
+        self.clear()
+
+    def clear(self):
+        self.__coords = []
+        self.__tex_coords = []
+        self.__indices = []
+        self.__batch = None
+
+    def is_empty(self):
+        return not self.__indices
+
+    def add_quads(self, coords, tex_coords):
+        offset = len(self.__coords)
+        self.__coords.extend(coords)
+        self.__tex_coords.extend(tex_coords)
+        for i in range(offset, offset + len(coords) - 3, 4):
+            self.__indices.extend([(i, i + 1, i + 2), (i + 2, i + 3, i)])
+        self.__batch = None
+
+    def draw(self, texture, alpha):
+        """
+        Draw quads with texture.
+        If texture is None, the texture bound to the texture unit 0 is used.
+        """
+
+        shader = get_image_shader()
+
+        if self.__batch is None:
+            if not self.__indices:
+                return
+            self.__batch = batch_for_shader(
+                shader, 'TRIS',
+                {"pos": self.__coords, "texCoord": self.__tex_coords},
+                indices=self.__indices)
+
+        shader.bind()
+        shader.uniform_float(
+            "ModelViewProjectionMatrix",
+            gpu.matrix.get_projection_matrix() @
+            gpu.matrix.get_model_view_matrix())
+        if texture is None:
+            shader.uniform_int("image", 0)
+        else:
+            shader.uniform_sampler("image", texture)
+        shader.uniform_float("alpha", alpha)
+        self.__batch.draw(shader)
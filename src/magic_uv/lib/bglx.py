@@ -6,8 +6,8 @@ from threading import Lock
 
 import bgl
 from bgl import Buffer as Buffer
-import gpu
-from gpu_extras.batch import batch_for_shader
+
+from .batch_renderer import BatchRenderer, ImageBatchRenderer
 
 GL_LINES = 0
 GL_LINE_STRIP = 1
@@ -116,112 +116,49 @@ def glBegin(mode):
     inst.set_prim_mode(mode)
 
 
-def _get_transparency_shader():
-    vertex_shader = '''
-    uniform mat4 modelViewMatrix;
-    uniform mat4 projectionMatrix;
-
-    in vec2 pos;
-    in vec2 texCoord;
-    out vec2 uvInterp;
-
-    void main()
-    {
-        uvInterp = texCoord;
-        gl_Position = projectionMatrix * modelViewMatrix * vec4(pos.xy, 0.0, 1.0);
-        gl_Position.z = 1.0;
-    }
-    '''
-
-    fragment_shader = '''
-    uniform sampler2D image;
-    uniform vec4 color;
-
-    in vec2 uvInterp;
-    out vec4 fragColor;
-
-    void main()
-    {
-        fragColor = texture(image, uvInterp);
-        fragColor.a = color.a;
-    }
-    '''
-
-    return vertex_shader, fragment_shader
-
-
 def glEnd():
     inst = InternalData.get_instance()
 
     color = inst.get_color()
     coords = inst.get_verts()
     tex_coords = inst.get_tex_coords()
-    if inst.get_dims() == 2:
-        if len(tex_coords) == 0:
-            shader = gpu.shader.from_builtin('2D_UNIFORM_COLOR')
-        else:
-            #shader = gpu.shader.from_builtin('2D_IMAGE')
-            vert_shader, frag_shader = _get_transparency_shader()
-            shader = gpu.types.GPUShader(vert_shader, frag_shader)
-    elif inst.get_dims() == 3:
-        if len(tex_coords) == 0:
-            shader = gpu.shader.from_builtin('3D_UNIFORM_COLOR')
-        else:
-            raise NotImplemented("Texture is not supported in get_dims() == 3")
-    else:
-        raise NotImplemented("get_dims() != 2")
+    dims = inst.get_dims()
+    prim_mode = inst.get_prim_mode()
+    if dims not in (2, 3):
+        raise NotImplementedError("get_dims() != (2|3)")
 
-    if len(tex_coords) == 0:
-        data = {
-            "pos": coords,
-        }
-    else:
-        data = {
-            "pos": coords,
-            "texCoord": tex_coords
-        }
-
-    if inst.get_prim_mode() == GL_LINES:
-        indices = []
-        for i in range(0, len(coords), 2):
-            indices.append([i, i + 1])
-        batch = batch_for_shader(shader, 'LINES', data, indices=indices)
-
-    elif inst.get_prim_mode() == GL_LINE_STRIP:
-        batch = batch_for_shader(shader, 'LINE_STRIP', data)
-
-
-    elif inst.get_prim_mode() == GL_LINE_LOOP:
-        data["pos"].append(data["pos"][0])
-        batch = batch_for_shader(shader, 'LINE_STRIP', data)
-
-    elif inst.get_prim_mode() == GL_TRIANGLES:
-        indices = []
-        for i in range(0, len(coords), 3):
-            indices.append([i, i + 1, i + 2])
-        batch = batch_for_shader(shader, 'TRIS', data, indices=indices)
-
-    elif inst.get_prim_mode() == GL_TRIANGLE_FAN:
-        indices = []
-        for i in range(1, len(coords) - 1):
-            indices.append([0, i, i + 1])
-        batch = batch_for_shader(shader, 'TRIS', data, indices=indices)
-
-    elif inst.get_prim_mode() == GL_QUADS:
-        indices = []
-        for i in range(0, len(coords), 4):
-            indices.extend([[i, i + 1, i + 2], [i + 2, i + 3, i]])
-        batch = batch_for_shader(shader, 'TRIS', data, indices=indices)
-    else:
-        raise NotImplemented("get_prim_mode() != (GL_LINES|GL_TRIANGLES|GL_QUADS)")
-
-    shader.bind()
+    # Immediate mode is emulated by the retained renderer which is used
+    # only once.
     if len(tex_coords) != 0:
-        shader.uniform_float("modelViewMatrix", gpu.matrix.get_model_view_matrix())
-        shader.uniform_float("projectionMatrix", gpu.matrix.get_projection_matrix())
-        shader.uniform_int("image", 0)
-    shader.uniform_float("color", color)
-    batch.draw(shader)
+        if dims != 2:
+            raise NotImplementedError(
+                "Texture is not supported in get_dims() == 3")
+        if prim_mode != GL_QUADS:
+            raise NotImplementedError(
+                "Texture is not supported in get_prim_mode() != GL_QUADS")
+        renderer = ImageBatchRenderer()
+        renderer.add_quads(coords, tex_coords)
+        renderer.draw(None, color[3])
+        inst.clear()
+        return
+
+    renderer = BatchRenderer(dims)
+    if prim_mode == GL_LINES:
+        renderer.add_lines(coords, color)
+    elif prim_mode == GL_LINE_STRIP:
+        renderer.add_line_strip(coords, color)
+    elif prim_mode == GL_LINE_LOOP:
+        renderer.add_line_strip(coords, color, closed=True)
+    elif prim_mode == GL_TRIANGLES:
+        renderer.add_triangles(coords, color)
+    elif prim_mode == GL_TRIANGLE_FAN:
+        renderer.add_triangle_fan(coords, color)
+    elif prim_mode == GL_QUADS:
+        renderer.add_quads(coords, color)
+    else:
+        raise NotImplementedError(
+            "get_prim_mode() != (GL_LINES|GL_TRIANGLES|GL_QUADS)")
+    renderer.draw()
 
     inst.clear()
 
@@ -1134,10 +1134,10 @@ class MUV_OT_AlignUV_SnapToPoint(bpy.types.Operator):
 
         return target_faces
 
-    def _get_snap_target_islands(self, context, bm, uv_layer):
+    def _get_snap_target_islands(self, context, obj, uv_layer):
         target_islands = []
 
-        islands = common.get_island_info_from_bmesh(bm, only_selected=True)
+        islands = common.get_island_info(obj, only_selected=True)
 
         for isl in islands:
             some_verts_not_selected = False
@@ -1195,7 +1195,7 @@ class MUV_OT_AlignUV_SnapToPoint(bpy.types.Operator):
 
             elif self.group == 'UV_ISLAND':
                 target_islands = \
-                    self._get_snap_target_islands(context, bm, uv_layer)
+                    self._get_snap_target_islands(context, obj, uv_layer)
 
                 for isl in target_islands:
                     ave_uv = Vector((0.0, 0.0))
@@ -1410,8 +1410,7 @@ class MUV_OT_AlignUV_SnapToEdge(bpy.types.Operator):
                 target_loop_pairs = \
                     self._get_snap_target_loop_pairs(bm, uv_layer)
 
-                islands = common.get_island_info_from_bmesh(
-                    bm, only_selected=False)
+                islands = common.get_island_info(obj, only_selected=False)
 
                 isl_processed = []
                 for pair in target_loop_pairs:
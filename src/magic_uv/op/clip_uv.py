@@ -12,7 +12,7 @@ import math
 
 import bpy
 import bmesh
-from mathutils import Vector
+import numpy as np
 from bpy.props import BoolProperty, FloatVectorProperty
 
 from .. import common
@@ -158,64 +158,42 @@ class MUV_OT_ClipUV(bpy.types.Operator):
 
             uv_layer = bm.loops.layers.uv.verify()
 
-            for face in bm.faces:
-                if not face.select:
-                    continue
-
-                selected_loops = [
-                    l for l in face.loops
-                    if l[uv_layer].select or
-                    context.scene.tool_settings.use_uv_select_sync
-                ]
-                if not selected_loops:
-                    continue
-
-                # average of UV coordinates on the face
-                max_uv = Vector((-10000000.0, -10000000.0))
-                min_uv = Vector((10000000.0, 10000000.0))
-                for l in selected_loops:
-                    uv = l[uv_layer].uv
-                    max_uv.x = max(max_uv.x, uv.x)
-                    max_uv.y = max(max_uv.y, uv.y)
-                    min_uv.x = min(min_uv.x, uv.x)
-                    min_uv.y = min(min_uv.y, uv.y)
-
-                # clip
-                move_uv = Vector((0.0, 0.0))
-                clip_size = Vector(self.clip_uv_range_max) - \
-                    Vector(self.clip_uv_range_min)
-                if max_uv.x > self.clip_uv_range_max[0]:
-                    target_x = math.fmod(max_uv.x - self.clip_uv_range_min[0],
-                                         clip_size.x)
-                    if target_x < 0.0:
-                        target_x += clip_size.x
-                    target_x += self.clip_uv_range_min[0]
-                    move_uv.x = target_x - max_uv.x
-                if min_uv.x < self.clip_uv_range_min[0]:
-                    target_x = math.fmod(min_uv.x - self.clip_uv_range_min[0],
-                                         clip_size.x)
-                    if target_x < 0.0:
-                        target_x += clip_size.x
-                    target_x += self.clip_uv_range_min[0]
-                    move_uv.x = target_x - min_uv.x
-                if max_uv.y > self.clip_uv_range_max[1]:
-                    target_y = math.fmod(max_uv.y - self.clip_uv_range_min[1],
-                                         clip_size.y)
-                    if target_y < 0.0:
-                        target_y += clip_size.y
-                    target_y += self.clip_uv_range_min[1]
-                    move_uv.y = target_y - max_uv.y
-                if min_uv.y < self.clip_uv_range_min[1]:
-                    target_y = math.fmod(min_uv.y - self.clip_uv_range_min[1],
-                                         clip_size.y)
-                    if target_y < 0.0:
-                        target_y += clip_size.y
-                    target_y += self.clip_uv_range_min[1]
-                    move_uv.y = target_y - min_uv.y
-
-                # update UV
-                for l in selected_loops:
-                    l[uv_layer].uv = l[uv_layer].uv + move_uv
+            arrays = common.MeshArrays(obj, bm, uv_layer)
+            if context.scene.tool_settings.use_uv_select_sync:
+                loop_mask = np.ones(arrays.num_loops, dtype=bool)
+            else:
+                loop_mask = arrays.uv_select(bm, uv_layer)
+            loop_mask &= arrays.face_loop_mask(arrays.face_select)
+            if not loop_mask.any():
+                continue
+
+            # max/min of UV coordinates of the selected loops on the face
+            uvs = arrays.uvs
+            face_mask = arrays.face_any(loop_mask)[:, np.newaxis]
+            max_uv = np.maximum.reduceat(
+                np.where(loop_mask[:, np.newaxis], uvs, -np.inf),
+                arrays.face_offsets[:-1])
+            max_uv = np.where(face_mask, max_uv, 0.0)
+            min_uv = np.minimum.reduceat(
+                np.where(loop_mask[:, np.newaxis], uvs, np.inf),
+                arrays.face_offsets[:-1])
+            min_uv = np.where(face_mask, min_uv, 0.0)
+
+            # clip
+            range_max = np.array(self.clip_uv_range_max)
+            range_min = np.array(self.clip_uv_range_min)
+            clip_size = range_max - range_min
+            move_uv = np.zeros_like(max_uv)
+            for edge_uv, outside in ((max_uv, max_uv > range_max),
+                                     (min_uv, min_uv < range_min)):
+                target = np.fmod(edge_uv - range_min, clip_size)
+                target = np.where(target < 0.0, target + clip_size, target)
+                target += range_min
+                move_uv = np.where(outside, target - edge_uv, move_uv)
+
+            # update UV
+            new_uvs = uvs + move_uv[arrays.loop_faces()]
+            arrays.write_uvs(new_uvs, loop_mask)
 
             bmesh.update_edit_mesh(obj.data)
 
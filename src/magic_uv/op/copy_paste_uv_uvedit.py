@@ -263,11 +263,9 @@ class MUV_OT_CopyPasteUVUVEdit_CopyUVIsland(bpy.types.Operator):
                 bm.faces.ensure_lookup_table()
 
             if context.tool_settings.use_uv_select_sync:
-                islands = common.get_island_info_from_bmesh(
-                    bm, only_selected=False)
+                islands = common.get_island_info(obj, only_selected=False)
             else:
-                islands = common.get_island_info_from_bmesh(
-                    bm, only_selected=True)
+                islands = common.get_island_info(obj, only_selected=True)
             for isl in islands:
                 # Check if all UVs belonging to the island is selected.
                 selected_count, all_count = get_counts(context, isl, uv_layer)
@@ -7,21 +7,25 @@ __status__ = "production"
 __version__ = "6.6"
 __date__ = "22 Apr 2022"
 
-from math import fabs
+from collections import defaultdict
+from itertools import product
+from math import fabs, floor, pi
 
 import bpy
 from bpy.props import (
     FloatProperty,
     FloatVectorProperty,
     BoolProperty,
+    EnumProperty,
 )
 import bmesh
 import mathutils
-from mathutils import Vector
+from mathutils import Vector, Matrix
 
 from ..utils.bl_class_registry import BlClassRegistry
 from ..utils.property_class_registry import PropertyClassRegistry
 from ..utils.graph import graph_is_isomorphic
+from ..utils.packing import pack_rectangles
 from ..utils import compatibility as compat
 from .. import common
 
@@ -44,7 +48,15 @@ def _is_valid_context(context):
     return True
 
 
-def _sort_island_faces(kd, uvs, isl1, isl2):
+def _build_face_kdtree(isl):
+    kd = mathutils.kdtree.KDTree(len(isl['faces']))
+    for i, f in enumerate(isl['faces']):
+        kd.insert(Vector((f['ave_uv'].x, f['ave_uv'].y, 0.0)), i)
+    kd.balance()
+    return kd
+
+
+def _sort_island_faces(kd, isl1, isl2):
     """
     Sort faces in island
     """
@@ -53,74 +65,217 @@ def _sort_island_faces(kd, uvs, isl1, isl2):
     for f in isl1['sorted']:
         _, idx, _ = kd.find(
             Vector((f['ave_uv'].x, f['ave_uv'].y, 0.0)))
-        sorted_faces.append(isl2['faces'][uvs[idx]['face_idx']])
+        sorted_faces.append(isl2['faces'][idx])
     return sorted_faces
 
 
-def _group_island(island_info, allowable_center_deviation,
-                  allowable_size_deviation):
+def _sort_island_faces_by_source(src_kd, isl1, isl2):
     """
-    Group island
+    Sort faces in island by looking up the faces of the source island.
+    Return None if the faces are not matched one-to-one.
+    """
+
+    if len(isl1['sorted']) != len(isl2['faces']):
+        return None
+
+    sorted_faces = [None] * len(isl1['sorted'])
+    for f in isl2['faces']:
+        _, idx, _ = src_kd.find(
+            Vector((f['ave_uv'].x, f['ave_uv'].y, 0.0)))
+        if sorted_faces[idx] is not None:
+            return None
+        sorted_faces[idx] = f
+    return sorted_faces
+
+
+def _sort_group_faces(isl_1, isl_list):
+    # One KD-tree of the first island is shared with all islands in the
+    # group.  KD-tree of the island is needed only when the faces are not
+    # matched one-to-one.
+    src_kd = None
+    for isl_2 in isl_list:
+        if src_kd is None:
+            src_kd = _build_face_kdtree(isl_1)
+        sorted_faces = _sort_island_faces_by_source(src_kd, isl_1, isl_2)
+        if sorted_faces is None:
+            kd = _build_face_kdtree(isl_2)
+            sorted_faces = _sort_island_faces(kd, isl_1, isl_2)
+        isl_2['sorted'] = sorted_faces
+
+
+def _is_same_island(isl_1, isl_2, allowable_center_deviation,
+                    allowable_size_deviation):
+    dcx = isl_2['center'].x - isl_1['center'].x
+    dcy = isl_2['center'].y - isl_1['center'].y
+    dsx = isl_2['size'].x - isl_1['size'].x
+    dsy = isl_2['size'].y - isl_1['size'].y
+    center_x_matched = (
+        fabs(dcx) < allowable_center_deviation[0]
+    )
+    center_y_matched = (
+        fabs(dcy) < allowable_center_deviation[1]
+    )
+    size_x_matched = (
+        fabs(dsx) < allowable_size_deviation[0]
+    )
+    size_y_matched = (
+        fabs(dsy) < allowable_size_deviation[1]
+    )
+    center_matched = center_x_matched and center_y_matched
+    size_matched = size_x_matched and size_y_matched
+    num_uv_matched = (isl_2['num_uv'] == isl_1['num_uv'])
+
+    return center_matched and size_matched and num_uv_matched
+
+
+def _group_island_exhaustive(island_info, allowable_center_deviation,
+                             allowable_size_deviation):
+    """
+    Group island by comparing all islands each other
     """
 
     num_group = 0
-    while True:
+    for isl_1 in island_info:
         # search islands which is not parsed yet
-        isl_1 = None
-        for isl_1 in island_info:
-            if isl_1['group'] == -1:
-                break
-        else:
-            break   # all faces are parsed
-        if isl_1 is None:
-            break
+        if isl_1['group'] != -1:
+            continue
         isl_1['group'] = num_group
         isl_1['sorted'] = isl_1['faces']
 
         # search same island
+        same_islands = []
         for isl_2 in island_info:
             if isl_2['group'] == -1:
-                dcx = isl_2['center'].x - isl_1['center'].x
-                dcy = isl_2['center'].y - isl_1['center'].y
-                dsx = isl_2['size'].x - isl_1['size'].x
-                dsy = isl_2['size'].y - isl_1['size'].y
-                center_x_matched = (
-                    fabs(dcx) < allowable_center_deviation[0]
-                )
-                center_y_matched = (
-                    fabs(dcy) < allowable_center_deviation[1]
-                )
-                size_x_matched = (
-                    fabs(dsx) < allowable_size_deviation[0]
-                )
-                size_y_matched = (
-                    fabs(dsy) < allowable_size_deviation[1]
-                )
-                center_matched = center_x_matched and center_y_matched
-                size_matched = size_x_matched and size_y_matched
-                num_uv_matched = (isl_2['num_uv'] == isl_1['num_uv'])
                 # are islands have same?
-                if center_matched and size_matched and num_uv_matched:
+                if _is_same_island(isl_1, isl_2, allowable_center_deviation,
+                                   allowable_size_deviation):
                     isl_2['group'] = num_group
-                    kd = mathutils.kdtree.KDTree(len(isl_2['faces']))
-                    uvs = [
-                        {
-                            'uv': Vector(
-                                (f['ave_uv'].x, f['ave_uv'].y, 0.0)
-                            ),
-                            'face_idx': fidx
-                        } for fidx, f in enumerate(isl_2['faces'])
-                    ]
-                    for i, uv in enumerate(uvs):
-                        kd.insert(uv['uv'], i)
-                    kd.balance()
-                    # sort faces for copy/paste UV
-                    isl_2['sorted'] = _sort_island_faces(kd, uvs, isl_1, isl_2)
+                    same_islands.append(isl_2)
+        # sort faces for copy/paste UV
+        _sort_group_faces(isl_1, same_islands)
+        num_group = num_group + 1
+
+    return num_group
+
+
+def _group_island_hash(island_info, allowable_center_deviation,
+                       allowable_size_deviation):
+    """
+    Group island by comparing islands in the neighbouring buckets
+    """
+
+    # The bucket is the cell whose size is the allowable deviation, so the
+    # same islands are always found in the neighbouring cells.
+    def bucket_key(isl):
+        return (
+            isl['num_uv'],
+            floor(isl['center'].x / allowable_center_deviation[0]),
+            floor(isl['center'].y / allowable_center_deviation[1]),
+            floor(isl['size'].x / allowable_size_deviation[0]),
+            floor(isl['size'].y / allowable_size_deviation[1]),
+        )
+
+    buckets = defaultdict(list)
+    for isl in island_info:
+        buckets[bucket_key(isl)].append(isl)
+    offsets = list(product((-1, 0, 1), repeat=4))
+
+    num_group = 0
+    for isl_1 in island_info:
+        # search islands which is not parsed yet
+        if isl_1['group'] != -1:
+            continue
+        isl_1['group'] = num_group
+        isl_1['sorted'] = isl_1['faces']
+
+        # search same island in the neighbouring buckets
+        same_islands = []
+        num_uv, cx, cy, sx, sy = bucket_key(isl_1)
+        for ocx, ocy, osx, osy in offsets:
+            bucket = buckets.get((num_uv, cx + ocx, cy + ocy,
+                                  sx + osx, sy + osy))
+            if not bucket:
+                continue
+            for isl_2 in bucket:
+                if isl_2['group'] == -1:
+                    # are islands have same?
+                    if _is_same_island(isl_1, isl_2,
+                                       allowable_center_deviation,
+                                       allowable_size_deviation):
+                        isl_2['group'] = num_group
+                        same_islands.append(isl_2)
+            bucket[:] = [isl for isl in bucket if isl['group'] == -1]
+        # sort faces for copy/paste UV
+        _sort_group_faces(isl_1, same_islands)
         num_group = num_group + 1
 
     return num_group
 
 
+def _group_island(island_info, allowable_center_deviation,
+                  allowable_size_deviation, method='HASH'):
+    """
+    Group island
+    """
+
+    if method == 'EXHAUSTIVE':
+        return _group_island_exhaustive(island_info,
+                                        allowable_center_deviation,
+                                        allowable_size_deviation)
+    return _group_island_hash(island_info, allowable_center_deviation,
+                              allowable_size_deviation)
+
+
+def _pack_islands_by_skyline(context, island_info, island_to_uv_layer,
+                             rotate, margin, time_budget):
+    """
+    Pack islands by the skyline algorithm on the bounding boxes
+    """
+
+    island_loops = []
+    island_transforms = []
+    sizes = []
+    for isl in island_info:
+        uv_layer = island_to_uv_layer[isl["id"]]
+        loops = [l for f in isl['faces'] for l in f['face'].loops]
+        uvs = [l[uv_layer].uv.copy() for l in loops]
+
+        # Rotate island to fit the convex hull to the smallest bounding box,
+        # and lay the bounding box on its long side.
+        rot = Matrix.Identity(2)
+        if rotate and len(uvs) >= 3:
+            hull = [uvs[i] for i in mathutils.geometry.convex_hull_2d(uvs)]
+            rot = Matrix.Rotation(mathutils.geometry.box_fit_2d(hull), 2)
+            uvs = [compat.matmul(rot, uv) for uv in uvs]
+        min_uv = Vector((min(uv.x for uv in uvs), min(uv.y for uv in uvs)))
+        max_uv = Vector((max(uv.x for uv in uvs), max(uv.y for uv in uvs)))
+        size = max_uv - min_uv
+        if rotate and size.y > size.x:
+            rot = compat.matmul(Matrix.Rotation(-pi / 2, 2), rot)
+            min_uv = Vector((min_uv.y, -max_uv.x))
+            size = Vector((size.y, size.x))
+
+        island_loops.append((loops, uv_layer))
+        island_transforms.append((rot, min_uv))
+        sizes.append((size.x, size.y))
+
+    wm = context.window_manager
+    wm.progress_begin(0, 100)
+    try:
+        positions, scale = pack_rectangles(
+            sizes, margin, time_budget,
+            lambda ratio: wm.progress_update(int(ratio * 100)))
+    finally:
+        wm.progress_end()
+
+    for (loops, uv_layer), (rot, min_uv), pos in zip(
+            island_loops, island_transforms, positions):
+        offset = Vector(pos) - min_uv
+        for l in loops:
+            l[uv_layer].uv = \
+                (compat.matmul(rot, l[uv_layer].uv) + offset) * scale
+
+
 @PropertyClassRegistry()
 class _Properties:
     idname = "pack_uv"
@@ -164,6 +319,34 @@ class _Properties:
             size=2,
             subtype='XYZ'
         )
+        scene.muv_pack_uv_grouping_method = EnumProperty(
+            name="Grouping Method",
+            description="Method to find same UV islands",
+            items=[
+                ('HASH', "Hash",
+                 "Compare islands with similar center, size and UV count"),
+                ('EXHAUSTIVE', "Exhaustive", "Compare all islands each other"),
+            ],
+            default='HASH'
+        )
+        scene.muv_pack_uv_packing_method = EnumProperty(
+            name="Packing Method",
+            description="Method to pack UV islands",
+            items=[
+                ('BLENDER', "Blender", "Use Pack Islands of Blender"),
+                ('SKYLINE', "Skyline",
+                 "Pack bounding boxes of islands by skyline algorithm"),
+            ],
+            default='BLENDER'
+        )
+        scene.muv_pack_uv_time_budget = FloatProperty(
+            name="Time Budget",
+            description="Maximum time in seconds to pack islands by skyline "
+                        "algorithm (0: Unlimited)",
+            min=0.0,
+            max=3600.0,
+            default=2.0
+        )
         scene.muv_pack_uv_apply_pack_uv = BoolProperty(
             name="Apply Pack UV",
             description="Apply Pack UV operation intrinsic to Blender itself",
@@ -177,6 +360,9 @@ class _Properties:
         del scene.muv_pack_uv_allowable_size_deviation
         del scene.muv_pack_uv_accurate_island_copy
         del scene.muv_pack_uv_stride
+        del scene.muv_pack_uv_grouping_method
+        del scene.muv_pack_uv_packing_method
+        del scene.muv_pack_uv_time_budget
         del scene.muv_pack_uv_apply_pack_uv
 
 
@@ -239,6 +425,34 @@ class MUV_OT_PackUV(bpy.types.Operator):
         size=2,
         subtype='XYZ'
     )
+    grouping_method = EnumProperty(
+        name="Grouping Method",
+        description="Method to find same UV islands",
+        items=[
+            ('HASH', "Hash",
+             "Compare islands with similar center, size and UV count"),
+            ('EXHAUSTIVE', "Exhaustive", "Compare all islands each other"),
+        ],
+        default='HASH'
+    )
+    packing_method = EnumProperty(
+        name="Packing Method",
+        description="Method to pack UV islands",
+        items=[
+            ('BLENDER', "Blender", "Use Pack Islands of Blender"),
+            ('SKYLINE', "Skyline",
+             "Pack bounding boxes of islands by skyline algorithm"),
+        ],
+        default='BLENDER'
+    )
+    time_budget = FloatProperty(
+        name="Time Budget",
+        description="Maximum time in seconds to pack islands by skyline "
+                    "algorithm (0: Unlimited)",
+        min=0.0,
+        max=3600.0,
+        default=2.0
+    )
     apply_pack_uv = BoolProperty(
         name="Apply Pack UV",
         description="Apply Pack UV operation intrinsic to Blender itself",
@@ -257,11 +471,12 @@ class MUV_OT_PackUV(bpy.types.Operator):
 
         island_info = []
         selected_faces = []
-        island_to_bm = {}
         island_to_uv_layer = {}
-        bm_to_loop_lists = {}
+        # BMFace in island_info is valid only while BMesh is referred.
+        bm_list = []
         for obj in objs:
             bm = bmesh.from_edit_mesh(obj.data)
+            bm_list.append(bm)
             if common.check_version(2, 73, 0) >= 0:
                 bm.faces.ensure_lookup_table()
             if not bm.loops.layers.uv:
@@ -275,38 +490,43 @@ class MUV_OT_PackUV(bpy.types.Operator):
             isl = common.get_island_info(obj)
             for i, info in enumerate(isl):
                 id_ = i + len(island_info)
-                island_to_bm[id_] = bm
                 island_to_uv_layer[id_] = uv_layer
                 info["id"] = id_
             island_info.extend(isl)
-            bm_to_loop_lists[bm] = [l for f in bm.faces for l in f.loops]
 
         num_group = _group_island(island_info,
                                   self.allowable_center_deviation,
-                                  self.allowable_size_deviation)
-        bpy.ops.mesh.select_all(action='DESELECT')
+                                  self.allowable_size_deviation,
+                                  self.grouping_method)
+        groups = [[] for _ in range(num_group)]
+        for isl in island_info:
+            groups[isl['group']].append(isl)
 
         # pack UV
-        for gidx in range(num_group):
-            group = list(filter(
-                lambda i, idx=gidx: i['group'] == idx, island_info))
-            for f in group[0]['faces']:
-                f['face'].select = True
-        for obj in objs:
-            bmesh.update_edit_mesh(obj.data)
-        bpy.ops.uv.select_all(action='SELECT')
-        if self.apply_pack_uv:
-            bpy.ops.uv.pack_islands(rotate=self.rotate, margin=self.margin)
+        if self.packing_method == 'SKYLINE':
+            # Islands are moved directly, so the selection is not changed.
+            if self.apply_pack_uv:
+                _pack_islands_by_skyline(
+                    context, [group[0] for group in groups],
+                    island_to_uv_layer, self.rotate, self.margin,
+                    self.time_budget)
+        else:
+            bpy.ops.mesh.select_all(action='DESELECT')
+            for group in groups:
+                for f in group[0]['faces']:
+                    f['face'].select = True
+            for obj in objs:
+                bmesh.update_edit_mesh(obj.data)
+            bpy.ops.uv.select_all(action='SELECT')
+            if self.apply_pack_uv:
+                bpy.ops.uv.pack_islands(rotate=self.rotate,
+                                        margin=self.margin)
 
         # copy/paste UV among same islands
-        for gidx in range(num_group):
-            group = list(filter(
-                lambda i, idx=gidx: i['group'] == idx, island_info))
+        for group in groups:
             if len(group) <= 1:
                 continue
-            src_bm = island_to_bm[group[0]["id"]]
             src_uv_layer = island_to_uv_layer[group[0]["id"]]
-            src_loop_lists = bm_to_loop_lists[src_bm]
 
             src_loops = []
             for f in group[0]["faces"]:
@@ -316,9 +536,7 @@ class MUV_OT_PackUV(bpy.types.Operator):
             src_uv_graph = common.create_uv_graph(src_loops, src_uv_layer)
 
             for stride_idx, g in enumerate(group[1:]):
-                dst_bm = island_to_bm[g["id"]]
                 dst_uv_layer = island_to_uv_layer[g["id"]]
-                dst_loop_lists = bm_to_loop_lists[dst_bm]
 
                 dst_loops = []
                 for f in g["faces"]:
@@ -353,18 +571,16 @@ class MUV_OT_PackUV(bpy.types.Operator):
                         for (src_loop, dest_loop) in zip(
                                 src_face['face'].loops,
                                 dest_face['face'].loops):
-                            src_lidx = src_loop.index
-                            dst_lidx = dest_loop.index
-                            dst_loop_lists[dst_lidx][dst_uv_layer].uv = \
-                                src_loop_lists[src_lidx][src_uv_layer].uv + \
-                                uv_stride
+                            dest_loop[dst_uv_layer].uv = \
+                                src_loop[src_uv_layer].uv + uv_stride
 
         # restore face/UV selection
-        bpy.ops.uv.select_all(action='DESELECT')
-        bpy.ops.mesh.select_all(action='DESELECT')
-        for f in selected_faces:
-            f.select = True
-        bpy.ops.uv.select_all(action='SELECT')
+        if self.packing_method != 'SKYLINE':
+            bpy.ops.uv.select_all(action='DESELECT')
+            bpy.ops.mesh.select_all(action='DESELECT')
+            for f in selected_faces:
+                f.select = True
+            bpy.ops.uv.select_all(action='SELECT')
 
         for obj in objs:
             bmesh.update_edit_mesh(obj.data)
@@ -10,7 +10,6 @@ __date__ = "22 Apr 2022"
 import bpy
 from bpy.props import StringProperty, EnumProperty, BoolProperty
 import bmesh
-from mathutils import Vector
 
 from .. import common
 from ..utils.bl_class_registry import BlClassRegistry
@@ -209,112 +208,28 @@ class MUV_OT_PreserveUVAspect(bpy.types.Operator):
                         continue
 
                     src_img = img
-                    ratio = Vector((
-                        dest_img.size[0] / src_img.size[0],
-                        dest_img.size[1] / src_img.size[1]))
-
-                    if self.origin == 'CENTER':
-                        origin = Vector((0.0, 0.0))
-                        num = 0
-                        for f in info[img]['faces']:
-                            for l in f.loops:
-                                uv = l[uv_layer].uv
-                                origin = origin + uv
-                                num = num + 1
-                        origin = origin / num
-                    elif self.origin == 'LEFT_TOP':
-                        origin = Vector((100000.0, -100000.0))
-                        for f in info[img]['faces']:
-                            for l in f.loops:
-                                uv = l[uv_layer].uv
-                                origin.x = min(origin.x, uv.x)
-                                origin.y = max(origin.y, uv.y)
-                    elif self.origin == 'LEFT_CENTER':
-                        origin = Vector((100000.0, 0.0))
-                        num = 0
-                        for f in info[img]['faces']:
-                            for l in f.loops:
-                                uv = l[uv_layer].uv
-                                origin.x = min(origin.x, uv.x)
-                                origin.y = origin.y + uv.y
-                                num = num + 1
-                        origin.y = origin.y / num
-                    elif self.origin == 'LEFT_BOTTOM':
-                        origin = Vector((100000.0, 100000.0))
-                        for f in info[img]['faces']:
-                            for l in f.loops:
-                                uv = l[uv_layer].uv
-                                origin.x = min(origin.x, uv.x)
-                                origin.y = min(origin.y, uv.y)
-                    elif self.origin == 'CENTER_TOP':
-                        origin = Vector((0.0, -100000.0))
-                        num = 0
-                        for f in info[img]['faces']:
-                            for l in f.loops:
-                                uv = l[uv_layer].uv
-                                origin.x = origin.x + uv.x
-                                origin.y = max(origin.y, uv.y)
-                                num = num + 1
-                        origin.x = origin.x / num
-                    elif self.origin == 'CENTER_BOTTOM':
-                        origin = Vector((0.0, 100000.0))
-                        num = 0
-                        for f in info[img]['faces']:
-                            for l in f.loops:
-                                uv = l[uv_layer].uv
-                                origin.x = origin.x + uv.x
-                                origin.y = min(origin.y, uv.y)
-                                num = num + 1
-                        origin.x = origin.x / num
-                    elif self.origin == 'RIGHT_TOP':
-                        origin = Vector((-100000.0, -100000.0))
-                        for f in info[img]['faces']:
-                            for l in f.loops:
-                                uv = l[uv_layer].uv
-                                origin.x = max(origin.x, uv.x)
-                                origin.y = max(origin.y, uv.y)
-                    elif self.origin == 'RIGHT_CENTER':
-                        origin = Vector((-100000.0, 0.0))
-                        num = 0
-                        for f in info[img]['faces']:
-                            for l in f.loops:
-                                uv = l[uv_layer].uv
-                                origin.x = max(origin.x, uv.x)
-                                origin.y = origin.y + uv.y
-                                num = num + 1
-                        origin.y = origin.y / num
-                    elif self.origin == 'RIGHT_BOTTOM':
-                        origin = Vector((-100000.0, 100000.0))
-                        for f in info[img]['faces']:
-                            for l in f.loops:
-                                uv = l[uv_layer].uv
-                                origin.x = max(origin.x, uv.x)
-                                origin.y = min(origin.y, uv.y)
-                    else:
+                    ratio = (dest_img.size[0] / src_img.size[0],
+                             dest_img.size[1] / src_img.size[1])
+
+                    uvs = common.get_uvs_from_faces(info[img]['faces'],
+                                                    uv_layer)
+                    try:
+                        info[img]['uvs'] = common.scale_uvs(
+                            uvs, self.origin, (1.0 / ratio[0], 1.0 / ratio[1]))
+                    except ValueError:
                         self.report({'ERROR'}, "Unknown Operation")
                         return {'CANCELLED'}
 
-                    info[img]['ratio'] = ratio
-                    info[img]['origin'] = origin
-
                 for img in info:
                     if img is None:
                         continue
 
-                    for f in info[img]['faces']:
-                        if compat.check_version(2, 80, 0) < 0:
-                            tex_layer = bm.faces.layers.tex.verify()
+                    if compat.check_version(2, 80, 0) < 0:
+                        tex_layer = bm.faces.layers.tex.verify()
+                        for f in info[img]['faces']:
                             f[tex_layer].image = dest_img
-                        for l in f.loops:
-                            uv = l[uv_layer].uv
-                            origin = info[img]['origin']
-                            ratio = info[img]['ratio']
-                            diff = uv - origin
-                            diff.x = diff.x / ratio.x
-                            diff.y = diff.y / ratio.y
-                            uv.x = origin.x + diff.x
-                            uv.y = origin.y + diff.y
-                            l[uv_layer].uv = uv
+                    common.set_uvs_to_faces(info[img]['faces'], uv_layer,
+                                            info[img]['uvs'])
 
                 bmesh.update_edit_mesh(obj.data)
 
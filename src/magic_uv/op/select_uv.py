@@ -145,9 +145,12 @@ class MUV_OT_SelectUV_SelectOverlapped(bpy.types.Operator):
             uv_layer_list.append(uv_layer)
             faces_list.append(sel_faces)
 
+        user_prefs = compat.get_user_preferences(context)
+        prefs = user_prefs.addons["magic_uv"].preferences
         overlapped_info = common.get_overlapped_uv_info(
             bm_list, faces_list, uv_layer_list, 'FACE',
-            self.same_polygon_threshold)
+            self.same_polygon_threshold,
+            num_workers=prefs.uv_inspection_num_workers)
 
         if self.selection_method == 'RESET':
             if context.tool_settings.use_uv_select_sync:
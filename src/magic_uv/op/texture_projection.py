@@ -12,7 +12,6 @@ from math import sin, cos
 
 import bpy
 import bmesh
-from bpy_extras import view3d_utils
 from bpy.props import (
     BoolProperty,
     EnumProperty,
@@ -20,6 +19,7 @@ from bpy.props import (
     FloatVectorProperty,
 )
 import mathutils
+import numpy as np
 
 from .. import common
 from ..utils.bl_class_registry import BlClassRegistry
@@ -30,6 +30,9 @@ if compat.check_version(2, 80, 0) >= 0:
     from ..lib import bglx as bgl
 else:
     import bgl
+if compat.check_version(3, 0, 0) >= 0:
+    from ..lib.batch_renderer import ImageBatchRenderer
+    import gpu
 
 
 _Rect = namedtuple('Rect', 'x0 y0 x1 y1')
@@ -96,19 +99,6 @@ def _rect_to_rect2(rect):
     return _Rect2(rect.x0, rect.y0, rect.x1 - rect.x0, rect.y1 - rect.y0)
 
 
-def _region_to_canvas(rg_vec, canvas):
-    """
-    Convert screen region to canvas
-    """
-
-    cv_rect = _rect_to_rect2(canvas)
-    cv_vec = mathutils.Vector()
-    cv_vec.x = (rg_vec.x - cv_rect.x) / cv_rect.width
-    cv_vec.y = (rg_vec.y - cv_rect.y) / cv_rect.height
-
-    return cv_vec
-
-
 def _create_affine_matrix(identity, scale, rotate, translate):
     if identity:
         return mathutils.Matrix.Identity(3)
@@ -138,6 +128,137 @@ def _create_affine_matrix(identity, scale, rotate, translate):
     return compat.matmul(compat.matmul(mat_translate, mat_rotate), mat_scale)
 
 
+def _get_world_to_canvas_matrix(region, rv3d, world_mat, canvas,
+                                mat_affine):
+    """
+    Get 3x4 matrix which transforms object space to canvas.
+    The transformed coordinates are homogeneous, so they must be divided by
+    the last component which is w of clip space.
+    """
+
+    # clip space -> screen region (before perspective division)
+    half_w = region.width / 2.0
+    half_h = region.height / 2.0
+    mat_clip_to_region = np.array([
+        [half_w, 0.0, 0.0, half_w],
+        [0.0, half_h, 0.0, half_h],
+        [0.0, 0.0, 0.0, 1.0]
+    ])
+
+    # inverse of affine transformation around the center of canvas
+    cx = (canvas.x1 + canvas.x0) / 2.0
+    cy = (canvas.y1 + canvas.y0) / 2.0
+    mat_to_center = np.array([
+        [1.0, 0.0, -cx],
+        [0.0, 1.0, -cy],
+        [0.0, 0.0, 1.0]
+    ])
+    mat_from_center = np.array([
+        [1.0, 0.0, cx],
+        [0.0, 1.0, cy],
+        [0.0, 0.0, 1.0]
+    ])
+    mat_affine_inv = np.array(mat_affine.inverted(), dtype=np.float64)
+
+    # screen region -> canvas
+    cv_rect = _rect_to_rect2(canvas)
+    mat_region_to_canvas = np.array([
+        [1.0 / cv_rect.width, 0.0, -cv_rect.x / cv_rect.width],
+        [0.0, 1.0 / cv_rect.height, -cv_rect.y / cv_rect.height],
+        [0.0, 0.0, 1.0]
+    ])
+
+    return np.linalg.multi_dot([
+        mat_region_to_canvas,
+        mat_from_center, mat_affine_inv, mat_to_center,
+        mat_clip_to_region,
+        np.array(rv3d.perspective_matrix, dtype=np.float64),
+        np.array(world_mat, dtype=np.float64)
+    ])
+
+
+def _project_to_canvas(coords, mat):
+    """
+    Project coordinates to canvas by the matrix from
+    _get_world_to_canvas_matrix.
+    Return the canvas coordinates and the mask of the coordinates which are
+    in front of the viewpoint.
+    """
+
+    coords_h = np.hstack([coords, np.ones((len(coords), 1))])
+    projected = np.dot(coords_h, mat.T)
+    w = projected[:, 2]
+    visible = w > 0.0
+    with np.errstate(divide='ignore', invalid='ignore'):
+        cv = projected[:, :2] / w[:, np.newaxis]
+
+    return cv, visible
+
+
+def _get_texture_quad(context, canvas):
+    """
+    Get positions of the quad which the texture is rendered to
+    """
+
+    sc = context.scene
+
+    # Apply affine transformation.
+    center = mathutils.Vector((
+        (canvas.x1 + canvas.x0) / 2.0,
+        (canvas.y1 + canvas.y0) / 2.0,
+        0.0,
+    ))
+    p1 = mathutils.Vector((canvas.x0 - center.x, canvas.y0 - center.y, 1.0))
+    p2 = mathutils.Vector((canvas.x0 - center.x, canvas.y1 - center.y, 1.0))
+    p3 = mathutils.Vector((canvas.x1 - center.x, canvas.y1 - center.y, 1.0))
+    p4 = mathutils.Vector((canvas.x1 - center.x, canvas.y0 - center.y, 1.0))
+    mat_affine = _create_affine_matrix(
+        sc.muv_texture_projection_adjust_window,
+        sc.muv_texture_projection_tex_scaling,
+        sc.muv_texture_projection_tex_rotation,
+        sc.muv_texture_projection_tex_translation)
+    p1 = compat.matmul(mat_affine, p1) + center
+    p2 = compat.matmul(mat_affine, p2) + center
+    p3 = compat.matmul(mat_affine, p3) + center
+    p4 = compat.matmul(mat_affine, p4) + center
+
+    return [
+        [p1.x, p1.y],
+        [p2.x, p2.y],
+        [p3.x, p3.y],
+        [p4.x, p4.y]
+    ]
+
+
+def _get_texture_key(img):
+    """
+    Get key to detect the change of the image to be rendered
+    """
+
+    # The pixels are edited while is_dirty is True.  bindcode is changed
+    # when the GPU texture of the image is recreated (ex. reloading).
+    return (img.name, img.as_pointer(), tuple(img.size), img.source,
+            img.filepath, img.is_dirty, img.bindcode)
+
+
+def _get_quad_key(context, img):
+    """
+    Get key to detect the change of the quad which the texture is rendered to
+    """
+
+    sc = context.scene
+    user_prefs = compat.get_user_preferences(context)
+    prefs = user_prefs.addons["magic_uv"].preferences
+
+    return (context.region.width, context.region.height, tuple(img.size),
+            tuple(prefs.texture_projection_canvas_padding),
+            sc.muv_texture_projection_adjust_window,
+            sc.muv_texture_projection_apply_tex_aspect,
+            tuple(sc.muv_texture_projection_tex_scaling),
+            sc.muv_texture_projection_tex_rotation,
+            tuple(sc.muv_texture_projection_tex_translation))
+
+
 def _is_valid_context(context):
     # only 'VIEW_3D' space is allowed to execute
     if not common.is_valid_space(context, ['VIEW_3D']):
@@ -160,6 +281,18 @@ class _Properties:
 
     @classmethod
     def init_props(cls, scene):
+        class Props():
+            # GPU resources to render the texture, which are rebuilt only
+            # when the image or the quad is changed
+            texture = None
+            texture_key = None
+            # The quad depends on the region size, so it is cached for each
+            # region.
+            # { region pointer: (quad key, ImageBatchRenderer) }
+            renderers = {}
+
+        scene.muv_props.texture_projection = Props()
+
         def get_func(_):
             return MUV_OT_TextureProjection.is_running(bpy.context)
 
@@ -299,35 +432,42 @@ class MUV_OT_TextureProjection(bpy.types.Operator):
         # get texture to be renderred
         img = bpy.data.images[sc.muv_texture_projection_tex_image]
 
+        if compat.check_version(3, 0, 0) >= 0:
+            # The texture and the quad are cached, and they are rebuilt only
+            # when the image or the canvas is changed.
+            props = sc.muv_props.texture_projection
+            texture_key = _get_texture_key(img)
+            if props.texture is None or props.texture_key != texture_key:
+                props.texture = gpu.texture.from_image(img)
+                props.texture_key = texture_key
+
+            quad_key = _get_quad_key(context, img)
+            region_key = context.region.as_pointer()
+            cached_quad_key, renderer = \
+                props.renderers.get(region_key, (None, None))
+            if renderer is None or cached_quad_key != quad_key:
+                rect = _get_canvas(context)
+                positions = _get_texture_quad(context, rect)
+                tex_coords = [
+                    [0.0, 0.0],
+                    [0.0, 1.0],
+                    [1.0, 1.0],
+                    [1.0, 0.0]
+                ]
+                renderer = ImageBatchRenderer()
+                renderer.add_quads(positions, tex_coords)
+                props.renderers[region_key] = (quad_key, renderer)
+
+            # render texture
+            gpu.state.blend_set('ALPHA')
+            renderer.draw(
+                props.texture, sc.muv_texture_projection_tex_transparency)
+            gpu.state.blend_set('NONE')
+            return
+
         # setup rendering region
         rect = _get_canvas(context)
-
-        # Apply affine transformation.
-        center = mathutils.Vector((
-            (rect.x1 + rect.x0) / 2.0,
-            (rect.y1 + rect.y0) / 2.0,
-            0.0,
-        ))
-        p1 = mathutils.Vector((rect.x0 - center.x, rect.y0 - center.y, 1.0))
-        p2 = mathutils.Vector((rect.x0 - center.x, rect.y1 - center.y, 1.0))
-        p3 = mathutils.Vector((rect.x1 - center.x, rect.y1 - center.y, 1.0))
-        p4 = mathutils.Vector((rect.x1 - center.x, rect.y0 - center.y, 1.0))
-        mat_affine = _create_affine_matrix(
-            sc.muv_texture_projection_adjust_window,
-            sc.muv_texture_projection_tex_scaling,
-            sc.muv_texture_projection_tex_rotation,
-            sc.muv_texture_projection_tex_translation)
-        p1 = compat.matmul(mat_affine, p1) + center
-        p2 = compat.matmul(mat_affine, p2) + center
-        p3 = compat.matmul(mat_affine, p3) + center
-        p4 = compat.matmul(mat_affine, p4) + center
-
-        positions = [
-            [p1.x, p1.y],
-            [p2.x, p2.y],
-            [p3.x, p3.y],
-            [p4.x, p4.y]
-        ]
+        positions = _get_texture_quad(context, rect)
         tex_coords = [
             [0.0, 0.0],
             [0.0, 1.0],
@@ -366,11 +506,19 @@ class MUV_OT_TextureProjection(bpy.types.Operator):
             bgl.glVertex2f(v1, v2)
         bgl.glEnd()
 
+    @classmethod
+    def clear_draw_cache(cls, context):
+        props = context.scene.muv_props.texture_projection
+        props.texture = None
+        props.texture_key = None
+        props.renderers = {}
+
     def invoke(self, context, _):
         if not MUV_OT_TextureProjection.is_running(context):
             MUV_OT_TextureProjection.handle_add(self, context)
         else:
             MUV_OT_TextureProjection.handle_remove()
+            MUV_OT_TextureProjection.clear_draw_cache(context)
 
         if context.area:
             context.area.tag_redraw()
@@ -411,7 +559,6 @@ class MUV_OT_TextureProjection_Project(bpy.types.Operator):
         objs = common.get_uv_editable_objects(context)
 
         for obj in objs:
-            world_mat = obj.matrix_world
             bm = bmesh.from_edit_mesh(obj.data)
             if common.check_version(2, 73, 0) >= 0:
                 bm.faces.ensure_lookup_table()
@@ -430,42 +577,18 @@ class MUV_OT_TextureProjection_Project(bpy.types.Operator):
             if compat.check_version(2, 80, 0) < 0:
                 tex_layer = bm.faces.layers.tex.verify()
 
-            sel_faces = [f for f in bm.faces if f.select]
-
-            # transform 3d space to screen region
-            v_screen = [
-                view3d_utils.location_3d_to_region_2d(
-                    region,
-                    space.region_3d,
-                    compat.matmul(world_mat, l.vert.co))
-                for f in sel_faces for l in f.loops
-            ]
-
-            # Apply affine transformation.
+            # transform 3d space to canvas at once
             rect = _get_canvas(bpy.context)
-            center = mathutils.Vector((
-                (rect.x1 + rect.x0) / 2.0,
-                (rect.y1 + rect.y0) / 2.0,
-                0.0,
-            ))
-            v_screen_transformed = []
-            for v in v_screen:
-                p1 = mathutils.Vector((v.x - center.x, v.y - center.y, 1.0))
-                mat_affine = _create_affine_matrix(
-                    sc.muv_texture_projection_adjust_window,
-                    sc.muv_texture_projection_tex_scaling,
-                    sc.muv_texture_projection_tex_rotation,
-                    sc.muv_texture_projection_tex_translation)
-                p1 = compat.matmul(mat_affine.inverted(), p1) + center
-                v_screen_transformed.append(p1)
-
-            # transform screen region to canvas
-            v_canvas = [
-                _region_to_canvas(
-                    v,
-                    rect
-                ) for v in v_screen_transformed
-            ]
+            mat_affine = _create_affine_matrix(
+                sc.muv_texture_projection_adjust_window,
+                sc.muv_texture_projection_tex_scaling,
+                sc.muv_texture_projection_tex_rotation,
+                sc.muv_texture_projection_tex_translation)
+            arrays = common.MeshArrays(None, bm, uv_layer)
+            sel_loops = arrays.face_loop_mask(arrays.face_select)
+            mat = _get_world_to_canvas_matrix(
+                region, space.region_3d, obj.matrix_world, rect, mat_affine)
+            v_canvas, visible = _project_to_canvas(arrays.loop_vert_cos, mat)
 
             # assign image
             if compat.check_version(2, 80, 0) >= 0:
@@ -483,16 +606,14 @@ class MUV_OT_TextureProjection_Project(bpy.types.Operator):
                 node_tree.links.new(
                     output_node.inputs["Surface"], tex_node.outputs["Color"])
             else:
-                for f in sel_faces:
-                    f[tex_layer].image = \
-                        bpy.data.images[sc.muv_texture_projection_tex_image]
+                img = bpy.data.images[sc.muv_texture_projection_tex_image]
+                for f in bm.faces:
+                    if f.select:
+                        f[tex_layer].image = img
 
             # project texture to object
-            i = 0
-            for f in sel_faces:
-                for l in f.loops:
-                    l[uv_layer].uv = v_canvas[i].to_2d()
-                    i = i + 1
+            # (loops behind the viewpoint can not be projected)
+            arrays.write_uvs(v_canvas, sel_loops & visible)
 
             common.redraw_all_areas()
             bmesh.update_edit_mesh(obj.data)
@@ -22,6 +22,7 @@ from ..utils import compatibility as compat
 
 if compat.check_version(2, 80, 0) >= 0:
     from ..lib import bglx as bgl
+    from ..lib.batch_renderer import BatchRenderer
 else:
     import bgl
 
@@ -603,6 +604,8 @@ class MUV_OT_UVBoundingBox(bpy.types.Operator):
 
     __handle = None
     __timer = None
+    __renderer = None
+    __renderer_key = None
 
     @classmethod
     def poll(cls, context):
@@ -632,25 +635,31 @@ class MUV_OT_UVBoundingBox(bpy.types.Operator):
             sie = bpy.types.SpaceImageEditor
             sie.draw_handler_remove(cls.__handle, "WINDOW")
             cls.__handle = None
+            cls.__renderer = None
+            cls.__renderer_key = None
         if cls.__timer is not None:
             context.window_manager.event_timer_remove(cls.__timer)
             cls.__timer = None
 
     @classmethod
-    def __draw_ctrl_point(cls, context, pos):
-        """
-        Draw control point
-        """
+    def __get_ctrl_point_verts(cls, context, pos):
         user_prefs = compat.get_user_preferences(context)
         prefs = user_prefs.addons["magic_uv"].preferences
         cp_size = prefs.uv_bounding_box_cp_size
         offset = cp_size / 2
-        verts = [
+        return [
             [pos.x - offset, pos.y - offset],
             [pos.x - offset, pos.y + offset],
             [pos.x + offset, pos.y + offset],
             [pos.x + offset, pos.y - offset]
         ]
+
+    @classmethod
+    def __draw_ctrl_point(cls, context, pos):
+        """
+        Draw control point
+        """
+        verts = cls.__get_ctrl_point_verts(context, pos)
         bgl.glEnable(bgl.GL_BLEND)
         bgl.glBegin(bgl.GL_QUADS)
         bgl.glColor4f(1.0, 1.0, 1.0, 1.0)
@@ -658,6 +667,33 @@ class MUV_OT_UVBoundingBox(bpy.types.Operator):
             bgl.glVertex2f(x, y)
         bgl.glEnd()
 
+    @classmethod
+    def __draw_ctrl_points(cls, context, positions):
+        """
+        Draw all control points (at once in >=2.80)
+        """
+        if compat.check_version(2, 80, 0) >= 0:
+            user_prefs = compat.get_user_preferences(context)
+            prefs = user_prefs.addons["magic_uv"].preferences
+
+            # Rebuild the batch only when the control points are moved on
+            # the region.
+            key = (tuple(tuple(pos) for pos in positions),
+                   prefs.uv_bounding_box_cp_size)
+            if cls.__renderer is None or cls.__renderer_key != key:
+                cls.__renderer = BatchRenderer()
+                for pos in positions:
+                    cls.__renderer.add_quads(
+                        cls.__get_ctrl_point_verts(context, pos),
+                        (1.0, 1.0, 1.0, 1.0))
+                cls.__renderer_key = key
+
+            bgl.glEnable(bgl.GL_BLEND)
+            cls.__renderer.draw()
+        else:
+            for pos in positions:
+                cls.__draw_ctrl_point(context, pos)
+
     @classmethod
     def draw_bb(cls, _, context):
         """
@@ -671,10 +707,11 @@ class MUV_OT_UVBoundingBox(bpy.types.Operator):
         if not _is_valid_context(context):
             return
 
-        for cp in props.ctrl_points:
-            cls.__draw_ctrl_point(
-                context, mathutils.Vector(
-                    context.region.view2d.view_to_region(cp.x, cp.y)))
+        positions = [
+            mathutils.Vector(context.region.view2d.view_to_region(cp.x, cp.y))
+            for cp in props.ctrl_points
+        ]
+        cls.__draw_ctrl_points(context, positions)
 
     def __get_uv_info(self, context):
         """
@@ -7,12 +7,11 @@ __status__ = "production"
 __version__ = "6.6"
 __date__ = "22 Apr 2022"
 
-import random
-from math import fabs
-
 import bpy
 from bpy.props import BoolProperty, EnumProperty, FloatProperty
 import bmesh
+from mathutils import Matrix, Vector
+import numpy as np
 
 from .. import common
 from ..utils.bl_class_registry import BlClassRegistry
@@ -21,10 +20,15 @@ from ..utils import compatibility as compat
 
 if compat.check_version(2, 80, 0) >= 0:
     from ..lib import bglx as bgl
+    from ..lib.batch_renderer import BatchRenderer
+    import gpu
 else:
     import bgl
 
 
+ID_MASK_LAYER_NAME = "muv_uv_island_id"
+
+
 def _is_valid_context(context):
     # 'IMAGE_EDITOR' and 'VIEW_3D' space is allowed to execute.
     # If 'View_3D' space is not allowed, you can't find option in Tool-Shelf
@@ -43,9 +47,92 @@ def _is_valid_context(context):
     return True
 
 
-def _update_uvinsp_info(context):
+def _triangulate_polygons(polygons):
+    """
+    Triangulate polygons as triangle fans.
+    Return the coordinates of vertices and the indices of triangles.
+    """
+
+    coords = []
+    indices = []
+    for poly in polygons:
+        offset = len(coords)
+        coords.extend([co[:] for co in poly])
+        indices.extend([(offset, offset + i, offset + i + 1)
+                        for i in range(1, len(poly) - 1)])
+
+    return coords, indices
+
+
+def _get_uv_polygons(info_list, mode, face_uvs_key):
+    if mode == 'PART':
+        return [poly for info in info_list for poly in info["polygons"]]
+    return [info[face_uvs_key] for info in info_list]
+
+
+def _get_uv_to_region_matrix(region):
+    """
+    Get matrix which transforms UV coordinates to region coordinates
+    """
+
+    view2d = region.view2d
+    x0, y0 = view2d.region_to_view(0, 0)
+    x1, y1 = view2d.region_to_view(region.width, region.height)
+    if x1 == x0 or y1 == y0:
+        return None
+    sx = region.width / (x1 - x0)
+    sy = region.height / (y1 - y0)
+
+    return Matrix((
+        (sx, 0.0, 0.0, -x0 * sx),
+        (0.0, sy, 0.0, -y0 * sy),
+        (0.0, 0.0, 1.0, 0.0),
+        (0.0, 0.0, 0.0, 1.0)
+    ))
+
+
+def _draw_triangles(props, key, draw_data, color, matrix, dims):
+    """
+    Draw triangles which are transformed by matrix.
+    The batch is cached until the inspection data is updated.
+    """
+
+    coords, indices = draw_data
+    if not indices:
+        return
+
+    if compat.check_version(2, 80, 0) >= 0:
+        color = tuple(color)
+        cached = props.draw_cache.get(key)
+        if cached is None or cached[0] != color:
+            renderer = BatchRenderer(dims)
+            renderer.add_triangle_arrays(
+                coords, [color] * len(coords), indices)
+            cached = (color, renderer)
+            props.draw_cache[key] = cached
+        gpu.matrix.push()
+        gpu.matrix.multiply_matrix(matrix)
+        cached[1].draw()
+        gpu.matrix.pop()
+        return
+
+    bgl.glBegin(bgl.GL_TRIANGLES)
+    bgl.glColor4f(color[0], color[1], color[2], color[3])
+    for tri in indices:
+        for i in tri:
+            co = compat.matmul(matrix, Vector(coords[i]).to_3d())
+            if dims == 2:
+                bgl.glVertex2f(co[0], co[1])
+            else:
+                bgl.glVertex3f(co[0], co[1], co[2])
+    bgl.glEnd()
+
+
+def _update_uvinsp_info(context, incremental=False):
     sc = context.scene
     props = sc.muv_props.uv_inspection
+    if not incremental:
+        props.overlapped_cache.clear()
     objs = common.get_uv_editable_objects(context)
 
     bm_to_obj = {}      # { Object: BMesh }
@@ -67,12 +154,20 @@ def _update_uvinsp_info(context):
         uv_layer_list.append(uv_layer)
         faces_list.append(sel_faces)
 
+    user_prefs = compat.get_user_preferences(context)
+    prefs = user_prefs.addons["magic_uv"].preferences
     props.overlapped_info = common.get_overlapped_uv_info(
         bm_list, faces_list, uv_layer_list, sc.muv_uv_inspection_show_mode,
-        sc.muv_uv_inspection_same_polygon_threshold)
+        sc.muv_uv_inspection_same_polygon_threshold,
+        num_workers=prefs.uv_inspection_num_workers,
+        cache=props.overlapped_cache)
     props.flipped_info = common.get_flipped_uv_info(
         bm_list, faces_list, uv_layer_list)
 
+    # UV-space triangles are built on drawing for the show mode.
+    props.uv_draw_data = {}
+    props.draw_cache = {}
+
     if sc.muv_uv_inspection_display_in_v3d:
         props.overlapped_info_for_v3d = {}
         for info in props.overlapped_info:
@@ -92,6 +187,22 @@ def _update_uvinsp_info(context):
                 props.filpped_info_for_v3d[obj] = []
             props.filpped_info_for_v3d[obj].append(face.index)
 
+        # Faces are triangulated in the object space, and they are
+        # transformed by the world matrix on drawing.
+        obj_to_bm = {obj: bm for bm, obj in bm_to_obj.items()}
+        props.overlapped_draw_data_for_v3d = {
+            obj: _triangulate_polygons(
+                [[l.vert.co for l in obj_to_bm[obj].faces[fidx].loops]
+                 for fidx in findices])
+            for obj, findices in props.overlapped_info_for_v3d.items()
+        }
+        props.flipped_draw_data_for_v3d = {
+            obj: _triangulate_polygons(
+                [[l.vert.co for l in obj_to_bm[obj].faces[fidx].loops]
+                 for fidx in findices])
+            for obj, findices in props.filpped_info_for_v3d.items()
+        }
+
 
 @PropertyClassRegistry()
 class _Properties:
@@ -104,6 +215,14 @@ class _Properties:
             flipped_info = []
             overlapped_info_for_v3d = {}    # { Object: [face_indices] }
             filpped_info_for_v3d = {}       # { Object: [face_indices] }
+            overlapped_cache = {}
+            # { (kind, mode): (coords, indices) } triangulated UV polygons
+            uv_draw_data = {}
+            # { Object: (coords, indices) } triangulated faces
+            overlapped_draw_data_for_v3d = {}
+            flipped_draw_data_for_v3d = {}
+            # { key: (color, BatchRenderer) } built from draw data
+            draw_cache = {}
 
         scene.muv_props.uv_inspection = Props()
 
@@ -116,6 +235,14 @@ class _Properties:
         def update_func(_, __):
             bpy.ops.uv.muv_uv_inspection_render('INVOKE_REGION_WIN')
 
+        def update_auto_refresh(self, _):
+            if not MUV_OT_UVInspection_Render.is_running(bpy.context):
+                return
+            if self.muv_uv_inspection_auto_refresh:
+                MUV_OT_UVInspection_Render.auto_refresh_add()
+            else:
+                MUV_OT_UVInspection_Render.auto_refresh_remove()
+
         scene.muv_uv_inspection_enabled = BoolProperty(
             name="UV Inspection Enabled",
             description="UV Inspection is enabled",
@@ -161,9 +288,17 @@ class _Properties:
             max=0.01,
             step=0.00001
         )
+        scene.muv_uv_inspection_auto_refresh = BoolProperty(
+            name="Auto Refresh",
+            description="Update UV Inspection automatically when UVs are "
+                        "changed",
+            default=False,
+            update=update_auto_refresh
+        )
 
     @classmethod
     def del_props(cls, scene):
+        MUV_OT_UVInspection_Render.auto_refresh_remove()
         del scene.muv_props.uv_inspection
         del scene.muv_uv_inspection_enabled
         del scene.muv_uv_inspection_show
@@ -172,6 +307,7 @@ class _Properties:
         del scene.muv_uv_inspection_display_in_v3d
         del scene.muv_uv_inspection_show_mode
         del scene.muv_uv_inspection_same_polygon_threshold
+        del scene.muv_uv_inspection_auto_refresh
 
 
 @BlClassRegistry()
@@ -187,6 +323,11 @@ class MUV_OT_UVInspection_Render(bpy.types.Operator):
 
     __handle = None
     __handle_v3d = None
+    __uv_changed = False
+    __auto_refresh_timer = None
+
+    # Interval in seconds to check the changes of UVs on Auto Refresh.
+    AUTO_REFRESH_INTERVAL = 0.1
 
     @classmethod
     def poll(cls, context):
@@ -195,6 +336,73 @@ class MUV_OT_UVInspection_Render(bpy.types.Operator):
             return False
         return _is_valid_context(context)
 
+    @classmethod
+    def __on_depsgraph_update(cls, _, depsgraph):
+        # Edit-mesh is updated while UVs are edited.  Temporary meshes
+        # created by UV Inspection itself are not in edit mode, so they do
+        # not trigger the refresh.
+        for update in depsgraph.updates:
+            data = update.id.original
+            if isinstance(data, bpy.types.Mesh) and data.is_editmode:
+                cls.__uv_changed = True
+                return
+
+    @classmethod
+    def __auto_refresh(cls):
+        context = bpy.context
+        if not cls.is_running(context):
+            cls.__auto_refresh_timer = None
+            return None
+        if not cls.__uv_changed:
+            return cls.AUTO_REFRESH_INTERVAL
+        cls.__uv_changed = False
+
+        obj = context.active_object
+        if obj is None or obj.type != 'MESH' or obj.mode != 'EDIT':
+            return cls.AUTO_REFRESH_INTERVAL
+
+        # Only the faces whose UVs are changed are re-tested.
+        _update_uvinsp_info(context, incremental=True)
+        common.redraw_all_areas()
+
+        return cls.AUTO_REFRESH_INTERVAL
+
+    @classmethod
+    def auto_refresh_add(cls):
+        # bpy.app.timers is not available in <2.80
+        if compat.check_version(2, 80, 0) < 0:
+            return
+
+        handlers = bpy.app.handlers.depsgraph_update_post
+        if cls.__on_depsgraph_update not in handlers:
+            handlers.append(cls.__on_depsgraph_update)
+        if cls.__auto_refresh_timer is None:
+            # bpy.app.timers finds the timer by the identity of the function,
+            # so the registered bound method is kept to unregister it.
+            cls.__auto_refresh_timer = cls.__auto_refresh
+            bpy.app.timers.register(
+                cls.__auto_refresh_timer,
+                first_interval=cls.AUTO_REFRESH_INTERVAL)
+
+    @classmethod
+    def auto_refresh_remove(cls):
+        if compat.check_version(2, 80, 0) < 0:
+            return
+
+        handlers = bpy.app.handlers.depsgraph_update_post
+        if cls.__on_depsgraph_update in handlers:
+            handlers.remove(cls.__on_depsgraph_update)
+        if cls.__auto_refresh_timer is not None:
+            if bpy.app.timers.is_registered(cls.__auto_refresh_timer):
+                bpy.app.timers.unregister(cls.__auto_refresh_timer)
+            cls.__auto_refresh_timer = None
+        cls.__uv_changed = False
+
+    @classmethod
+    def is_auto_refresh_registered(cls):
+        timer = cls.__auto_refresh_timer
+        return timer is not None and bpy.app.timers.is_registered(timer)
+
     @classmethod
     def is_running(cls, _):
         return 1 if cls.__handle else 0
@@ -239,35 +447,27 @@ class MUV_OT_UVInspection_Render(bpy.types.Operator):
         bgl.glEnable(bgl.GL_BLEND)
         bgl.glEnable(bgl.GL_DEPTH_TEST)
 
+        layers = []
         # Render faces whose UV is overlapped.
         if sc.muv_uv_inspection_show_overlapped:
-            color = prefs.uv_inspection_overlapped_color_for_v3d
-            for obj, findices in props.overlapped_info_for_v3d.items():
-                world_mat = obj.matrix_world
-                bm = bmesh.from_edit_mesh(obj.data)
-
-                for fidx in findices:
-                    bgl.glBegin(bgl.GL_TRIANGLE_FAN)
-                    bgl.glColor4f(color[0], color[1], color[2], color[3])
-                    for l in bm.faces[fidx].loops:
-                        co = compat.matmul(world_mat, l.vert.co)
-                        bgl.glVertex3f(co[0], co[1], co[2])
-                    bgl.glEnd()
-
+            layers.append(("overlapped_v3d",
+                           props.overlapped_draw_data_for_v3d,
+                           prefs.uv_inspection_overlapped_color_for_v3d))
         # Render faces whose UV is flipped.
         if sc.muv_uv_inspection_show_flipped:
-            color = prefs.uv_inspection_flipped_color_for_v3d
-            for obj, findices in props.filpped_info_for_v3d.items():
-                world_mat = obj.matrix_world
-                bm = bmesh.from_edit_mesh(obj.data)
-
-                for fidx in findices:
-                    bgl.glBegin(bgl.GL_TRIANGLE_FAN)
-                    bgl.glColor4f(color[0], color[1], color[2], color[3])
-                    for l in bm.faces[fidx].loops:
-                        co = compat.matmul(world_mat, l.vert.co)
-                        bgl.glVertex3f(co[0], co[1], co[2])
-                    bgl.glEnd()
+            layers.append(("flipped_v3d",
+                           props.flipped_draw_data_for_v3d,
+                           prefs.uv_inspection_flipped_color_for_v3d))
+
+        for kind, draw_data, color in layers:
+            for obj, data in draw_data.items():
+                try:
+                    world_mat = obj.matrix_world
+                except ReferenceError:
+                    # The object was removed after the inspection.
+                    continue
+                _draw_triangles(props, (kind, obj), data, color, world_mat,
+                                3)
 
         bgl.glDisable(bgl.GL_DEPTH_TEST)
         bgl.glDisable(bgl.GL_BLEND)
@@ -282,52 +482,31 @@ class MUV_OT_UVInspection_Render(bpy.types.Operator):
         if not MUV_OT_UVInspection_Render.is_running(context):
             return
 
+        matrix = _get_uv_to_region_matrix(context.region)
+        if matrix is None:
+            return
+
         # OpenGL configuration
         bgl.glEnable(bgl.GL_BLEND)
 
+        mode = sc.muv_uv_inspection_show_mode
+        layers = []
         # render overlapped UV
         if sc.muv_uv_inspection_show_overlapped:
-            color = prefs.uv_inspection_overlapped_color
-            for info in props.overlapped_info:
-                if sc.muv_uv_inspection_show_mode == 'PART':
-                    for poly in info["polygons"]:
-                        bgl.glBegin(bgl.GL_TRIANGLE_FAN)
-                        bgl.glColor4f(color[0], color[1], color[2], color[3])
-                        for uv in poly:
-                            x, y = context.region.view2d.view_to_region(
-                                uv.x, uv.y, clip=False)
-                            bgl.glVertex2f(x, y)
-                        bgl.glEnd()
-                elif sc.muv_uv_inspection_show_mode == 'FACE':
-                    bgl.glBegin(bgl.GL_TRIANGLE_FAN)
-                    bgl.glColor4f(color[0], color[1], color[2], color[3])
-                    for uv in info["subject_uvs"]:
-                        x, y = context.region.view2d.view_to_region(
-                            uv.x, uv.y, clip=False)
-                        bgl.glVertex2f(x, y)
-                    bgl.glEnd()
-
+            layers.append(("overlapped", props.overlapped_info, "subject_uvs",
+                           prefs.uv_inspection_overlapped_color))
         # render flipped UV
         if sc.muv_uv_inspection_show_flipped:
-            color = prefs.uv_inspection_flipped_color
-            for info in props.flipped_info:
-                if sc.muv_uv_inspection_show_mode == 'PART':
-                    for poly in info["polygons"]:
-                        bgl.glBegin(bgl.GL_TRIANGLE_FAN)
-                        bgl.glColor4f(color[0], color[1], color[2], color[3])
-                        for uv in poly:
-                            x, y = context.region.view2d.view_to_region(
-                                uv.x, uv.y, clip=False)
-                            bgl.glVertex2f(x, y)
-                        bgl.glEnd()
-                elif sc.muv_uv_inspection_show_mode == 'FACE':
-                    bgl.glBegin(bgl.GL_TRIANGLE_FAN)
-                    bgl.glColor4f(color[0], color[1], color[2], color[3])
-                    for uv in info["uvs"]:
-                        x, y = context.region.view2d.view_to_region(
-                            uv.x, uv.y, clip=False)
-                        bgl.glVertex2f(x, y)
-                    bgl.glEnd()
+            layers.append(("flipped", props.flipped_info, "uvs",
+                           prefs.uv_inspection_flipped_color))
+
+        for kind, info_list, face_uvs_key, color in layers:
+            key = (kind, mode)
+            if key not in props.uv_draw_data:
+                props.uv_draw_data[key] = _triangulate_polygons(
+                    _get_uv_polygons(info_list, mode, face_uvs_key))
+            _draw_triangles(props, key, props.uv_draw_data[key], color,
+                            matrix, 2)
 
         bgl.glDisable(bgl.GL_BLEND)
 
@@ -335,8 +514,11 @@ class MUV_OT_UVInspection_Render(bpy.types.Operator):
         if not MUV_OT_UVInspection_Render.is_running(context):
             _update_uvinsp_info(context)
             MUV_OT_UVInspection_Render.handle_add(self, context)
+            if context.scene.muv_uv_inspection_auto_refresh:
+                MUV_OT_UVInspection_Render.auto_refresh_add()
         else:
             MUV_OT_UVInspection_Render.handle_remove()
+            MUV_OT_UVInspection_Render.auto_refresh_remove()
 
         if context.area:
             context.area.tag_redraw()
@@ -374,16 +556,36 @@ class MUV_OT_UVInspection_Update(bpy.types.Operator):
 
 
 @BlClassRegistry()
+@compat.make_annotations
 class MUV_OT_UVInspection_PaintUVIsland(bpy.types.Operator):
     """
-    Operation class: Paint UV island with random color.
+    Operation class: Paint UV island with unique color.
     """
 
     bl_idname = "uv.muv_uv_inspection_paint_uv_island"
     bl_label = "Paint UV Island"
-    bl_description = "Paint UV island with random color"
+    bl_description = "Paint UV island with unique color"
     bl_options = {'REGISTER', 'UNDO'}
 
+    method = EnumProperty(
+        name="Method",
+        description="Method to paint UV islands",
+        items=[
+            ('RASTERIZE', "Rasterize",
+             "Rasterize UV islands to the image directly"),
+            ('TEXTURE_PAINT', "Texture Paint",
+             "Paint UV islands one by one with Fill brush"),
+        ],
+        default='RASTERIZE'
+    )
+    export_id_mask = BoolProperty(
+        name="Export ID Mask",
+        description="Store colors of UV islands to the color attribute "
+                    "\"{}\" as ID mask for bake tools"
+                    .format(ID_MASK_LAYER_NAME),
+        default=False
+    )
+
     @classmethod
     def poll(cls, context):
         # we can not get area/space/region from console
@@ -417,21 +619,60 @@ class MUV_OT_UVInspection_PaintUVIsland(bpy.types.Operator):
                                     'area': area, 'region': region}
         return None
 
-    def _create_unique_color(self, exist_colors, allowable=0.1):
-        retry = 0
-        while retry < 20:
-            r = random.random()
-            g = random.random()
-            b = random.random()
-            new_color = [r, g, b]
-            for color in exist_colors:
-                if ((fabs(new_color[0] - color[0]) < allowable) and
-                        (fabs(new_color[1] - color[1]) < allowable) and
-                        (fabs(new_color[2] - color[2]) < allowable)):
-                    break
-            else:
-                return new_color
-        return None
+    def _export_id_mask(self, obj, color_to_faces):
+        bm = bmesh.from_edit_mesh(obj.data)
+        bm.faces.ensure_lookup_table()
+        layer = bm.loops.layers.color.get(ID_MASK_LAYER_NAME)
+        if layer is None:
+            layer = bm.loops.layers.color.new(ID_MASK_LAYER_NAME)
+        for color, indices in color_to_faces:
+            if compat.check_version(2, 80, 0) >= 0:
+                color = color + [1.0]
+            for fidx in indices:
+                for l in bm.faces[fidx].loops:
+                    l[layer] = color
+        bmesh.update_edit_mesh(obj.data)
+
+    def _rasterize_islands(self, context, obj, image, color_to_faces):
+        user_prefs = compat.get_user_preferences(context)
+        prefs = user_prefs.addons["magic_uv"].preferences
+
+        bm = bmesh.from_edit_mesh(obj.data)
+        uv_layer = bm.loops.layers.uv.verify()
+        arrays = common.MeshArrays(obj, bm, uv_layer, with_triangles=True)
+
+        # Triangles are rasterized with the index of the island as ID, so
+        # that the overlapped pixels are painted by the later island as
+        # same as painting islands one by one.
+        face_islands = np.full(arrays.num_faces, -1, dtype=np.int32)
+        for isl_idx, (_, indices) in enumerate(color_to_faces):
+            face_islands[indices] = isl_idx
+        tri_islands = face_islands[arrays.tri_faces]
+        tri_mask = tri_islands >= 0
+
+        width, height = image.size
+        tris = arrays.uvs[arrays.tri_loops[tri_mask]] * (width, height)
+        ids = common.rasterize_triangles(
+            tris, tri_islands[tri_mask], width, height,
+            num_workers=prefs.uv_inspection_num_workers)
+
+        # foreach_get/foreach_set of Image.pixels requires 2.83 or later.
+        if compat.check_version(2, 83, 0) >= 0:
+            pixels = np.empty(width * height * 4, dtype=np.float32)
+            image.pixels.foreach_get(pixels)
+        else:
+            pixels = np.array(image.pixels[:], dtype=np.float32)
+        pixels = pixels.reshape(height, width, 4)
+        colors = np.array([list(color) + [1.0]
+                           for color, _ in color_to_faces],
+                          dtype=np.float32).reshape(-1, 4)
+        painted = ids >= 0
+        pixels[painted] = colors[ids[painted]]
+        if compat.check_version(2, 83, 0) >= 0:
+            image.pixels.foreach_set(pixels.ravel())
+        else:
+            image.pixels[:] = pixels.ravel().tolist()
+        image.update()
 
     def execute(self, context):
         selected_objs_orig = [o for o in bpy.data.objects
@@ -440,10 +681,13 @@ class MUV_OT_UVInspection_PaintUVIsland(bpy.types.Operator):
 
         objs = common.get_uv_editable_objects(context)
         mode_orig = context.object.mode
-        override_context = self._get_override_context(context)
-        if override_context is None:
-            self.report({'WARNING'}, "More than one 'VIEW_3D' area must exist")
-            return {'CANCELLED'}
+        override_context = None
+        if self.method == 'TEXTURE_PAINT':
+            override_context = self._get_override_context(context)
+            if override_context is None:
+                self.report({'WARNING'},
+                            "More than one 'VIEW_3D' area must exist")
+                return {'CANCELLED'}
 
         for i, obj in enumerate(objs):
             # Select/Active only one object to paint.
@@ -520,23 +764,27 @@ class MUV_OT_UVInspection_PaintUVIsland(bpy.types.Operator):
             # Update active image in Image Editor.
             _, _, space = common.get_space(
                 'IMAGE_EDITOR', 'WINDOW', 'IMAGE_EDITOR')
-            if space is None:
+            if space is not None:
+                space.image = target_image
+            elif self.method == 'TEXTURE_PAINT':
                 return {'CANCELLED'}
-            space.image = target_image
 
             # Analyze island to make map between face and paint color.
-            islands = common.get_island_info_from_bmesh(bm)
+            islands = common.get_island_info(obj)
+            colors = common.create_unique_colors(len(islands))
             color_to_faces = []
-            for isl in islands:
-                color = self._create_unique_color(
-                    [c[0] for c in color_to_faces])
-                if color is None:
-                    self.report({'WARNING'},
-                                "Failed to create color. Please try again")
-                    return {'CANCELLED'}
+            for isl, color in zip(islands, colors):
                 indices = [f["face"].index for f in isl["faces"]]
                 color_to_faces.append((color, indices))
 
+            if self.export_id_mask:
+                self._export_id_mask(obj, color_to_faces)
+
+            if self.method == 'RASTERIZE':
+                self._rasterize_islands(
+                    context, obj, target_image, color_to_faces)
+                continue
+
             for cf in color_to_faces:
                 # Update selection information.
                 bpy.ops.object.mode_set(mode='EDIT')
@@ -11,9 +11,11 @@ from math import pi, cos, tan, sin
 
 import bpy
 import bmesh
+import numpy as np
 from mathutils import Vector
 from bpy_extras import view3d_utils
 from mathutils.bvhtree import BVHTree
+from mathutils.kdtree import KDTree
 from mathutils.geometry import barycentric_transform
 from bpy.props import (
     BoolProperty,
@@ -30,6 +32,8 @@ from ..utils import compatibility as compat
 
 if compat.check_version(2, 80, 0) >= 0:
     from ..lib import bglx as bgl
+    from ..lib.batch_renderer import BatchRenderer
+    import gpu
 else:
     import bgl
 
@@ -147,18 +151,73 @@ class _Properties:
         del scene.muv_uv_sculpt_relax_method
 
 
-def location_3d_to_region_2d_extra(region, rv3d, coord):
-    coord_2d = view3d_utils.location_3d_to_region_2d(region, rv3d, coord)
-    if coord_2d is None:
-        prj = rv3d.perspective_matrix @ Vector(
-            (coord[0], coord[1], coord[2], 1.0))
-        width_half = region.width / 2.0
-        height_half = region.height / 2.0
-        coord_2d = Vector((
-            width_half + width_half * (prj.x / prj.w),
-            height_half + height_half * (prj.y / prj.w)
-        ))
-    return coord_2d
+def _project_to_region(region, rv3d, world_mat, coords):
+    """
+    Project the coordinates in object space to the region in bulk.
+    Unlike view3d_utils.location_3d_to_region_2d, the coordinates behind
+    the viewpoint are also projected instead of returning None.
+    """
+
+    mat = np.dot(np.array(rv3d.perspective_matrix), np.array(world_mat))
+    prj = np.dot(coords, mat[:, :3].T) + mat[:, 3]
+    half = np.array([region.width / 2.0, region.height / 2.0])
+    return half + half * prj[:, 0:2] / prj[:, 3:4]
+
+
+def _get_view_key(region, rv3d, world_mat):
+    return (region.width, region.height,
+            tuple(tuple(r) for r in rv3d.perspective_matrix),
+            tuple(tuple(r) for r in world_mat))
+
+
+class _LoopKDTree:
+    """
+    KD-tree of the vertices of selected faces projected to the region.
+
+    UV Sculpt does not move vertices, so the tree is built once per stroke
+    and rebuilt only when the view or the object is changed (see key).
+    """
+
+    def __init__(self, bm, region, rv3d, world_mat):
+        self.key = _get_view_key(region, rv3d, world_mat)
+
+        arrays = common.MeshArrays(None, bm)
+        loop_faces = arrays.loop_faces()
+        loop_mask = arrays.face_select[loop_faces]
+        local_loops = np.arange(arrays.num_loops) - \
+            arrays.face_offsets[loop_faces]
+
+        # Loops are grouped by vertex, so that loops of i-th vertex in the
+        # tree are placed in the range [starts[i], starts[i + 1]).
+        verts = arrays.loop_verts[loop_mask]
+        order = np.argsort(verts, kind='mergesort')
+        self.__faces = loop_faces[loop_mask][order].tolist()
+        self.__loops = local_loops[loop_mask][order].tolist()
+        uniq_verts, starts = np.unique(verts[order], return_index=True)
+        self.__starts = starts.tolist() + [len(order)]
+
+        self.__cos_2d = _project_to_region(
+            region, rv3d, world_mat, arrays.vert_cos[uniq_verts]).tolist()
+        self.__kdtree = KDTree(len(self.__cos_2d))
+        for i, (x, y) in enumerate(self.__cos_2d):
+            self.__kdtree.insert((x, y, 0.0), i)
+        self.__kdtree.balance()
+
+    def find_range(self, co, radius):
+        """
+        Return (face index, loop index in face, location, distance) of the
+        loops whose location is closer than radius from co.
+        """
+
+        result = []
+        for _, i, dist in self.__kdtree.find_range((co.x, co.y, 0.0),
+                                                   radius):
+            if dist >= radius:
+                continue
+            loc = Vector(self.__cos_2d[i])
+            for j in range(self.__starts[i], self.__starts[i + 1]):
+                result.append((self.__faces[j], self.__loops[j], loc, dist))
+        return result
 
 
 @BlClassRegistry()
@@ -174,6 +233,8 @@ class MUV_OT_UVSculpt(bpy.types.Operator):
 
     __handle = None
     __timer = None
+    __brush_renderer = None
+    __brush_key = None
 
     @classmethod
     def poll(cls, context):
@@ -203,42 +264,78 @@ class MUV_OT_UVSculpt(bpy.types.Operator):
             sv = bpy.types.SpaceView3D
             sv.draw_handler_remove(cls.__handle, "WINDOW")
             cls.__handle = None
+            cls.__brush_renderer = None
+            cls.__brush_key = None
         if cls.__timer:
             context.window_manager.event_timer_remove(cls.__timer)
             cls.__timer = None
 
     @classmethod
-    def draw_brush(cls, obj, context):
-        sc = context.scene
-        user_prefs = compat.get_user_preferences(context)
-        prefs = user_prefs.addons["magic_uv"].preferences
-
+    def __get_brush_verts(cls, radius):
         num_segment = 180
         theta = 2 * pi / num_segment
         fact_t = tan(theta)
         fact_r = cos(theta)
-        color = prefs.uv_sculpt_brush_color
 
-        bgl.glBegin(bgl.GL_LINE_STRIP)
-        bgl.glColor4f(color[0], color[1], color[2], color[3])
-        x = sc.muv_uv_sculpt_radius * cos(0.0)
-        y = sc.muv_uv_sculpt_radius * sin(0.0)
+        verts = []
+        x = radius * cos(0.0)
+        y = radius * sin(0.0)
         for _ in range(num_segment):
-            bgl.glVertex2f(x + obj.current_mco.x, y + obj.current_mco.y)
+            verts.append([x, y])
             tx = -y
             ty = x
             x = x + tx * fact_t
             y = y + ty * fact_t
             x = x * fact_r
             y = y * fact_r
+
+        return verts
+
+    @classmethod
+    def draw_brush(cls, obj, context):
+        sc = context.scene
+        user_prefs = compat.get_user_preferences(context)
+        prefs = user_prefs.addons["magic_uv"].preferences
+
+        color = prefs.uv_sculpt_brush_color
+
+        if compat.check_version(2, 80, 0) >= 0:
+            # The brush shape is built around the origin only when the radius
+            # or color is changed, and it is moved to the mouse position.
+            key = (sc.muv_uv_sculpt_radius, tuple(color))
+            if cls.__brush_renderer is None or cls.__brush_key != key:
+                cls.__brush_renderer = BatchRenderer()
+                cls.__brush_renderer.add_line_strip(
+                    cls.__get_brush_verts(sc.muv_uv_sculpt_radius),
+                    tuple(color))
+                cls.__brush_key = key
+            gpu.matrix.push()
+            gpu.matrix.translate(obj.current_mco)
+            cls.__brush_renderer.draw()
+            gpu.matrix.pop()
+            return
+
+        bgl.glBegin(bgl.GL_LINE_STRIP)
+        bgl.glColor4f(color[0], color[1], color[2], color[3])
+        for x, y in cls.__get_brush_verts(sc.muv_uv_sculpt_radius):
+            bgl.glVertex2f(x + obj.current_mco.x, y + obj.current_mco.y)
         bgl.glEnd()
 
     def __init__(self):
         self.__loop_info = {}       # { Object: loop_info }
+        self.__loop_kdtrees = {}    # { Object: _LoopKDTree }
         self.__stroking = False
         self.current_mco = Vector((0.0, 0.0))
         self.__initial_mco = Vector((0.0, 0.0))
 
+    def __get_loop_kdtree(self, obj, bm, region, rv3d):
+        kdtree = self.__loop_kdtrees.get(obj)
+        if kdtree is None or \
+                kdtree.key != _get_view_key(region, rv3d, obj.matrix_world):
+            kdtree = _LoopKDTree(bm, region, rv3d, obj.matrix_world)
+            self.__loop_kdtrees[obj] = kdtree
+        return kdtree
+
     def __stroke_init(self, context, _):
         sc = context.scene
 
@@ -248,33 +345,29 @@ class MUV_OT_UVSculpt(bpy.types.Operator):
 
         # get influenced UV
         self.__loop_info = {}
+        self.__loop_kdtrees = {}
         for obj in objs:
-            world_mat = obj.matrix_world
             bm = bmesh.from_edit_mesh(obj.data)
+            bm.faces.ensure_lookup_table()
             uv_layer = bm.loops.layers.uv.verify()
             _, region, space = common.get_space('VIEW_3D', 'WINDOW', 'VIEW_3D')
+            kdtree = self.__get_loop_kdtree(obj, bm, region, space.region_3d)
 
             self.__loop_info[obj] = []
-            for f in bm.faces:
-                if not f.select:
-                    continue
-                for i, l in enumerate(f.loops):
-                    loc_2d = location_3d_to_region_2d_extra(
-                        region, space.region_3d,
-                        compat.matmul(world_mat, l.vert.co))
-                    diff = loc_2d - self.__initial_mco
-                    if diff.length < sc.muv_uv_sculpt_radius:
-                        info = {
-                            "face_idx": f.index,
-                            "loop_idx": i,
-                            "initial_vco": l.vert.co.copy(),
-                            "initial_vco_2d": loc_2d,
-                            "initial_uv": l[uv_layer].uv.copy(),
-                            "strength": _get_strength(
-                                diff.length, sc.muv_uv_sculpt_radius,
-                                sc.muv_uv_sculpt_strength)
-                        }
-                        self.__loop_info[obj].append(info)
+            for fidx, lidx, loc_2d, dist in kdtree.find_range(
+                    self.__initial_mco, sc.muv_uv_sculpt_radius):
+                l = bm.faces[fidx].loops[lidx]
+                info = {
+                    "face_idx": fidx,
+                    "loop_idx": lidx,
+                    "initial_vco": l.vert.co.copy(),
+                    "initial_vco_2d": loc_2d,
+                    "initial_uv": l[uv_layer].uv.copy(),
+                    "strength": _get_strength(
+                        dist, sc.muv_uv_sculpt_radius,
+                        sc.muv_uv_sculpt_strength)
+                }
+                self.__loop_info[obj].append(info)
 
     def __stroke_apply(self, context, _):
         sc = context.scene
@@ -283,6 +376,7 @@ class MUV_OT_UVSculpt(bpy.types.Operator):
         for obj in objs:
             world_mat = obj.matrix_world
             bm = bmesh.from_edit_mesh(obj.data)
+            bm.faces.ensure_lookup_table()
             uv_layer = bm.loops.layers.uv.verify()
             mco = self.current_mco
 
@@ -295,27 +389,23 @@ class MUV_OT_UVSculpt(bpy.types.Operator):
             elif sc.muv_uv_sculpt_tools == 'PINCH':
                 _, region, space = common.get_space(
                     'VIEW_3D', 'WINDOW', 'VIEW_3D')
+                kdtree = self.__get_loop_kdtree(
+                    obj, bm, region, space.region_3d)
                 loop_info = []
-                for f in bm.faces:
-                    if not f.select:
-                        continue
-                    for i, l in enumerate(f.loops):
-                        loc_2d = location_3d_to_region_2d_extra(
-                            region, space.region_3d,
-                            compat.matmul(world_mat, l.vert.co))
-                        diff = loc_2d - self.__initial_mco
-                        if diff.length < sc.muv_uv_sculpt_radius:
-                            info = {
-                                "face_idx": f.index,
-                                "loop_idx": i,
-                                "initial_vco": l.vert.co.copy(),
-                                "initial_vco_2d": loc_2d,
-                                "initial_uv": l[uv_layer].uv.copy(),
-                                "strength": _get_strength(
-                                    diff.length, sc.muv_uv_sculpt_radius,
-                                    sc.muv_uv_sculpt_strength)
-                            }
-                            loop_info.append(info)
+                for fidx, lidx, loc_2d, dist in kdtree.find_range(
+                        self.__initial_mco, sc.muv_uv_sculpt_radius):
+                    l = bm.faces[fidx].loops[lidx]
+                    info = {
+                        "face_idx": fidx,
+                        "loop_idx": lidx,
+                        "initial_vco": l.vert.co.copy(),
+                        "initial_vco_2d": loc_2d,
+                        "initial_uv": l[uv_layer].uv.copy(),
+                        "strength": _get_strength(
+                            dist, sc.muv_uv_sculpt_radius,
+                            sc.muv_uv_sculpt_strength)
+                    }
+                    loop_info.append(info)
 
                 # mouse coordinate to UV coordinate
                 ray_vec = view3d_utils.region_2d_to_vector_3d(
@@ -391,34 +481,29 @@ class MUV_OT_UVSculpt(bpy.types.Operator):
                         d["uv_sum_b"] = d["uv_sum_b"] + dn["uv_b"] + dp["uv_b"]
 
                 # apply
-                for f in bm.faces:
-                    if not f.select:
+                kdtree = self.__get_loop_kdtree(
+                    obj, bm, region, space.region_3d)
+                for fidx, lidx, _, dist in kdtree.find_range(
+                        self.__initial_mco, sc.muv_uv_sculpt_radius):
+                    l = bm.faces[fidx].loops[lidx]
+                    db = vert_db[l.vert]
+                    strength = _get_strength(dist,
+                                             sc.muv_uv_sculpt_radius,
+                                             sc.muv_uv_sculpt_strength)
+
+                    base = (1.0 - strength) * l[uv_layer].uv
+                    if sc.muv_uv_sculpt_relax_method == 'HC':
+                        t = 0.5 * \
+                            (db["uv_b"] + db["uv_sum_b"] / d["uv_count"])
+                        diff = strength * (db["uv_p"] - t)
+                        target_uv = base + diff
+                    elif sc.muv_uv_sculpt_relax_method == 'LAPLACIAN':
+                        diff = strength * db["uv_p"]
+                        target_uv = base + diff
+                    else:
                         continue
-                    for i, l in enumerate(f.loops):
-                        loc_2d = location_3d_to_region_2d_extra(
-                            region, space.region_3d,
-                            compat.matmul(world_mat, l.vert.co))
-                        diff = loc_2d - self.__initial_mco
-                        if diff.length >= sc.muv_uv_sculpt_radius:
-                            continue
-                        db = vert_db[l.vert]
-                        strength = _get_strength(diff.length,
-                                                 sc.muv_uv_sculpt_radius,
-                                                 sc.muv_uv_sculpt_strength)
-
-                        base = (1.0 - strength) * l[uv_layer].uv
-                        if sc.muv_uv_sculpt_relax_method == 'HC':
-                            t = 0.5 * \
-                                (db["uv_b"] + db["uv_sum_b"] / d["uv_count"])
-                            diff = strength * (db["uv_p"] - t)
-                            target_uv = base + diff
-                        elif sc.muv_uv_sculpt_relax_method == 'LAPLACIAN':
-                            diff = strength * db["uv_p"]
-                            target_uv = base + diff
-                        else:
-                            continue
 
-                        l[uv_layer].uv = target_uv
+                    l[uv_layer].uv = target_uv
 
             bmesh.update_edit_mesh(obj.data)
 
@@ -439,6 +524,8 @@ class MUV_OT_UVSculpt(bpy.types.Operator):
 
             bmesh.update_edit_mesh(obj.data)
 
+        self.__loop_kdtrees = {}
+
     def modal(self, context, event):
         if context.area:
             context.area.tag_redraw()
@@ -18,6 +18,7 @@ from bpy.props import (
     EnumProperty
 )
 from mathutils import Vector
+import numpy as np
 
 from .. import common
 from ..utils.bl_class_registry import BlClassRegistry
@@ -55,9 +56,47 @@ def _get_uv_layer(ops_obj, bm, assign_uvmap):
     return uv_layer
 
 
-def _apply_box_map(bm, uv_layer, size, offset, rotation,
-                   tex_aspect, force_axis, force_axis_tex_aspect_correction,
-                   force_axis_rotation):
+def _project_to_x_plane(y, z, ofy, ofz, r, aspect, positive):
+    if positive:
+        u = (y - ofy) * cos(r) + (z - ofz) * sin(r)
+        v = -(y * aspect - ofy) * sin(r) + (z * aspect - ofz) * cos(r)
+    else:
+        u = -(y - ofy) * cos(r) + (z - ofz) * sin(r)
+        v = (y * aspect - ofy) * sin(r) + (z * aspect - ofz) * cos(r)
+    return u, v
+
+
+def _project_to_y_plane(x, z, ofx, ofz, r, aspect, positive):
+    if positive:
+        u = -(x - ofx) * cos(r) + (z - ofz) * sin(r)
+        v = (x * aspect - ofx) * sin(r) + (z * aspect - ofz) * cos(r)
+    else:
+        u = (x - ofx) * cos(r) + (z - ofz) * sin(r)
+        v = -(x * aspect - ofx) * sin(r) + (z * aspect - ofz) * cos(r)
+    return u, v
+
+
+def _project_to_z_plane(x, y, ofx, ofy, r, aspect, positive):
+    if positive:
+        u = (x - ofx) * cos(r) + (y - ofy) * sin(r)
+        v = -(x * aspect - ofx) * sin(r) + (y * aspect - ofy) * cos(r)
+    else:
+        u = -(x - ofx) * cos(r) - (y + ofy) * sin(r)
+        v = -(x * aspect + ofx) * sin(r) + (y * aspect - ofy) * cos(r)
+    return u, v
+
+
+def _calc_box_map_uvs(coords, normals, size, offset, rotation, tex_aspect,
+                      force_axis, force_axis_tex_aspect_correction,
+                      force_axis_rotation):
+    """
+    Calculate UV coordinates by box mapping.
+    coords: (N, 3) array of coordinates
+    normals: (N, 3) array of the normal of the face which has the coordinate
+    Return (N, 2) array of UV coordinates and the mask of the coordinates
+    which are mapped.
+    """
+
     scale = 1.0 / size
 
     sx = 1.0 * scale
@@ -74,128 +113,103 @@ def _apply_box_map(bm, uv_layer, size, offset, rotation,
     fary = force_axis_rotation[1] * pi / 180.0
     farz = force_axis_rotation[2] * pi / 180.0
 
-    sel_faces = [f for f in bm.faces if f.select]
+    x = coords[:, 0] * sx
+    y = coords[:, 1] * sy
+    z = coords[:, 2] * sz
+    n = normals
+    a0, a1, a2 = np.abs(normals).T
+
+    # Classify the coordinates by the plane to be projected.
+    # [(axis, mask, rotation, aspect)]
+    planes = []
+    forced_aspect = tex_aspect * force_axis_tex_aspect_correction
+    if force_axis == 'X':
+        mask_y = (a1 < a0) & (a1 >= a2)
+        mask_z = ~mask_y & (a2 < a0) & (a2 >= a1)
+        planes.append((1, mask_y, fary, forced_aspect))
+        planes.append((2, mask_z, farz, forced_aspect))
+    elif force_axis == 'Y':
+        mask_x = (a0 < a1) & (a0 >= a2)
+        mask_z = ~mask_x & (a2 >= a0) & (a2 < a1)
+        planes.append((0, mask_x, farx, forced_aspect))
+        planes.append((2, mask_z, farz, forced_aspect))
+    elif force_axis == 'Z':
+        mask_x = (a0 >= a1) & (a0 < a2)
+        mask_y = ~mask_x & (a1 >= a0) & (a1 < a2)
+        planes.append((0, mask_x, farx, forced_aspect))
+        planes.append((1, mask_y, fary, forced_aspect))
+    rest = np.ones(len(coords), dtype=bool)
+    for _, mask, _, _ in planes:
+        rest &= ~mask
+    mask_x = rest & (a0 >= a1) & (a0 >= a2)
+    mask_y = rest & ~mask_x & (a1 >= a0) & (a1 >= a2)
+    mask_z = rest & ~mask_x & ~mask_y & (a2 >= a0) & (a2 >= a1)
+    planes.append((0, mask_x, rx, tex_aspect))
+    planes.append((1, mask_y, ry, tex_aspect))
+    planes.append((2, mask_z, rz, tex_aspect))
+
+    uvs = np.zeros((len(coords), 2), dtype=np.float64)
+    mapped = np.zeros(len(coords), dtype=bool)
+    for axis, mask, r, aspect in planes:
+        for positive in (True, False):
+            if positive:
+                m = mask & (n[:, axis] >= 0.0)
+            else:
+                m = mask & ~(n[:, axis] >= 0.0)
+            if not m.any():
+                continue
+            if axis == 0:
+                u, v = _project_to_x_plane(y[m], z[m], ofy, ofz, r, aspect,
+                                           positive)
+            elif axis == 1:
+                u, v = _project_to_y_plane(x[m], z[m], ofx, ofz, r, aspect,
+                                           positive)
+            else:
+                u, v = _project_to_z_plane(x[m], y[m], ofx, ofy, r, aspect,
+                                           positive)
+            uvs[m, 0] = u
+            uvs[m, 1] = v
+            mapped |= m
+
+    return uvs, mapped
+
+
+def _apply_box_map(bm, uv_layer, size, offset, rotation,
+                   tex_aspect, force_axis, force_axis_tex_aspect_correction,
+                   force_axis_rotation):
+    arrays = common.MeshArrays(None, bm, uv_layer)
+    if common.check_version(2, 73, 0) >= 0:
+        bm.faces.ensure_lookup_table()
+    face_normals = np.array([f.normal[:] for f in bm.faces],
+                            dtype=np.float64).reshape(-1, 3)
+    normals = np.repeat(face_normals, arrays.loop_totals, axis=0)
+
+    uvs, mapped = _calc_box_map_uvs(
+        arrays.loop_vert_cos, normals, size, offset, rotation, tex_aspect,
+        force_axis, force_axis_tex_aspect_correction, force_axis_rotation)
 
     # update UV coordinate
-    for f in sel_faces:
-        n = f.normal
-        for l in f.loops:
-            co = l.vert.co
-            x = co.x * sx
-            y = co.y * sy
-            z = co.z * sz
-            aspect = tex_aspect
-
-            transformed = False
-            if force_axis == 'X':
-                # Use Y-plane
-                if abs(n[1]) < abs(n[0]) and abs(n[1]) >= abs(n[2]):
-                    aspect *= force_axis_tex_aspect_correction
-                    if n[1] >= 0.0:
-                        u = -(x - ofx) * cos(fary) + (z - ofz) * sin(fary)
-                        v = (x * aspect - ofx) * sin(fary) + \
-                            (z * aspect - ofz) * cos(fary)
-                    else:
-                        u = (x - ofx) * cos(fary) + (z - ofz) * sin(fary)
-                        v = -(x * aspect - ofx) * sin(fary) + \
-                            (z * aspect - ofz) * cos(fary)
-                    transformed = True
-                # Use Z-plane
-                elif abs(n[2]) < abs(n[0]) and abs(n[2]) >= abs(n[1]):
-                    aspect *= force_axis_tex_aspect_correction
-                    if n[2] >= 0.0:
-                        u = (x - ofx) * cos(farz) + (y - ofy) * sin(farz)
-                        v = -(x * aspect - ofx) * sin(farz) + \
-                            (y * aspect - ofy) * cos(farz)
-                    else:
-                        u = -(x - ofx) * cos(farz) - (y + ofy) * sin(farz)
-                        v = -(x * aspect + ofx) * sin(farz) + \
-                            (y * aspect - ofy) * cos(farz)
-                    transformed = True
-            elif force_axis == 'Y':
-                # Use X-plane
-                if abs(n[0]) < abs(n[1]) and abs(n[0]) >= abs(n[2]):
-                    aspect *= force_axis_tex_aspect_correction
-                    if n[0] >= 0.0:
-                        u = (y - ofy) * cos(farx) + (z - ofz) * sin(farx)
-                        v = -(y * aspect - ofy) * sin(farx) + \
-                            (z * aspect - ofz) * cos(farx)
-                    else:
-                        u = -(y - ofy) * cos(farx) + (z - ofz) * sin(farx)
-                        v = (y * aspect - ofy) * sin(farx) + \
-                            (z * aspect - ofz) * cos(farx)
-                    transformed = True
-                # Use Z-plane
-                elif abs(n[2]) >= abs(n[0]) and abs(n[2]) < abs(n[1]):
-                    aspect *= force_axis_tex_aspect_correction
-                    if n[2] >= 0.0:
-                        u = (x - ofx) * cos(farz) + (y - ofy) * sin(farz)
-                        v = -(x * aspect - ofx) * sin(farz) + \
-                            (y * aspect - ofy) * cos(farz)
-                    else:
-                        u = -(x - ofx) * cos(farz) - (y + ofy) * sin(farz)
-                        v = -(x * aspect + ofx) * sin(farz) + \
-                            (y * aspect - ofy) * cos(farz)
-                    transformed = True
-            elif force_axis == 'Z':
-                # Use X-plane
-                if abs(n[0]) >= abs(n[1]) and abs(n[0]) < abs(n[2]):
-                    aspect *= force_axis_tex_aspect_correction
-                    if n[0] >= 0.0:
-                        u = (y - ofy) * cos(farx) + (z - ofz) * sin(farx)
-                        v = -(y * aspect - ofy) * sin(farx) + \
-                            (z * aspect - ofz) * cos(farx)
-                    else:
-                        u = -(y - ofy) * cos(farx) + (z - ofz) * sin(farx)
-                        v = (y * aspect - ofy) * sin(farx) + \
-                            (z * aspect - ofz) * cos(farx)
-                    transformed = True
-                # Use Y-plane
-                elif abs(n[1]) >= abs(n[0]) and abs(n[1]) < abs(n[2]):
-                    aspect *= force_axis_tex_aspect_correction
-                    if n[1] >= 0.0:
-                        u = -(x - ofx) * cos(fary) + (z - ofz) * sin(fary)
-                        v = (x * aspect - ofx) * sin(fary) + \
-                            (z * aspect - ofz) * cos(fary)
-                    else:
-                        u = (x - ofx) * cos(fary) + (z - ofz) * sin(fary)
-                        v = -(x * aspect - ofx) * sin(fary) + \
-                            (z * aspect - ofz) * cos(fary)
-                    transformed = True
-
-            if not transformed:
-                # X-plane
-                if abs(n[0]) >= abs(n[1]) and abs(n[0]) >= abs(n[2]):
-                    if n[0] >= 0.0:
-                        u = (y - ofy) * cos(rx) + (z - ofz) * sin(rx)
-                        v = -(y * aspect - ofy) * sin(rx) + \
-                            (z * aspect - ofz) * cos(rx)
-                    else:
-                        u = -(y - ofy) * cos(rx) + (z - ofz) * sin(rx)
-                        v = (y * aspect - ofy) * sin(rx) + \
-                            (z * aspect - ofz) * cos(rx)
-                # Y-plane
-                elif abs(n[1]) >= abs(n[0]) and abs(n[1]) >= abs(n[2]):
-                    if n[1] >= 0.0:
-                        u = -(x - ofx) * cos(ry) + (z - ofz) * sin(ry)
-                        v = (x * aspect - ofx) * sin(ry) + \
-                            (z * aspect - ofz) * cos(ry)
-                    else:
-                        u = (x - ofx) * cos(ry) + (z - ofz) * sin(ry)
-                        v = -(x * aspect - ofx) * sin(ry) + \
-                            (z * aspect - ofz) * cos(ry)
-                # Z-plane
-                elif abs(n[2]) >= abs(n[0]) and abs(n[2]) >= abs(n[1]):
-                    if n[2] >= 0.0:
-                        u = (x - ofx) * cos(rz) + (y - ofy) * sin(rz)
-                        v = -(x * aspect - ofx) * sin(rz) + \
-                            (y * aspect - ofy) * cos(rz)
-                    else:
-                        u = -(x - ofx) * cos(rz) - (y + ofy) * sin(rz)
-                        v = -(x * aspect + ofx) * sin(rz) + \
-                            (y * aspect - ofy) * cos(rz)
-
-            l[uv_layer].uv = Vector((u, v))
+    sel_loops = arrays.face_loop_mask(arrays.face_select)
+    arrays.write_uvs(uvs, sel_loops & mapped)
+
+
+def _rotate_by_quaternion(q, coords):
+    # Rotate the coordinates in single precision by the same computation as
+    # mathutils, so that the result is identical to Quaternion @ Vector.
+    w, qx, qy, qz = [np.float32(c) for c in q]
+    r0, r1, r2 = coords.astype(np.float32).T
+
+    t0 = -qx * r0 - qy * r1 - qz * r2
+    t1 = w * r0 + qy * r2 - qz * r1
+    t2 = w * r1 + qz * r0 - qx * r2
+    r2 = w * r2 + qx * r1 - qy * r0
+    r0 = t1
+    r1 = t2
+    t1 = t0 * -qx + r0 * w - r1 * qz + r2 * qy
+    t2 = t0 * -qy + r1 * w - r2 * qx + r0 * qz
+    r2 = t0 * -qz + r2 * w - r0 * qy + r1 * qx
+
+    return np.stack([t1, t2, r2], axis=1).astype(np.float64)
 
 
 def _apply_planer_map(bm, uv_layer, size, offset, rotation, tex_aspect):
@@ -217,16 +231,16 @@ def _apply_planer_map(bm, uv_layer, size, offset, rotation, tex_aspect):
     q = n_ave.rotation_difference(Vector((0.0, 0.0, 1.0)))
 
     # update UV coordinate
-    for f in sel_faces:
-        for l in f.loops:
-            co = compat.matmul(q, l.vert.co)
-            x = co.x * sx
-            y = co.y * sy
-
-            u = x * cos(rz) - y * sin(rz) + ofx
-            v = -x * aspect * sin(rz) - y * aspect * cos(rz) + ofy
-
-            l[uv_layer].uv = Vector((u, v))
+    arrays = common.MeshArrays(None, bm, uv_layer)
+    sel_loops = arrays.face_loop_mask(arrays.face_select)
+    coords = _rotate_by_quaternion(q, arrays.loop_vert_cos[sel_loops])
+    x = coords[:, 0] * sx
+    y = coords[:, 1] * sy
+
+    uvs = arrays.uvs.copy()
+    uvs[sel_loops, 0] = x * cos(rz) - y * sin(rz) + ofx
+    uvs[sel_loops, 1] = -x * aspect * sin(rz) - y * aspect * cos(rz) + ofy
+    arrays.write_uvs(uvs, sel_loops)
 
 
 @PropertyClassRegistry()
@@ -17,13 +17,28 @@ from bpy.props import (
     BoolProperty,
 )
 import bmesh
-from mathutils import Vector
+import numpy as np
 
 from .. import common
 from ..utils.bl_class_registry import BlClassRegistry
 from ..utils.property_class_registry import PropertyClassRegistry
 from ..utils import compatibility as compat
 
+if compat.check_version(2, 80, 0) >= 0:
+    import gpu
+    from gpu_extras.batch import batch_for_shader
+if compat.check_version(3, 0, 0) < 0:
+    import bgl
+
+
+# Name of the face attribute which stores the texel density.
+TEXEL_DENSITY_LAYER_NAME = "muv_texel_density"
+
+# Percentiles of the texel density shown on the heatmap statistics.
+_HEATMAP_PERCENTILES = (5, 25, 50, 75, 95)
+_HEATMAP_NUM_BINS = 8
+_HEATMAP_ALPHA = 0.6
+
 
 def _is_valid_context_for_measure(context):
     # only 'VIEW_3D' space is allowed to execute
@@ -58,6 +73,14 @@ def _is_valid_context_for_apply(context):
     return True
 
 
+def _is_valid_context_for_heatmap(context):
+    # The heatmap is rendered by the gpu module.
+    if compat.check_version(2, 80, 0) < 0:
+        return False
+
+    return _is_valid_context_for_apply(context)
+
+
 def _measure_wsuv_info(obj, calc_method='MESH',
                        tex_selection_method='FIRST', tex_size=None,
                        only_selected=True):
@@ -81,109 +104,78 @@ def _measure_wsuv_info(obj, calc_method='MESH',
     return uv_areas, mesh_areas, densities
 
 
-def _measure_wsuv_info_from_faces(obj, bm, faces, uv_layer, tex_layer,
-                                  tex_selection_method='FIRST', tex_size=None):
-    mesh_area = common.measure_mesh_area_from_faces(bm, faces)
-    uv_area = common.measure_uv_area_from_faces(
-        obj, bm, faces, uv_layer, tex_layer, tex_selection_method, tex_size)
-
-    if not uv_area:
-        return None, mesh_area, None
-
-    if mesh_area == 0.0:
-        density = 0.0
-    else:
-        density = sqrt(uv_area) / sqrt(mesh_area)
-
-    return uv_area, mesh_area, density
-
-
-def _apply(faces, uv_layer, origin, factor):
-    # calculate origin
-    if origin == 'CENTER':
-        origin = Vector((0.0, 0.0))
-        num = 0
-        for f in faces:
-            for l in f.loops:
-                uv = l[uv_layer].uv
-                origin = origin + uv
-                num = num + 1
-        origin = origin / num
-    elif origin == 'LEFT_TOP':
-        origin = Vector((100000.0, -100000.0))
-        for f in faces:
-            for l in f.loops:
-                uv = l[uv_layer].uv
-                origin.x = min(origin.x, uv.x)
-                origin.y = max(origin.y, uv.y)
-    elif origin == 'LEFT_CENTER':
-        origin = Vector((100000.0, 0.0))
-        num = 0
-        for f in faces:
-            for l in f.loops:
-                uv = l[uv_layer].uv
-                origin.x = min(origin.x, uv.x)
-                origin.y = origin.y + uv.y
-                num = num + 1
-        origin.y = origin.y / num
-    elif origin == 'LEFT_BOTTOM':
-        origin = Vector((100000.0, 100000.0))
-        for f in faces:
-            for l in f.loops:
-                uv = l[uv_layer].uv
-                origin.x = min(origin.x, uv.x)
-                origin.y = min(origin.y, uv.y)
-    elif origin == 'CENTER_TOP':
-        origin = Vector((0.0, -100000.0))
-        num = 0
-        for f in faces:
-            for l in f.loops:
-                uv = l[uv_layer].uv
-                origin.x = origin.x + uv.x
-                origin.y = max(origin.y, uv.y)
-                num = num + 1
-        origin.x = origin.x / num
-    elif origin == 'CENTER_BOTTOM':
-        origin = Vector((0.0, 100000.0))
-        num = 0
-        for f in faces:
-            for l in f.loops:
-                uv = l[uv_layer].uv
-                origin.x = origin.x + uv.x
-                origin.y = min(origin.y, uv.y)
-                num = num + 1
-        origin.x = origin.x / num
-    elif origin == 'RIGHT_TOP':
-        origin = Vector((-100000.0, -100000.0))
-        for f in faces:
-            for l in f.loops:
-                uv = l[uv_layer].uv
-                origin.x = max(origin.x, uv.x)
-                origin.y = max(origin.y, uv.y)
-    elif origin == 'RIGHT_CENTER':
-        origin = Vector((-100000.0, 0.0))
-        num = 0
-        for f in faces:
-            for l in f.loops:
-                uv = l[uv_layer].uv
-                origin.x = max(origin.x, uv.x)
-                origin.y = origin.y + uv.y
-                num = num + 1
-        origin.y = origin.y / num
-    elif origin == 'RIGHT_BOTTOM':
-        origin = Vector((-100000.0, 100000.0))
-        for f in faces:
-            for l in f.loops:
-                uv = l[uv_layer].uv
-                origin.x = max(origin.x, uv.x)
-                origin.y = min(origin.y, uv.y)
-
-    # update UV coordinate
-    for f in faces:
-        for l in f.loops:
-            uv = l[uv_layer].uv
-            diff = uv - origin
-            l[uv_layer].uv = origin + diff * factor
+def _get_tex_selection_method(tgt_texture):
+    # Return the texture selection method and the texture size for the
+    # item of _get_target_textures().
+    if tgt_texture == "[Max]":
+        return 'MAX', None
+    if tgt_texture == "[Min]":
+        return 'MIN', None
+    if tgt_texture in bpy.data.images:
+        return 'USER_SPECIFIED', bpy.data.images[tgt_texture].size
+    # "[Average]" or the texture which was deleted.
+    return 'AVERAGE', None
+
+
+def _measure_wsuv_info_from_groups(obj, bm, uv_layer, calc_method,
+                                   only_selected, tex_selection_method='FIRST',
+                                   tex_size=None):
+    """
+    Measure all face groups of the object at once.
+    Return the table of the object used by _apply_wsuv_table() and the arrays
+    of UV areas, mesh areas and densities of the groups.  UV areas and
+    densities are None if any group has no UV area.
+    """
+
+    faces_list = common.get_faces_list(bm, calc_method, only_selected, obj)
+    bm.faces.index_update()
+    arrays = common.MeshArrays(None, bm, uv_layer, with_triangles=True)
+    face_groups = common.get_face_groups(arrays.num_faces, faces_list)
+    mesh_areas, uv_areas = common.measure_face_groups_area(
+        obj, bm, arrays, face_groups, len(faces_list), tex_selection_method,
+        tex_size)
+    table = (obj, arrays, face_groups, len(faces_list))
+
+    if uv_areas is None or not uv_areas.all():
+        return table, None, mesh_areas, None
+
+    densities = np.zeros(len(faces_list), dtype=np.float64)
+    valid = mesh_areas > 0.0
+    densities[valid] = np.sqrt(uv_areas[valid]) / np.sqrt(mesh_areas[valid])
+
+    return table, uv_areas, mesh_areas, densities
+
+
+def _calc_scaling_factors(tgt_densities, densities):
+    # The groups without mesh area are not scaled.
+    factors = np.ones(len(densities), dtype=np.float64)
+    valid = densities > 0.0
+    factors[valid] = np.broadcast_to(tgt_densities, densities.shape)[valid] \
+        / densities[valid]
+    return factors
+
+
+def _apply_wsuv_table(tables, origin, factors):
+    """
+    Scale UVs of all face groups measured by _measure_wsuv_info_from_groups().
+    factors: scaling factors of all groups in the order of tables
+    Return the list of the scaling factors of each object.
+    """
+
+    factors_list = []
+    offset = 0
+    for obj, arrays, face_groups, num_groups in tables:
+        obj_factors = factors[offset:offset + num_groups]
+        offset += num_groups
+
+        loop_groups = np.repeat(face_groups, arrays.loop_totals)
+        uvs = common.scale_uv_groups(arrays.uvs, loop_groups, num_groups,
+                                     origin, obj_factors)
+        arrays.write_uvs(uvs, loop_groups >= 0)
+        bmesh.update_edit_mesh(obj.data)
+        factors_list.append(obj_factors.tolist())
+
+    return factors_list
 
 
 def _get_target_textures(_, __):
@@ -200,12 +192,129 @@ def _get_target_textures(_, __):
     return items
 
 
+def _get_heatmap_colors(densities, ref_density):
+    # Blue is the half of the reference density or less, green is the
+    # reference density and red is the twice or more.
+    # The faces without texel density are drawn in gray.
+    colors = np.empty((len(densities), 4), dtype=np.float32)
+    colors[:] = (0.5, 0.5, 0.5, _HEATMAP_ALPHA)
+    valid = densities > 0.0
+    if ref_density <= 0.0 or not valid.any():
+        return colors
+
+    t = np.clip(np.log2(densities[valid] / ref_density), -1.0, 1.0)
+    colors[valid, 0] = np.maximum(t, 0.0)
+    colors[valid, 1] = 1.0 - np.abs(t)
+    colors[valid, 2] = np.maximum(-t, 0.0)
+
+    return colors
+
+
+def _calc_heatmap_stats(densities, ref_density):
+    valid = densities[densities > 0.0]
+    if len(valid) == 0:
+        return None
+
+    percentiles = np.percentile(valid, _HEATMAP_PERCENTILES)
+    counts, edges = np.histogram(valid, bins=_HEATMAP_NUM_BINS)
+
+    return {
+        "num_faces": len(densities),
+        "num_valid_faces": len(valid),
+        "reference": ref_density,
+        "min": float(valid.min()),
+        "max": float(valid.max()),
+        "mean": float(valid.mean()),
+        "percentiles": list(zip(_HEATMAP_PERCENTILES, percentiles.tolist())),
+        "histogram": list(zip(edges[:-1].tolist(), edges[1:].tolist(),
+                              counts.tolist())),
+    }
+
+
+def _update_texel_density_heatmap(context, tgt_texture, ref_density,
+                                  store_densities=False):
+    """
+    Measure the texel density of each face and update the heatmap.
+    ref_density: density drawn in green.  0.0 means the median of all faces.
+    store_densities: if True, store the texel density to the face attribute.
+                     BMesh has no bulk access to the face attribute, so
+                     this writes each face in Python.
+    Return the object whose texel density can not be measured, or None.
+    """
+
+    props = context.scene.muv_props.world_scale_uv
+    objs = common.get_uv_editable_objects(context)
+
+    tex_selection_method, tex_size = _get_tex_selection_method(tgt_texture)
+
+    measured = []
+    for obj in objs:
+        bm = bmesh.from_edit_mesh(obj.data)
+        if not bm.loops.layers.uv:
+            return obj
+        uv_layer = bm.loops.layers.uv.verify()
+
+        arrays = common.MeshArrays(None, bm, uv_layer, with_triangles=True)
+        densities = common.measure_all_faces_texel_density(
+            obj, bm, uv_layer, tex_selection_method, tex_size, arrays)
+        if densities is None:
+            return obj
+
+        if store_densities:
+            layer = bm.faces.layers.float.get(TEXEL_DENSITY_LAYER_NAME)
+            if layer is None:
+                layer = bm.faces.layers.float.new(TEXEL_DENSITY_LAYER_NAME)
+            for f, d in zip(bm.faces, densities.tolist()):
+                f[layer] = d
+            bmesh.update_edit_mesh(obj.data)
+
+        measured.append((obj, arrays, densities))
+
+    all_densities = np.concatenate(
+        [np.empty(0, dtype=np.float64)] + [m[2] for m in measured])
+    valid_densities = all_densities[all_densities > 0.0]
+    if ref_density <= 0.0 and len(valid_densities) > 0:
+        ref_density = float(np.median(valid_densities))
+
+    props.heatmap_data = {}
+    props.heatmap_batches = {}
+    for obj, arrays, densities in measured:
+        # Triangles are drawn in the object space, and the vertex colors are
+        # taken from the face which the triangle belongs to.
+        tri_loops = arrays.tri_loops.ravel()
+        positions = arrays.loop_vert_cos[tri_loops].astype(np.float32)
+        face_colors = _get_heatmap_colors(densities, ref_density)
+        colors = np.repeat(face_colors[arrays.tri_faces], 3, axis=0)
+        props.heatmap_data[obj] = (positions, colors)
+    props.heatmap_stats = _calc_heatmap_stats(all_densities, ref_density)
+
+    return None
+
+
 @PropertyClassRegistry()
 class _Properties:
     idname = "world_scale_uv"
 
     @classmethod
     def init_props(cls, scene):
+        class Props():
+            # { Object: (positions, colors) } in the object space
+            heatmap_data = {}
+            # { Object: GPUBatch } built from heatmap_data on drawing
+            heatmap_batches = {}
+            heatmap_stats = None
+
+        scene.muv_props.world_scale_uv = Props()
+
+        def get_func(_):
+            return MUV_OT_WorldScaleUV_Heatmap_Render.is_running(bpy.context)
+
+        def set_func(_, __):
+            pass
+
+        def update_func(_, __):
+            bpy.ops.uv.muv_world_scale_uv_heatmap_render('INVOKE_REGION_WIN')
+
         scene.muv_world_scale_uv_enabled = BoolProperty(
             name="World Scale UV Enabled",
             description="World Scale UV is enabled",
@@ -310,9 +419,26 @@ class _Properties:
             description="Apply to only selected faces",
             default=True,
         )
+        scene.muv_world_scale_uv_heatmap_show = BoolProperty(
+            name="Texel Density Heatmap Showed",
+            description="Texel density heatmap is showed",
+            default=False,
+            get=get_func,
+            set=set_func,
+            update=update_func
+        )
+        scene.muv_world_scale_uv_heatmap_ref_density = FloatProperty(
+            name="Reference Density",
+            description="Texel density drawn in green on the heatmap "
+                        "(0: Median of all faces)",
+            default=0.0,
+            min=0.0
+        )
 
     @classmethod
     def del_props(cls, scene):
+        MUV_OT_WorldScaleUV_Heatmap_Render.handle_remove()
+        del scene.muv_props.world_scale_uv
         del scene.muv_world_scale_uv_enabled
         del scene.muv_world_scale_uv_src_mesh_area
         del scene.muv_world_scale_uv_src_uv_area
@@ -326,6 +452,8 @@ class _Properties:
         del scene.muv_world_scale_uv_tgt_area_calc_method
         del scene.muv_world_scale_uv_measure_only_selected
         del scene.muv_world_scale_uv_apply_only_selected
+        del scene.muv_world_scale_uv_heatmap_show
+        del scene.muv_world_scale_uv_heatmap_ref_density
 
 
 @BlClassRegistry()
@@ -491,6 +619,10 @@ class MUV_OT_WorldScaleUV_ApplyManual(bpy.types.Operator):
     def __apply_manual(self, context):
         objs = common.get_uv_editable_objects(context)
 
+        # Measure all objects before applying, so that no UV is changed if
+        # any object can not be measured.
+        tables = []
+        densities = []
         for obj in objs:
             bm = bmesh.from_edit_mesh(obj.data)
             if common.check_version(2, 73, 0) >= 0:
@@ -504,34 +636,27 @@ class MUV_OT_WorldScaleUV_ApplyManual(bpy.types.Operator):
                             .format(obj.name))
                 return {'CANCELLED'}
             uv_layer = bm.loops.layers.uv.verify()
-            tex_layer = common.find_texture_layer(bm)
-            faces_list = common.get_faces_list(
-                bm, self.tgt_area_calc_method, self.only_selected)
-
-            tex_size = self.tgt_texture_size
-
-            factors = []
-            for faces in faces_list:
-                uv_area, _, density = _measure_wsuv_info_from_faces(
-                    obj, bm, faces, uv_layer, tex_layer,
-                    tex_selection_method='USER_SPECIFIED', tex_size=tex_size)
-
-                if not uv_area:
-                    self.report({'WARNING'},
-                                "Object {} must have more than one UV map"
-                                .format(obj.name))
-                    return {'CANCELLED'}
-
-                tgt_density = self.tgt_density
-                factor = tgt_density / density
-
-                _apply(faces, uv_layer, self.origin, factor)
-                factors.append(factor)
+            table, uv_areas, _, obj_densities = \
+                _measure_wsuv_info_from_groups(
+                    obj, bm, uv_layer, self.tgt_area_calc_method,
+                    self.only_selected,
+                    tex_selection_method='USER_SPECIFIED',
+                    tex_size=self.tgt_texture_size)
+            if uv_areas is None:
+                self.report({'WARNING'},
+                            "Object {} must have more than one UV map"
+                            .format(obj.name))
+                return {'CANCELLED'}
+            tables.append(table)
+            densities.append(obj_densities)
 
-            bmesh.update_edit_mesh(obj.data)
+        densities = np.concatenate(densities)
+        factors = _calc_scaling_factors(self.tgt_density, densities)
+        factors_list = _apply_wsuv_table(tables, self.origin, factors)
+        for (obj, _, _, _), obj_factors in zip(tables, factors_list):
             self.report({'INFO'},
                         "Scaling factor of object {}: {}"
-                        .format(obj.name, factors))
+                        .format(obj.name, obj_factors))
 
         return {'FINISHED'}
 
@@ -660,7 +785,13 @@ class MUV_OT_WorldScaleUV_ApplyScalingDensity(bpy.types.Operator):
 
     def __apply_scaling_density(self, context):
         objs = common.get_uv_editable_objects(context)
+        tex_selection_method, tex_size = \
+            _get_tex_selection_method(self.tgt_texture)
 
+        # Measure all objects before applying, so that no UV is changed if
+        # any object can not be measured.
+        tables = []
+        densities = []
         for obj in objs:
             bm = bmesh.from_edit_mesh(obj.data)
             if common.check_version(2, 73, 0) >= 0:
@@ -674,47 +805,28 @@ class MUV_OT_WorldScaleUV_ApplyScalingDensity(bpy.types.Operator):
                             .format(obj.name))
                 return {'CANCELLED'}
             uv_layer = bm.loops.layers.uv.verify()
-            tex_layer = common.find_texture_layer(bm)
-            faces_list = common.get_faces_list(
-                bm, self.tgt_area_calc_method, self.only_selected)
-
-            factors = []
-            for faces in faces_list:
-                if self.tgt_texture == "[Average]":
-                    uv_area, _, density = _measure_wsuv_info_from_faces(
-                        obj, bm, faces, uv_layer, tex_layer,
-                        tex_selection_method='AVERAGE')
-                elif self.tgt_texture == "[Max]":
-                    uv_area, _, density = _measure_wsuv_info_from_faces(
-                        obj, bm, faces, uv_layer, tex_layer,
-                        tex_selection_method='MAX')
-                elif self.tgt_texture == "[Min]":
-                    uv_area, _, density = _measure_wsuv_info_from_faces(
-                        obj, bm, faces, uv_layer, tex_layer,
-                        tex_selection_method='MIN')
-                else:
-                    tgt_texture = bpy.data.images[self.tgt_texture]
-                    uv_area, _, density = _measure_wsuv_info_from_faces(
-                        obj, bm, faces, uv_layer, tex_layer,
-                        tex_selection_method='USER_SPECIFIED',
-                        tex_size=tgt_texture.size)
-
-                if not uv_area:
-                    self.report({'WARNING'},
-                                "Object {} must have more than one UV map and "
-                                "texture".format(obj.name))
-                    return {'CANCELLED'}
-
-                tgt_density = self.src_density * self.tgt_scaling_factor
-                factor = tgt_density / density
-
-                _apply(faces, uv_layer, self.origin, factor)
-                factors.append(factor)
-
-            bmesh.update_edit_mesh(obj.data)
+            table, uv_areas, _, obj_densities = \
+                _measure_wsuv_info_from_groups(
+                    obj, bm, uv_layer, self.tgt_area_calc_method,
+                    self.only_selected,
+                    tex_selection_method=tex_selection_method,
+                    tex_size=tex_size)
+            if uv_areas is None:
+                self.report({'WARNING'},
+                            "Object {} must have more than one UV map and "
+                            "texture".format(obj.name))
+                return {'CANCELLED'}
+            tables.append(table)
+            densities.append(obj_densities)
+
+        densities = np.concatenate(densities)
+        tgt_density = self.src_density * self.tgt_scaling_factor
+        factors = _calc_scaling_factors(tgt_density, densities)
+        factors_list = _apply_wsuv_table(tables, self.origin, factors)
+        for (obj, _, _, _), obj_factors in zip(tables, factors_list):
             self.report({'INFO'},
                         "Scaling factor of object {}: {}"
-                        .format(obj.name, factors))
+                        .format(obj.name, obj_factors))
 
         return {'FINISHED'}
 
@@ -865,7 +977,14 @@ class MUV_OT_WorldScaleUV_ApplyProportionalToMesh(bpy.types.Operator):
 
     def __apply_proportional_to_mesh(self, context):
         objs = common.get_uv_editable_objects(context)
-
+        tex_selection_method, tex_size = \
+            _get_tex_selection_method(self.tgt_texture)
+
+        # Measure all objects before applying, so that no UV is changed if
+        # any object can not be measured.
+        tables = []
+        mesh_areas = []
+        densities = []
         for obj in objs:
             bm = bmesh.from_edit_mesh(obj.data)
             if common.check_version(2, 73, 0) >= 0:
@@ -879,51 +998,31 @@ class MUV_OT_WorldScaleUV_ApplyProportionalToMesh(bpy.types.Operator):
                             .format(obj.name))
                 return {'CANCELLED'}
             uv_layer = bm.loops.layers.uv.verify()
-            tex_layer = common.find_texture_layer(bm)
-            faces_list = common.get_faces_list(
-                bm, self.tgt_area_calc_method, self.only_selected)
-
-            factors = []
-            for faces in faces_list:
-                if self.tgt_texture == "[Average]":
-                    uv_area, mesh_area, density = \
-                        _measure_wsuv_info_from_faces(
-                            obj, bm, faces, uv_layer, tex_layer,
-                            tex_selection_method='AVERAGE')
-                elif self.tgt_texture == "[Max]":
-                    uv_area, mesh_area, density = \
-                        _measure_wsuv_info_from_faces(
-                            obj, bm, faces, uv_layer, tex_layer,
-                            tex_selection_method='MAX')
-                elif self.tgt_texture == "[Min]":
-                    uv_area, mesh_area, density = \
-                        _measure_wsuv_info_from_faces(
-                            obj, bm, faces, uv_layer, tex_layer,
-                            tex_selection_method='MIN')
-                else:
-                    tgt_texture = bpy.data.images[self.tgt_texture]
-                    uv_area, mesh_area, density = \
-                        _measure_wsuv_info_from_faces(
-                            obj, bm, faces, uv_layer, tex_layer,
-                            tex_selection_method='USER_SPECIFIED',
-                            tex_size=tgt_texture.size)
-                if not uv_area:
-                    self.report({'WARNING'},
-                                "Object {} must have more than one UV map and "
-                                "texture".format(obj.name))
-                    return {'CANCELLED'}
-
-                tgt_density = self.src_density * sqrt(mesh_area) / sqrt(
-                    self.src_mesh_area)
-                factor = tgt_density / density
-
-                _apply(faces, uv_layer, self.origin, factor)
-                factors.append(factor)
-
-            bmesh.update_edit_mesh(obj.data)
+            table, uv_areas, obj_mesh_areas, obj_densities = \
+                _measure_wsuv_info_from_groups(
+                    obj, bm, uv_layer, self.tgt_area_calc_method,
+                    self.only_selected,
+                    tex_selection_method=tex_selection_method,
+                    tex_size=tex_size)
+            if uv_areas is None:
+                self.report({'WARNING'},
+                            "Object {} must have more than one UV map and "
+                            "texture".format(obj.name))
+                return {'CANCELLED'}
+            tables.append(table)
+            mesh_areas.append(obj_mesh_areas)
+            densities.append(obj_densities)
+
+        mesh_areas = np.concatenate(mesh_areas)
+        densities = np.concatenate(densities)
+        tgt_densities = self.src_density * np.sqrt(mesh_areas) / sqrt(
+            self.src_mesh_area)
+        factors = _calc_scaling_factors(tgt_densities, densities)
+        factors_list = _apply_wsuv_table(tables, self.origin, factors)
+        for (obj, _, _, _), obj_factors in zip(tables, factors_list):
             self.report({'INFO'},
                         "Scaling factor of object {}: {}"
-                        .format(obj.name, factors))
+                        .format(obj.name, obj_factors))
 
         return {'FINISHED'}
 
@@ -961,3 +1060,177 @@ class MUV_OT_WorldScaleUV_ApplyProportionalToMesh(bpy.types.Operator):
 
     def execute(self, context):
         return self.__apply_proportional_to_mesh(context)
+
+
+@BlClassRegistry()
+class MUV_OT_WorldScaleUV_Heatmap_Render(bpy.types.Operator):
+    """
+    Operation class: Render texel density heatmap
+    No operation (only rendering)
+    """
+
+    bl_idname = "uv.muv_world_scale_uv_heatmap_render"
+    bl_description = "Render texel density heatmap"
+    bl_label = "Texel density heatmap renderer"
+
+    __handle = None
+
+    @classmethod
+    def poll(cls, context):
+        # we can not get area/space/region from console
+        if common.is_console_mode():
+            return False
+        return _is_valid_context_for_heatmap(context)
+
+    @classmethod
+    def is_running(cls, _):
+        return 1 if cls.__handle else 0
+
+    @classmethod
+    def handle_add(cls, obj, context):
+        sv3d = bpy.types.SpaceView3D
+        cls.__handle = sv3d.draw_handler_add(
+            MUV_OT_WorldScaleUV_Heatmap_Render.draw, (obj, context),
+            'WINDOW', 'POST_VIEW')
+
+    @classmethod
+    def handle_remove(cls):
+        if cls.__handle is not None:
+            bpy.types.SpaceView3D.draw_handler_remove(cls.__handle, 'WINDOW')
+            cls.__handle = None
+
+    @staticmethod
+    def draw(_, context):
+        sc = context.scene
+        props = sc.muv_props.world_scale_uv
+
+        if not MUV_OT_WorldScaleUV_Heatmap_Render.is_running(context):
+            return
+
+        # The heatmap is rendered by the gpu module.
+        if compat.check_version(2, 80, 0) >= 0:
+            if compat.check_version(3, 4, 0) >= 0:
+                shader = gpu.shader.from_builtin('FLAT_COLOR')
+            else:
+                shader = gpu.shader.from_builtin('3D_FLAT_COLOR')
+
+            # OpenGL configuration.
+            if compat.check_version(3, 0, 0) < 0:
+                bgl.glEnable(bgl.GL_BLEND)
+                bgl.glEnable(bgl.GL_DEPTH_TEST)
+                bgl.glDepthFunc(bgl.GL_LEQUAL)
+            else:
+                gpu.state.blend_set('ALPHA')
+                gpu.state.depth_test_set('LESS_EQUAL')
+
+            # The batches are built on the first drawing since GPU module is
+            # not available while the heatmap is updated on the background
+            # mode.
+            shader.bind()
+            for obj, (positions, colors) in props.heatmap_data.items():
+                try:
+                    matrix = obj.matrix_world
+                except ReferenceError:
+                    # The object was removed after the heatmap was updated.
+                    continue
+                batch = props.heatmap_batches.get(obj)
+                if batch is None:
+                    batch = batch_for_shader(
+                        shader, 'TRIS', {"pos": positions, "color": colors})
+                    props.heatmap_batches[obj] = batch
+                gpu.matrix.push()
+                gpu.matrix.multiply_matrix(matrix)
+                batch.draw(shader)
+                gpu.matrix.pop()
+
+            if compat.check_version(3, 0, 0) < 0:
+                bgl.glDepthFunc(bgl.GL_LESS)
+                bgl.glDisable(bgl.GL_DEPTH_TEST)
+                bgl.glDisable(bgl.GL_BLEND)
+            else:
+                gpu.state.depth_test_set('NONE')
+                gpu.state.blend_set('NONE')
+
+    def invoke(self, context, _):
+        if not MUV_OT_WorldScaleUV_Heatmap_Render.is_running(context):
+            sc = context.scene
+            obj = _update_texel_density_heatmap(
+                context, sc.muv_world_scale_uv_measure_tgt_texture,
+                sc.muv_world_scale_uv_heatmap_ref_density)
+            if obj is not None:
+                self.report({'WARNING'},
+                            "Object {} must have more than one UV map and "
+                            "texture".format(obj.name))
+                return {'CANCELLED'}
+            MUV_OT_WorldScaleUV_Heatmap_Render.handle_add(self, context)
+        else:
+            MUV_OT_WorldScaleUV_Heatmap_Render.handle_remove()
+
+        if context.area:
+            context.area.tag_redraw()
+
+        return {'FINISHED'}
+
+
+@BlClassRegistry()
+@compat.make_annotations
+class MUV_OT_WorldScaleUV_Heatmap_Update(bpy.types.Operator):
+    """
+    Operation class: Update texel density heatmap
+    """
+
+    bl_idname = "uv.muv_world_scale_uv_heatmap_update"
+    bl_label = "Update Texel Density Heatmap"
+    bl_description = "Measure texel density of each face and update heatmap"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    tgt_texture = EnumProperty(
+        name="Texture",
+        description="Texture to be measured",
+        items=_get_target_textures
+    )
+    ref_density = FloatProperty(
+        name="Reference Density",
+        description="Texel density drawn in green on the heatmap "
+                    "(0: Median of all faces)",
+        default=0.0,
+        min=0.0
+    )
+    store_densities = BoolProperty(
+        name="Store Densities",
+        description="Store texel density of each face to the face attribute "
+                    "(Slow on the large mesh)",
+        default=False
+    )
+
+    @classmethod
+    def poll(cls, context):
+        # we can not get area/space/region from console
+        if common.is_console_mode():
+            return True
+        return _is_valid_context_for_heatmap(context)
+
+    @staticmethod
+    def setup_argument(ops, scene):
+        try:
+            ops.tgt_texture = scene.muv_world_scale_uv_measure_tgt_texture
+        except TypeError:
+            # Workaround for the error raised when the items of EnumProperty
+            # are deleted.
+            ops.tgt_texture = "[Average]"
+        ops.ref_density = scene.muv_world_scale_uv_heatmap_ref_density
+
+    def execute(self, context):
+        obj = _update_texel_density_heatmap(context, self.tgt_texture,
+                                            self.ref_density,
+                                            self.store_densities)
+        if obj is not None:
+            self.report({'WARNING'},
+                        "Object {} must have more than one UV map and "
+                        "texture".format(obj.name))
+            return {'CANCELLED'}
+
+        if context.area:
+            context.area.tag_redraw()
+
+        return {'FINISHED'}
@@ -13,6 +13,7 @@ from bpy.props import (
     FloatVectorProperty,
     BoolProperty,
     EnumProperty,
+    IntProperty,
 )
 from bpy.types import AddonPreferences
 
@@ -247,6 +248,14 @@ class MUV_Preferences(AddonPreferences):
         size=4,
         subtype='COLOR'
     )
+    uv_inspection_num_workers = IntProperty(
+        name="Number of Workers",
+        description="Number of processes to detect overlapped UVs and"
+                    " paint UV islands (1: Disable parallel processing)",
+        default=1,
+        min=1,
+        max=256
+    )
 
     # for Texture Projection
     texture_projection_canvas_padding = FloatVectorProperty(
@@ -459,6 +468,13 @@ class MUV_Preferences(AddonPreferences):
                 col.prop(self, "uv_inspection_flipped_color_for_v3d",
                          text="")
 
+                sp = compat.layout_split(layout, 0.05)
+                col = sp.column()  # spacer
+                sp = compat.layout_split(sp, 0.3)
+                col = sp.column()
+                col.label(text="Number of Workers:")
+                col.prop(self, "uv_inspection_num_workers", text="")
+
                 layout.separator()
 
             layout.prop(
@@ -123,6 +123,7 @@ class MUV_PT_UVEdit_EditorEnhancement(bpy.types.Panel):
                 if MUV_OT_UVInspection_Render.is_running(context)
                 else 'RESTRICT_VIEW_ON')
             row.operator(MUV_OT_UVInspection_Update.bl_idname, text="Update")
+            box.prop(sc, "muv_uv_inspection_auto_refresh")
             row = box.row()
             row.prop(sc, "muv_uv_inspection_show_overlapped")
             row.prop(sc, "muv_uv_inspection_show_flipped")
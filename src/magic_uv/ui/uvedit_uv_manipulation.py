@@ -187,9 +187,17 @@ class MUV_PT_UVEdit_UVManipulation(bpy.types.Panel):
             ops.accurate_island_copy = \
                 sc.muv_pack_uv_accurate_island_copy
             ops.stride = sc.muv_pack_uv_stride
+            ops.grouping_method = sc.muv_pack_uv_grouping_method
+            ops.packing_method = sc.muv_pack_uv_packing_method
+            ops.time_budget = sc.muv_pack_uv_time_budget
             ops.apply_pack_uv = sc.muv_pack_uv_apply_pack_uv
             box.prop(sc, "muv_pack_uv_apply_pack_uv")
+            if sc.muv_pack_uv_apply_pack_uv:
+                box.prop(sc, "muv_pack_uv_packing_method")
+                if sc.muv_pack_uv_packing_method == 'SKYLINE':
+                    box.prop(sc, "muv_pack_uv_time_budget")
             box.prop(sc, "muv_pack_uv_accurate_island_copy")
+            box.prop(sc, "muv_pack_uv_grouping_method")
             box.label(text="Allowable Center Deviation:")
             box.prop(sc, "muv_pack_uv_allowable_center_deviation", text="")
             box.label(text="Allowable Size Deviation:")
@@ -26,6 +26,8 @@ from ..op.world_scale_uv import (
     MUV_OT_WorldScaleUV_ApplyManual,
     MUV_OT_WorldScaleUV_ApplyScalingDensity,
     MUV_OT_WorldScaleUV_ApplyProportionalToMesh,
+    MUV_OT_WorldScaleUV_Heatmap_Render,
+    MUV_OT_WorldScaleUV_Heatmap_Update,
 )
 from ..op.flip_rotate_uv import MUV_OT_FlipRotateUV
 from ..op.mirror_uv import MUV_OT_MirrorUV
@@ -59,6 +61,29 @@ class MUV_PT_View3D_UVManipulation(bpy.types.Panel):
         layout = self.layout
         layout.label(text="", icon=compat.icon('IMAGE'))
 
+    @staticmethod
+    def __draw_heatmap_stats(layout, stats):
+        if stats is None:
+            return
+
+        col = layout.column(align=True)
+        col.label(text="Faces: {} ({} measured)"
+                  .format(stats["num_faces"], stats["num_valid_faces"]))
+        col.label(text="Reference: {:.2f}".format(stats["reference"]))
+        col.label(text="Min / Mean / Max: {:.2f} / {:.2f} / {:.2f}"
+                  .format(stats["min"], stats["mean"], stats["max"]))
+        for p, v in stats["percentiles"]:
+            col.label(text="P{}: {:.2f}".format(p, v))
+
+        col = layout.column(align=True)
+        col.label(text="Histogram:")
+        max_count = max(c for _, _, c in stats["histogram"])
+        for lo, hi, count in stats["histogram"]:
+            sp = compat.layout_split(col, 0.5)
+            sp.label(text="{:.2f} - {:.2f}".format(lo, hi))
+            hist_bar = "|" * int(round(20 * count / max_count))
+            sp.label(text="{} {}".format(hist_bar, count))
+
     def draw(self, context):
         sc = context.scene
         layout = self.layout
@@ -221,6 +246,28 @@ class MUV_PT_View3D_UVManipulation(bpy.types.Panel):
                 box.prop(sc, "muv_world_scale_uv_origin", text="Origin")
                 box.prop(sc, "muv_world_scale_uv_tgt_area_calc_method")
 
+            if compat.check_version(2, 80, 0) >= 0:
+                box.separator()
+
+                box.label(text="Texel Density Heatmap:")
+                row = box.row(align=True)
+                row.prop(
+                    sc, "muv_world_scale_uv_heatmap_show",
+                    text="Hide"
+                    if MUV_OT_WorldScaleUV_Heatmap_Render.is_running(context)
+                    else "Show",
+                    icon='RESTRICT_VIEW_OFF'
+                    if MUV_OT_WorldScaleUV_Heatmap_Render.is_running(context)
+                    else 'RESTRICT_VIEW_ON')
+                ops = row.operator(
+                    MUV_OT_WorldScaleUV_Heatmap_Update.bl_idname,
+                    text="Update")
+                MUV_OT_WorldScaleUV_Heatmap_Update.setup_argument(ops, sc)
+                box.prop(sc, "muv_world_scale_uv_measure_tgt_texture")
+                box.prop(sc, "muv_world_scale_uv_heatmap_ref_density")
+                self.__draw_heatmap_stats(
+                    box, sc.muv_props.world_scale_uv.heatmap_stats)
+
         box = layout.box()
         box.prop(sc, "muv_preserve_uv_aspect_enabled",
                  text="Preserve UV Aspect")
@@ -11,12 +11,16 @@ if "bpy" in locals():
     import importlib
     importlib.reload(bl_class_registry)
     importlib.reload(compatibility)
+    importlib.reload(disjoint_set)
     importlib.reload(graph)
+    importlib.reload(packing)
     importlib.reload(property_class_registry)
 else:
     from . import bl_class_registry
     from . import compatibility
+    from . import disjoint_set
     from . import graph
+    from . import packing
     from . import property_class_registry
 
 import bpy
@@ -0,0 +1,52 @@
+# SPDX-License-Identifier: GPL-2.0-or-later
+
+# <pep8-80 compliant>
+
+__author__ = "Nutti <nutti.metro@gmail.com>"
+__status__ = "production"
+__version__ = "6.6"
+__date__ = "22 Apr 2022"
+
+
+class DisjointSet:
+    """
+    Disjoint-set (union-find) over the integer elements 0, 1, ..., n-1.
+    Path compression (path halving) and union by size keep each operation
+    in amortized near-constant time.
+    """
+
+    def __init__(self, num_elements=0):
+        self.parents = list(range(num_elements))
+        self.sizes = [1] * num_elements
+
+    def __len__(self):
+        return len(self.parents)
+
+    def add(self):
+        """
+        Add a new singleton set and return its element
+        """
+
+        elm = len(self.parents)
+        self.parents.append(elm)
+        self.sizes.append(1)
+        return elm
+
+    def find(self, elm):
+        parents = self.parents
+        while parents[elm] != elm:
+            parents[elm] = parents[parents[elm]]
+            elm = parents[elm]
+        return elm
+
+    def union(self, elm_1, elm_2):
+        root_1 = self.find(elm_1)
+        root_2 = self.find(elm_2)
+        if root_1 == root_2:
+            return root_1
+
+        if self.sizes[root_1] < self.sizes[root_2]:
+            root_1, root_2 = root_2, root_1
+        self.parents[root_2] = root_1
+        self.sizes[root_1] += self.sizes[root_2]
+        return root_1
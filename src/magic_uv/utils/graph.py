@@ -7,17 +7,26 @@ __status__ = "production"
 __version__ = "6.6"
 __date__ = "22 Apr 2022"
 
+from collections import deque
+
 
 class Node:
     def __init__(self, key, value=None):
         self.key = key
         self.value = value
         self.edges = []
+        # Set when the node belongs to a graph which wraps adjacency arrays.
+        self.graph = None
+        self.position = -1
 
     def degree(self):
+        if self.graph is not None:
+            return self.graph.degree_at(self.position)
         return len(self.edges)
 
     def connected_nodes(self):
+        if self.graph is not None:
+            return self.graph.connected_nodes_at(self.position)
         return [e.other(self) for e in self.edges]
 
 
@@ -43,13 +52,78 @@ class Graph:
         self.edges = []
         self.nodes = {}
 
+        # Adjacency arrays in compressed sparse row (CSR) form.
+        # The neighbours of the i-th node are
+        # adjacency[adjacency_offsets[i]:adjacency_offsets[i + 1]].
+        self.node_list = []
+        self.adjacency_offsets = None
+        self.adjacency = None
+
+    @classmethod
+    def from_adjacency_arrays(cls, nodes, adjacency_offsets, adjacency):
+        """
+        Create a graph which wraps the adjacency arrays in CSR form.
+        Each undirected edge must appear in the adjacency of both nodes.
+        No Edge object is created, so that 'edges' is always empty.
+        """
+
+        if len(adjacency_offsets) != len(nodes) + 1:
+            raise RuntimeError("The number of adjacency offsets must be "
+                               "the number of nodes + 1.")
+
+        graph = cls()
+        for i, node in enumerate(nodes):
+            graph.add_node(node)
+            node.graph = graph
+            node.position = i
+        graph.node_list = list(nodes)
+        graph.adjacency_offsets = adjacency_offsets
+        graph.adjacency = adjacency
+
+        return graph
+
+    def wraps_arrays(self):
+        return self.adjacency is not None
+
+    def num_edges(self):
+        if self.wraps_arrays():
+            return len(self.adjacency) // 2
+        return len(self.edges)
+
+    def degree_at(self, position):
+        offsets = self.adjacency_offsets
+        return int(offsets[position + 1] - offsets[position])
+
+    def connected_nodes_at(self, position):
+        offsets = self.adjacency_offsets
+        node_list = self.node_list
+        indices = self.adjacency[offsets[position]:offsets[position + 1]]
+        return [node_list[i] for i in indices]
+
+    def edge_keys(self):
+        if not self.wraps_arrays():
+            for edge in self.edges:
+                yield edge.node_1.key, edge.node_2.key
+            return
+
+        for node in self.node_list:
+            for other in self.connected_nodes_at(node.position):
+                if node.position < other.position:
+                    yield node.key, other.key
+
     def add_node(self, node):
+        if self.wraps_arrays():
+            raise RuntimeError("Graph which wraps adjacency arrays "
+                               "is read-only.")
         if node.key in self.nodes:
             raise RuntimeError("Node '{}' is already registered."
                                .format(node.key))
         self.nodes[node.key] = node
 
     def add_edge(self, node_1, node_2):
+        if self.wraps_arrays():
+            raise RuntimeError("Graph which wraps adjacency arrays "
+                               "is read-only.")
         if node_1.key not in self.nodes:
             raise RuntimeError("Node '{}' is not registered."
                                .format(node_1.key))
@@ -72,8 +146,46 @@ def dump_graph(graph):
         print("Key: {}, Value {}".format(node.key, node.value))
 
     print("=== Edge ===")
-    for edge in graph.edges:
-        print("{} - {}".format(edge.node_1.key, edge.node_2.key))
+    for key_1, key_2 in graph.edge_keys():
+        print("{} - {}".format(key_1, key_2))
+
+
+# Color refinement (1-dimensional Weisfeiler-Lehman algorithm)
+#   Ref: https://en.wikipedia.org/wiki/Weisfeiler_Leman_graph_isomorphism_test
+#
+# The nodes are colored by the degree at first, and then the color is
+# refined by the multiset of the colors of the connected nodes until the
+# partition is stable.  The color is shared between two graphs, so the
+# nodes which can be matched must have the same color.
+def __refine_node_colors(adjacency_1, adjacency_2):
+    def count_colors(colors):
+        counts = {}
+        for c in colors.values():
+            counts[c] = counts.get(c, 0) + 1
+        return counts
+
+    colors_1 = {k: len(adj) for k, adj in adjacency_1.items()}
+    colors_2 = {k: len(adj) for k, adj in adjacency_2.items()}
+    num_colors = len(set(colors_1.values()) | set(colors_2.values()))
+    while True:
+        if count_colors(colors_1) != count_colors(colors_2):
+            return None, None
+
+        signatures_1 = {
+            k: (colors_1[k], tuple(sorted(colors_1[a] for a in adj)))
+            for k, adj in adjacency_1.items()}
+        signatures_2 = {
+            k: (colors_2[k], tuple(sorted(colors_2[a] for a in adj)))
+            for k, adj in adjacency_2.items()}
+        palette = {sig: i for i, sig in enumerate(sorted(
+            set(signatures_1.values()) | set(signatures_2.values())))}
+        if len(palette) == num_colors:
+            break
+        num_colors = len(palette)
+        colors_1 = {k: palette[sig] for k, sig in signatures_1.items()}
+        colors_2 = {k: palette[sig] for k, sig in signatures_2.items()}
+
+    return colors_1, colors_2
 
 
 # VF2 algorithm
@@ -81,72 +193,110 @@ def dump_graph(graph):
 #            vf2-algorithm-steps-with-example
 #   Ref: https://github.com/satemochi/saaaaah/blob/master/geometric_misc/
 #            isomorph/vf2/vf2.py
+#
+# The nodes of graph_1 are matched in the breadth-first order, and the
+# candidates in graph_2 are tried in the order of the key.  Only the nodes
+# which have the same color can be matched, and the candidates are
+# narrowed down to the nodes connected to the already matched nodes.
 def graph_is_isomorphic(graph_1, graph_2):
-    def is_iso(pairs, matching_node, new_node):
-        # Algorithm:
-        #   1. The degree is same (It's faster).
-        #   2. The connected node is same.
-        if matching_node.degree() != new_node.degree():
-            return False
+    def get_adjacency(graph):
+        return {k: {c.key for c in n.connected_nodes()}
+                for k, n in graph.nodes.items()}
 
-        matching_connected = [c.key for c in matching_node.connected_nodes()]
-        new_connected = [c.key for c in new_node.connected_nodes()]
-
-        for p in pairs:
-            n1 = p[0]
-            n2 = p[1]
-            if n1 in matching_connected and n2 not in new_connected:
-                return False
-            if n1 not in matching_connected and n2 in new_connected:
-                return False
-
-        return True
-
-    def dfs(graph_1, graph_2):
-        def generate_pair(g1, g2, pairs):
-            remove_1 = [p[0] for p in pairs]
-            remove_2 = [p[1] for p in pairs]
-
-            keys_1 = sorted(list(set(g1.nodes.keys()) - set(remove_1)))
-            keys_2 = sorted(list(set(g2.nodes.keys()) - set(remove_2)))
-            for k1 in keys_1:
-                for k2 in keys_2:
-                    yield (k1, k2)
-
-        pairs = []
-        stack = [generate_pair(graph_1, graph_2, pairs)]
-        while stack:
-            try:
-                k1, k2 = next(stack[-1])
-                n1 = graph_1.get_node(k1)
-                n2 = graph_2.get_node(k2)
-                if is_iso(pairs, n1, n2):
-                    pairs.append([k1, k2])
-                    stack.append(generate_pair(graph_1, graph_2, pairs))
-                    if len(pairs) == len(graph_1.nodes):
-                        return True, pairs
-            except StopIteration:
-                stack.pop()
-                diff = len(pairs) - len(stack)
-                for _ in range(diff):
-                    pairs.pop()
-
-        return False, []
+    def get_matching_order(adjacency, colors):
+        # Breadth-first order which starts from the node with the rarest
+        # color, so that every node except the first one is connected to
+        # the node matched before.
+        color_counts = {}
+        for c in colors.values():
+            color_counts[c] = color_counts.get(c, 0) + 1
+        remaining = sorted(adjacency.keys(),
+                           key=lambda k: (color_counts[colors[k]], k))
+        order = []
+        visited = set()
+        for start in remaining:
+            if start in visited:
+                continue
+            visited.add(start)
+            queue = deque([start])
+            while queue:
+                k = queue.popleft()
+                order.append(k)
+                for a in sorted(adjacency[k]):
+                    if a not in visited:
+                        visited.add(a)
+                        queue.append(a)
+        return order
 
     # First, check simple condition.
     if len(graph_1.nodes) != len(graph_2.nodes):
         return False, {}
-    if len(graph_1.edges) != len(graph_2.edges):
+    if graph_1.num_edges() != graph_2.num_edges():
+        return False, {}
+    if not graph_1.nodes:
         return False, {}
 
-    is_isomorphic, pairs = dfs(graph_1, graph_2)
+    adjacency_1 = get_adjacency(graph_1)
+    adjacency_2 = get_adjacency(graph_2)
+    colors_1, colors_2 = __refine_node_colors(adjacency_1, adjacency_2)
+    if colors_1 is None:
+        return False, {}
+
+    color_to_keys_2 = {}
+    for k in sorted(adjacency_2.keys()):
+        color_to_keys_2.setdefault(colors_2[k], []).append(k)
+
+    keys_1 = get_matching_order(adjacency_1, colors_1)
+    pairs = {}      # { key of graph_1: key of graph_2 }
+    matched_2 = set()
+
+    def generate_candidates(k1):
+        # The node connected to the matched node must be matched to the
+        # node connected to the pair of the matched node.
+        color = colors_1[k1]
+        for a in adjacency_1[k1]:
+            if a in pairs:
+                candidates = sorted(adjacency_2[pairs[a]])
+                break
+        else:
+            candidates = color_to_keys_2[color]
+        for k2 in candidates:
+            if k2 not in matched_2 and colors_2[k2] == color:
+                yield k2
+
+    def is_iso(k1, k2):
+        matched_connected_1 = [a for a in adjacency_1[k1] if a in pairs]
+        matched_connected_2 = [a for a in adjacency_2[k2] if a in matched_2]
+        if len(matched_connected_1) != len(matched_connected_2):
+            return False
+        connected_2 = adjacency_2[k2]
+        for a in matched_connected_1:
+            if pairs[a] not in connected_2:
+                return False
+        return True
+
+    stack = [generate_candidates(keys_1[0])]
+    while stack:
+        k1 = keys_1[len(stack) - 1]
+        if k1 in pairs:
+            matched_2.remove(pairs.pop(k1))
+        k2 = next(stack[-1], None)
+        if k2 is None:
+            stack.pop()
+            continue
+        if not is_iso(k1, k2):
+            continue
+        pairs[k1] = k2
+        matched_2.add(k2)
+        if len(pairs) == len(keys_1):
+            break
+        stack.append(generate_candidates(keys_1[len(stack)]))
+
+    if len(pairs) != len(keys_1):
+        return False, {}
 
     node_pairs = {}
-    for pair in pairs:
-        n1 = pair[0]
-        n2 = pair[1]
-        node_1 = graph_1.get_node(n1)
-        node_2 = graph_2.get_node(n2)
-        node_pairs[node_1] = node_2
-
-    return is_isomorphic, node_pairs
+    for k1, k2 in pairs.items():
+        node_pairs[graph_1.get_node(k1)] = graph_2.get_node(k2)
+
+    return True, node_pairs
@@ -0,0 +1,211 @@
+# SPDX-License-Identifier: GPL-2.0-or-later
+
+# <pep8-80 compliant>
+
+__author__ = "Nutti <nutti.metro@gmail.com>"
+__status__ = "production"
+__version__ = "6.6"
+__date__ = "22 Apr 2022"
+
+import time
+from math import sqrt
+
+
+# Ratio of the bin width to the square root of the total area tried by
+# pack_rectangles().  The narrowest bin is tried at first, and the wider bin
+# is tried until the result is not improved twice in a row.
+BIN_WIDTH_RATIOS = [1.0, 1.05, 1.1, 1.15, 1.2, 1.3, 1.4, 1.6]
+MAX_NUM_NOT_IMPROVED = 2
+
+
+class SkylinePacker:
+    """
+    Place rectangles in the bin with the fixed width and the unlimited
+    height by the skyline bottom-left algorithm.
+    The skyline is the list of the segments [x, y, width] which is the top
+    of the placed rectangles, ordered by x.
+    """
+
+    def __init__(self, width):
+        self.width = width
+        self.skyline = [[0.0, 0.0, width]]
+        self.height = 0.0
+
+    def __find_position(self, width):
+        skyline = self.skyline
+        best = None
+        best_y = float("inf")
+        for i, (x, seg_y, _) in enumerate(skyline):
+            if x + width > self.width:
+                break
+            if seg_y >= best_y:
+                continue
+            # The rectangle lies on the highest segment which is covered.
+            # Stop as soon as the position can not be better than the best.
+            y = seg_y
+            remaining = width
+            for j in range(i, len(skyline)):
+                seg = skyline[j]
+                if seg[1] > y:
+                    y = seg[1]
+                    if y >= best_y:
+                        break
+                remaining -= seg[2]
+                if remaining <= 0.0:
+                    break
+            if y < best_y:
+                best = (x, y, i)
+                best_y = y
+
+        return best
+
+    def __add_segment(self, x, y, width, index):
+        skyline = self.skyline
+        new_seg = [x, y, width]
+        skyline.insert(index, new_seg)
+
+        # Shrink or remove the segments covered by the new segment.
+        end = x + width
+        i = index + 1
+        while i < len(skyline):
+            seg = skyline[i]
+            if seg[0] >= end:
+                break
+            seg_end = seg[0] + seg[2]
+            if seg_end <= end:
+                del skyline[i]
+                continue
+            seg[2] = seg_end - end
+            seg[0] = end
+            break
+
+        # Merge the segments at the same height.
+        i = max(index - 1, 0)
+        while i < len(skyline) - 1 and i <= index + 1:
+            if skyline[i][1] == skyline[i + 1][1]:
+                skyline[i][2] += skyline[i + 1][2]
+                del skyline[i + 1]
+            else:
+                i += 1
+
+    def add(self, width, height):
+        """
+        Place the rectangle and return the position of its bottom left
+        corner.  Return None if the rectangle is wider than the bin.
+        """
+
+        found = self.__find_position(width)
+        if found is None:
+            return None
+        x, y, index = found
+        self.__add_segment(x, y + height, width, index)
+        self.height = max(self.height, y + height)
+
+        return x, y
+
+
+class ShelfPacker:
+    """
+    Place rectangles in rows from left to right above the given height.
+    It is much faster than SkylinePacker, but wastes more space.
+    """
+
+    def __init__(self, width, base_height=0.0):
+        self.width = width
+        self.shelf_y = base_height
+        self.shelf_height = 0.0
+        self.cursor_x = 0.0
+        self.height = base_height
+
+    def add(self, width, height):
+        if width > self.width:
+            return None
+        if self.cursor_x + width > self.width:
+            self.shelf_y += self.shelf_height
+            self.shelf_height = 0.0
+            self.cursor_x = 0.0
+        x, y = self.cursor_x, self.shelf_y
+        self.cursor_x += width
+        self.shelf_height = max(self.shelf_height, height)
+        self.height = max(self.height, y + height)
+
+        return x, y
+
+
+def pack_rectangles(sizes, margin=0.0, time_budget=0.0, progress_fn=None):
+    """
+    Pack rectangles into the unit square.
+    sizes: list of (width, height) of the rectangles
+    margin: space between rectangles after packing
+    time_budget: seconds allowed to pack.  If the time is over, the
+                 narrowest bin found so far is used, and the remaining
+                 rectangles are placed by the shelf algorithm.
+                 0.0 means no limit.
+    progress_fn: called with the ratio of the processed rectangles
+    Return the positions of the bottom left corners and the scale which
+    must be applied to the rectangles and the positions.
+    """
+
+    if not sizes:
+        return [], 1.0
+
+    start = time.perf_counter()
+
+    def is_time_over():
+        if time_budget <= 0.0:
+            return False
+        return time.perf_counter() - start > time_budget
+
+    # Taller rectangles are placed at first.
+    order = sorted(range(len(sizes)),
+                   key=lambda i: (sizes[i][1], sizes[i][0]), reverse=True)
+    total_area = sum(w * h for w, h in sizes)
+    max_width = max(w for w, _ in sizes)
+
+    # The margin is relative to the final size, so the padding is estimated
+    # from the size of the previous result.
+    estimated_side = sqrt(total_area) / 0.8
+
+    best_positions = None
+    best_side = None
+    num_not_improved = 0
+    num_steps = len(BIN_WIDTH_RATIOS) * len(sizes)
+    for ratio_idx, ratio in enumerate(BIN_WIDTH_RATIOS):
+        padding = margin * estimated_side
+        padded_area = sum((w + padding) * (h + padding) for w, h in sizes)
+        bin_width = max(sqrt(padded_area) * ratio, max_width + padding)
+        packer = SkylinePacker(bin_width)
+        positions = [None] * len(sizes)
+        time_over = False
+        for n, i in enumerate(order):
+            time_over = is_time_over()
+            if time_over:
+                if best_positions is not None:
+                    break
+                # Place the remaining rectangles as fast as possible.
+                if not isinstance(packer, ShelfPacker):
+                    packer = ShelfPacker(bin_width, packer.height)
+            w, h = sizes[i]
+            x, y = packer.add(w + padding, h + padding)
+            positions[i] = (x + padding * 0.5, y + padding * 0.5)
+            if progress_fn and n % 1000 == 0:
+                progress_fn((ratio_idx * len(sizes) + n) / num_steps)
+        else:
+            side = max(bin_width, packer.height)
+            if best_side is None or side < best_side:
+                best_side = side
+                best_positions = positions
+                num_not_improved = 0
+            else:
+                num_not_improved += 1
+            estimated_side = side
+        if time_over or num_not_improved >= MAX_NUM_NOT_IMPROVED:
+            break
+
+    if progress_fn:
+        progress_fn(1.0)
+
+    if best_side <= 0.0:
+        return best_positions, 1.0
+
+    return best_positions, 1.0 / best_side
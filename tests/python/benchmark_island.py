@@ -0,0 +1,69 @@
+import sys
+import time
+
+import bmesh
+
+from magic_uv import common
+
+
+# Usage:
+#   blender --factory-startup --background -noaudio \
+#       --python tests/python/benchmark_island.py
+#
+# Measure the time to build island information for grid meshes whose number
+# of faces grows by 4x.  The time per face stays almost constant if the
+# algorithm scales linearly with the number of faces.
+
+GRID_SIZES = [50, 100, 200, 400, 800]
+# Flood-fill algorithm is too slow to measure with large meshes.
+FLOOD_FILL_MAX_FACES = 40000
+
+
+def create_grid_bmesh(num_segments, face_islands):
+    bm = bmesh.new()
+    bmesh.ops.create_grid(bm, x_segments=num_segments,
+                          y_segments=num_segments, size=1.0)
+    bm.faces.ensure_lookup_table()
+    uv_layer = bm.loops.layers.uv.new()
+    for f in bm.faces:
+        # Shift UVs per face to make each face as a separated island.
+        offset = f.index * 3.0 if face_islands else 0.0
+        for l in f.loops:
+            l[uv_layer].uv = (l.vert.co.x + offset, l.vert.co.y)
+
+    return bm, uv_layer
+
+
+def measure(bm, uv_layer, use_union_find):
+    faces = list(bm.faces)
+    start = time.perf_counter()
+    islands = common.get_island_info_from_faces(
+        bm, faces, uv_layer, use_union_find=use_union_find)
+    elapsed = time.perf_counter() - start
+
+    return elapsed, len(islands)
+
+
+def benchmark_main():
+    print("{:>12} {:>8} {:>10} {:>12} {:>12} {:>12}".format(
+        "Islands", "Faces", "Found", "Algorithm", "Time [s]",
+        "[us/face]"))
+    for face_islands in (False, True):
+        for num_segments in GRID_SIZES:
+            bm, uv_layer = create_grid_bmesh(num_segments, face_islands)
+            num_faces = len(bm.faces)
+            for use_union_find in (True, False):
+                if not use_union_find and num_faces > FLOOD_FILL_MAX_FACES:
+                    continue
+                elapsed, num_islands = measure(bm, uv_layer, use_union_find)
+                print("{:>12} {:>8} {:>10} {:>12} {:>12.4f} {:>12.3f}".format(
+                    "Per Face" if face_islands else "One",
+                    num_faces, num_islands,
+                    "UnionFind" if use_union_find else "FloodFill",
+                    elapsed, elapsed / num_faces * 1000000.0))
+            bm.free()
+
+
+if __name__ == "__main__":
+    benchmark_main()
+    sys.exit(0)
@@ -1,11 +1,17 @@
 import unittest
 
 import bpy
+import bmesh
 
 from . import common
 from . import compatibility as compat
 
 
+def get_island_faces(island_info):
+    return sorted(sorted(f["face"].index for f in isl["faces"])
+                  for isl in island_info)
+
+
 class TestPackUV(common.TestBase):
     module_name = "pack_uv"
     idname = [
@@ -45,6 +51,78 @@ class TestPackUV(common.TestBase):
         result = bpy.ops.uv.muv_pack_uv(accurate_island_copy=False)
         self.assertSetEqual(result, {'FINISHED'})
 
+    def test_ok_grouping_exhaustive(self):
+        print("[TEST] (OK) Grouping Method = EXHAUSTIVE")
+        bpy.ops.mesh.select_all(action='SELECT')
+        bpy.ops.mesh.uv_texture_add()
+        if compat.check_version(2, 80, 0) < 0:
+            bpy.ops.uv.smart_project()
+        result = bpy.ops.uv.muv_pack_uv(grouping_method='EXHAUSTIVE')
+        self.assertSetEqual(result, {'FINISHED'})
+
+    def test_ok_packing_skyline(self):
+        print("[TEST] (OK) Packing Method = SKYLINE")
+        bpy.ops.mesh.select_all(action='SELECT')
+        bpy.ops.mesh.uv_texture_add()
+        if compat.check_version(2, 80, 0) < 0:
+            bpy.ops.uv.smart_project()
+        result = bpy.ops.uv.muv_pack_uv(
+            rotate=True,
+            margin=0.03,
+            packing_method='SKYLINE',
+            time_budget=1.0,
+        )
+        self.assertSetEqual(result, {'FINISHED'})
+
+    def test_ok_island_cache(self):
+        print("[TEST] (OK) Island Cache")
+        from magic_uv import common as muv_common
+
+        bpy.ops.mesh.select_all(action='SELECT')
+        bpy.ops.mesh.subdivide(number_cuts=4)
+        bpy.ops.mesh.uv_texture_add()
+        obj = compat.get_active_object(bpy.context)
+        bm = bmesh.from_edit_mesh(obj.data)
+        bm.faces.ensure_lookup_table()
+        uv_layer = bm.loops.layers.uv.verify()
+        # Loops of the same vertex share the UV, so all faces are connected.
+        for f in bm.faces:
+            for l in f.loops:
+                co = l.vert.co
+                l[uv_layer].uv = (co.x + co.z, co.y + co.z)
+
+        def assert_same_as_rebuild():
+            cached = muv_common.get_island_info(obj)
+            rebuilt = muv_common.get_island_info(obj, use_cache=False)
+            self.assertEqual(get_island_faces(cached),
+                             get_island_faces(rebuilt))
+            self.assertEqual(sorted(isl["num_uv"] for isl in cached),
+                             sorted(isl["num_uv"] for isl in rebuilt))
+            return cached
+
+        muv_common.clear_island_cache()
+        self.assertEqual(len(assert_same_as_rebuild()), 1)
+        # Cache hit returns the copy of the cached islands.
+        cached = assert_same_as_rebuild()
+        self.assertEqual(len(cached), 1)
+        cached[0]['group'] = 5
+        self.assertEqual(muv_common.get_island_info(obj)[0]['group'], -1)
+
+        # Detach one face, and the island is repaired from the cache.
+        for l in bm.faces[0].loops:
+            l[uv_layer].uv.x += 10.0
+        self.assertEqual(len(assert_same_as_rebuild()), 2)
+
+        # Exclude some faces from the selection.
+        for f in bm.faces[1:4]:
+            f.select = False
+        assert_same_as_rebuild()
+
+        # Attach the detached face again.
+        for l in bm.faces[0].loops:
+            l[uv_layer].uv.x -= 10.0
+        self.assertEqual(len(assert_same_as_rebuild()), 1)
+
     def test_ok_user_specified(self):
         print("[TEST] (OK) User specified")
         bpy.ops.mesh.select_all(action='SELECT')
@@ -56,6 +134,7 @@ class TestPackUV(common.TestBase):
             allowable_size_deviation=(0.003, 0.0004),
             accurate_island_copy=True,
             stride=(1.0, -1.0),
+            grouping_method='HASH',
             apply_pack_uv=False,
         )
         self.assertSetEqual(result, {'FINISHED'})
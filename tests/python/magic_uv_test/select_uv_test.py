@@ -1,6 +1,8 @@
+import sys
 import unittest
 
 import bpy
+import bmesh
 
 from . import common
 from . import compatibility as compat
@@ -37,6 +39,66 @@ class TestSelectUVOverlapped(common.TestBase):
         )
         self.assertSetEqual(result, {'FINISHED'})
 
+    @unittest.skipIf(compat.check_version(2, 80, 0) < 0,
+                     "Not supported in <2.80")
+    @unittest.skipIf(not sys.platform.startswith("linux"),
+                     "Process pool is only used on Linux")
+    def test_ok_multiple_workers(self):
+        print("[TEST] (OK) Select Overlapped with Number of Workers=4")
+        from magic_uv import common as muv_common
+
+        # Stack UVs of 96 faces, so that there are enough candidate pairs
+        # to use the process pool.
+        bpy.ops.mesh.select_all(action='SELECT')
+        bpy.ops.mesh.subdivide(number_cuts=3)
+        bpy.ops.mesh.uv_texture_add()
+        obj = compat.get_active_object(bpy.context)
+        bm = bmesh.from_edit_mesh(obj.data)
+        bm.faces.ensure_lookup_table()
+        uv_layer = bm.loops.layers.uv.verify()
+        for i, f in enumerate(bm.faces):
+            offset = (2.0 * (i % 2) + 0.011 * i, 0.007 * i)
+            for l, uv in zip(f.loops, [(0, 0), (1, 0), (1, 1), (0, 1)]):
+                l[uv_layer].uv = (uv[0] + offset[0], uv[1] + offset[1])
+        bmesh.update_edit_mesh(obj.data)
+
+        def get_overlapped_pairs(num_workers):
+            stats = {}
+            info = muv_common.get_overlapped_uv_info(
+                [bm], [list(bm.faces)], [uv_layer], 'FACE',
+                stats=stats, num_workers=num_workers)
+            pairs = [(i["clip_face"].index, i["subject_face"].index,
+                      len(i["polygons"])) for i in info]
+            return pairs, stats
+
+        expect, stats = get_overlapped_pairs(1)
+        self.assertGreaterEqual(
+            stats["num_candidate_pairs"],
+            getattr(muv_common, "__MIN_PAIRS_FOR_PARALLEL"))
+        self.assertGreater(len(expect), 0)
+        self.assertFalse(stats["parallel"])
+        actual, stats = get_overlapped_pairs(4)
+        self.assertTrue(stats["parallel"])
+        self.assertListEqual(actual, expect)
+
+        # Selection by the operator is same as the one without the pool.
+        prefs = compat.get_user_preferences(bpy.context).addons["magic_uv"]\
+            .preferences
+        bpy.context.tool_settings.use_uv_select_sync = True
+        selections = []
+        for num_workers in [1, 4]:
+            prefs.uv_inspection_num_workers = num_workers
+            try:
+                result = bpy.ops.uv.muv_select_uv_select_overlapped(
+                    selection_method='RESET')
+                self.assertSetEqual(result, {'FINISHED'})
+            finally:
+                prefs.uv_inspection_num_workers = 1
+            bm = bmesh.from_edit_mesh(obj.data)
+            selections.append([f.index for f in bm.faces if f.select])
+        self.assertGreater(len(selections[0]), 0)
+        self.assertListEqual(selections[1], selections[0])
+
     @unittest.skipIf(compat.check_version(2, 80, 0) < 0,
                      "Not supported in <2.80")
     def test_ok_multiple_objects(self):
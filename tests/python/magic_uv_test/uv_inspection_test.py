@@ -1,11 +1,30 @@
 import unittest
 
 import bpy
+import bmesh
+from mathutils import Vector
 
 from . import common
 from . import compatibility as compat
 
 
+def make_polygon(points):
+    return [Vector(p) for p in points]
+
+
+def make_rect(x0, y0, x1, y1):
+    return make_polygon([(x0, y0), (x1, y0), (x1, y1), (x0, y1)])
+
+
+def calc_polygons_area(polygons):
+    area = 0.0
+    for poly in polygons:
+        for i, p1 in enumerate(poly):
+            p2 = poly[(i + 1) % len(poly)]
+            area += p1.x * p2.y - p1.y * p2.x
+    return abs(area) * 0.5
+
+
 class TestUVInspection(common.TestBase):
     module_name = "uv_inspection"
     idname = [
@@ -34,6 +53,188 @@ class TestUVInspection(common.TestBase):
         result = bpy.ops.uv.muv_uv_inspection_update()
         self.assertSetEqual(result, {'FINISHED'})
 
+    def test_ok_update_auto_refresh(self):
+        print("[TEST] Auto Refresh (OK)")
+        sc = bpy.context.scene
+        sc.muv_uv_inspection_auto_refresh = True
+        try:
+            bpy.ops.mesh.select_all(action='SELECT')
+            bpy.ops.mesh.uv_texture_add()
+            result = bpy.ops.uv.muv_uv_inspection_update()
+            self.assertSetEqual(result, {'FINISHED'})
+        finally:
+            sc.muv_uv_inspection_auto_refresh = False
+
+    @unittest.skipIf(compat.check_version(2, 80, 0) < 0,
+                     "Not supported in <2.80")
+    def test_ok_auto_refresh_timer(self):
+        print("[TEST] Auto Refresh Timer (OK)")
+        from magic_uv.op import uv_inspection as muv_uv_inspection
+        op = muv_uv_inspection.MUV_OT_UVInspection_Render
+        try:
+            op.auto_refresh_add()
+            self.assertTrue(op.is_auto_refresh_registered())
+            # Adding twice does not register the timer twice.
+            op.auto_refresh_add()
+            self.assertTrue(op.is_auto_refresh_registered())
+        finally:
+            op.auto_refresh_remove()
+        self.assertFalse(op.is_auto_refresh_registered())
+
+    def test_ok_update_incremental(self):
+        print("[TEST] Incremental Update (OK)")
+        from magic_uv.op import uv_inspection as muv_uv_inspection
+        bpy.ops.mesh.select_all(action='SELECT')
+        bpy.ops.mesh.subdivide(number_cuts=3)
+        bpy.ops.mesh.uv_texture_add()
+        obj = compat.get_active_object(bpy.context)
+        bm = bmesh.from_edit_mesh(obj.data)
+        bm.faces.ensure_lookup_table()
+        uv_layer = bm.loops.layers.uv.verify()
+        for i, f in enumerate(bm.faces):
+            offset = (0.6 * (i % 8), 0.6 * (i // 8))
+            for l, uv in zip(f.loops, [(0, 0), (1, 0), (1, 1), (0, 1)]):
+                l[uv_layer].uv = (uv[0] + offset[0], uv[1] + offset[1])
+        bmesh.update_edit_mesh(obj.data)
+
+        props = bpy.context.scene.muv_props.uv_inspection
+
+        def get_result():
+            overlapped = [(info["clip_face"].index,
+                           info["subject_face"].index,
+                           [[tuple(p) for p in poly]
+                            for poly in info["polygons"]])
+                          for info in props.overlapped_info]
+            flipped = [info["face"].index for info in props.flipped_info]
+            return (overlapped, flipped,
+                    {o.name: sorted(indices) for o, indices
+                     in props.overlapped_info_for_v3d.items()})
+
+        # Build the cache.
+        muv_uv_inspection._update_uvinsp_info(bpy.context)
+        cached_info = list(props.overlapped_info)
+
+        # Move a face away, move a face onto others and flip a face.
+        for l in bm.faces[0].loops:
+            l[uv_layer].uv.x += 100.0
+        for l in bm.faces[20].loops:
+            l[uv_layer].uv += Vector((0.3, 0.3))
+        for l in bm.faces[40].loops:
+            l[uv_layer].uv.x = -l[uv_layer].uv.x
+        bmesh.update_edit_mesh(obj.data)
+        muv_uv_inspection._update_uvinsp_info(bpy.context, incremental=True)
+        incremental = get_result()
+        # The results unrelated to the moved faces are reused.
+        self.assertTrue(any(any(info is c for c in cached_info)
+                            for info in props.overlapped_info))
+
+        muv_uv_inspection._update_uvinsp_info(bpy.context)
+        full = get_result()
+        self.assertEqual(incremental, full)
+        self.assertGreater(len(full[0]), 0)
+        self.assertIn(40, full[1])
+
+    def test_ok_update_draw_data(self):
+        print("[TEST] Draw Data (OK)")
+        bpy.ops.mesh.select_all(action='SELECT')
+        bpy.ops.mesh.uv_texture_add()
+        obj = compat.get_active_object(bpy.context)
+        bm = bmesh.from_edit_mesh(obj.data)
+        uv_layer = bm.loops.layers.uv.verify()
+        # Map all faces to the same square, so that all faces overlap.
+        square = [(0.0, 0.0), (1.0, 0.0), (1.0, 1.0), (0.0, 1.0)]
+        for f in bm.faces:
+            for l, uv in zip(f.loops, square):
+                l[uv_layer].uv = uv
+        bmesh.update_edit_mesh(obj.data)
+
+        result = bpy.ops.uv.muv_uv_inspection_update()
+        self.assertSetEqual(result, {'FINISHED'})
+
+        props = bpy.context.scene.muv_props.uv_inspection
+        coords, indices = props.overlapped_draw_data_for_v3d[obj]
+        num_faces = len(props.overlapped_info_for_v3d[obj])
+        self.assertGreater(num_faces, 0)
+        # Quads are triangulated into 2 triangles.
+        self.assertEqual(len(indices), num_faces * 2)
+        self.assertEqual(len(coords), num_faces * 4)
+        for tri in indices:
+            for i in tri:
+                self.assertLess(i, len(coords))
+
+    def test_ok_convex_clipping(self):
+        print("[TEST] Convex Clipping (OK)")
+        from magic_uv import common as muv_common
+        # The name mangling is applied to the names in the class.
+        do_clipping = getattr(muv_common, "__do_polygon_clipping")
+        do_weiler_atherton = getattr(muv_common,
+                                     "__do_weiler_atherton_cliping")
+
+        l_shape = make_polygon(
+            [(0, 0), (2, 0), (2, 1), (1, 1), (1, 2), (0, 2)])
+        # (clip, subject, overlapped, processed by the convex fast path)
+        cases = [
+            # convex/convex
+            (make_rect(0, 0, 1, 1), make_rect(0.5, 0.5, 1.5, 1.5),
+             True, True),
+            (make_rect(0, 0, 1, 1), make_rect(2, 2, 3, 3), False, True),
+            (make_rect(0, 0, 1, 1), make_rect(0.2, 0.2, 0.8, 0.8),
+             True, True),
+            (make_rect(0, 0, 1, 1), make_rect(0, 0, 1, 1), True, True),
+            # convex/concave
+            (l_shape, make_rect(0.2, 0.2, 0.8, 0.8), True, False),
+            (l_shape, make_rect(1.2, 1.2, 1.8, 1.8), False, False),
+            (l_shape, make_rect(1.5, 0.5, 2.5, 1.5), True, False),
+            # touching
+            (make_rect(0, 0, 1, 1), make_rect(1, 0, 2, 1), False, True),
+            (make_rect(0, 0, 1, 1), make_rect(1, 1, 2, 2), False, True),
+            (make_rect(0, 0, 1, 1), make_rect(0, 0, 0.5, 1), False, False),
+        ]
+        for mode in ['FACE', 'PART']:
+            for clip, subject, overlapped, convex in cases:
+                path_stats = {
+                    "num_convex_clipping_pairs": 0,
+                    "num_weiler_atherton_pairs": 0,
+                }
+                result, polygons = do_clipping(
+                    [p.copy() for p in clip], [p.copy() for p in subject],
+                    mode, 0.0000001, path_stats)
+                expect, expect_polygons = do_weiler_atherton(
+                    [p.copy() for p in clip], [p.copy() for p in subject],
+                    mode, 0.0000001)
+                self.assertEqual(bool(result), bool(expect))
+                self.assertEqual(bool(result), overlapped)
+                if overlapped:
+                    self.assertAlmostEqual(
+                        calc_polygons_area(polygons),
+                        calc_polygons_area(expect_polygons))
+                self.assertEqual(path_stats["num_convex_clipping_pairs"],
+                                 1 if convex else 0)
+                self.assertEqual(path_stats["num_weiler_atherton_pairs"],
+                                 0 if convex else 1)
+
+    def test_ok_overlapped_stats(self):
+        print("[TEST] Overlapped Stats (OK)")
+        from magic_uv import common as muv_common
+        bpy.ops.mesh.select_all(action='SELECT')
+        bpy.ops.mesh.uv_texture_add()
+        obj = compat.get_active_object(bpy.context)
+        bm = bmesh.from_edit_mesh(obj.data)
+        uv_layer = bm.loops.layers.uv.verify()
+        # Each face overlaps with the next face only.
+        for i, f in enumerate(bm.faces):
+            for l, uv in zip(f.loops, [(0, 0), (1, 0), (1, 1), (0, 1)]):
+                l[uv_layer].uv = (uv[0] + 0.5 * i, uv[1] + 0.3 * i)
+
+        stats = {}
+        muv_common.get_overlapped_uv_info(
+            [bm], [list(bm.faces)], [uv_layer], 'FACE', stats=stats)
+        self.assertEqual(stats["num_overlapped_pairs"], len(bm.faces) - 1)
+        self.assertEqual(stats["num_convex_clipping_pairs"] +
+                         stats["num_weiler_atherton_pairs"],
+                         stats["num_candidate_pairs"])
+        self.assertGreater(stats["num_convex_clipping_pairs"], 0)
+
     @unittest.skipIf(compat.check_version(2, 80, 0) < 0,
                      "Not supported in <2.80")
     def test_ok_update_multiple_objects(self):
@@ -82,11 +283,48 @@ class TestUVInspectionPaintUVIsland(common.TestBase):
         print("[TEST] (Only Run)")
         bpy.ops.mesh.select_all(action='SELECT')
         bpy.ops.mesh.uv_texture_add()
-        result = bpy.ops.uv.muv_uv_inspection_paint_uv_island()
+        result = bpy.ops.uv.muv_uv_inspection_paint_uv_island(
+            method='TEXTURE_PAINT')
         # Paint UV Island needs 'IMAGE_EDITOR' space and 'VIEW_3D' space,
         # but we can not setup such environment in this test.
         self.assertSetEqual(result, {'CANCELLED'})
 
+    @unittest.skipIf(compat.check_version(2, 80, 0) < 0,
+                     "Not supported in <2.80")
+    def test_ok_rasterize(self):
+        print("[TEST] Rasterize (OK)")
+        bpy.ops.mesh.select_all(action='SELECT')
+        bpy.ops.mesh.uv_texture_add()
+        # Small image is used to check the pixels quickly.
+        image = bpy.data.images.new("MagicUV_PaintUVIsland_0", 64, 64)
+        result = bpy.ops.uv.muv_uv_inspection_paint_uv_island(
+            method='RASTERIZE')
+        self.assertSetEqual(result, {'FINISHED'})
+
+        pixels = image.pixels[:]
+        painted = [pixels[i:i + 3] for i in range(0, len(pixels), 4)
+                   if pixels[i:i + 3] != (0.0, 0.0, 0.0)]
+        self.assertGreater(len(painted), 0)
+
+    @unittest.skipIf(compat.check_version(2, 80, 0) < 0,
+                     "Not supported in <2.80")
+    def test_ok_export_id_mask(self):
+        print("[TEST] Export ID Mask (OK)")
+        bpy.ops.mesh.select_all(action='SELECT')
+        bpy.ops.mesh.uv_texture_add()
+        bpy.data.images.new("MagicUV_PaintUVIsland_0", 64, 64)
+        result = bpy.ops.uv.muv_uv_inspection_paint_uv_island(
+            method='RASTERIZE', export_id_mask=True)
+        self.assertSetEqual(result, {'FINISHED'})
+
+        obj = bpy.context.active_object
+        bm = bmesh.from_edit_mesh(obj.data)
+        layer = bm.loops.layers.color.get("muv_uv_island_id")
+        self.assertIsNotNone(layer)
+        for f in bm.faces:
+            for l in f.loops:
+                self.assertNotEqual(tuple(l[layer])[:3], (0.0, 0.0, 0.0))
+
     @unittest.skipIf(compat.check_version(2, 80, 0) < 0,
                      "Not supported in <2.80")
     def test_multiple_objects_only_run(self):
@@ -112,7 +350,8 @@ class TestUVInspectionPaintUVIsland(common.TestBase):
         common.select_objects_only(obj_names)
         bpy.ops.object.mode_set(mode='EDIT')
 
-        result = bpy.ops.uv.muv_uv_inspection_paint_uv_island()
+        result = bpy.ops.uv.muv_uv_inspection_paint_uv_island(
+            method='TEXTURE_PAINT')
         # Paint UV Island needs 'IMAGE_EDITOR' space and 'VIEW_3D' space,
         # but we can not setup such environment in this test.
         self.assertSetEqual(result, {'CANCELLED'})
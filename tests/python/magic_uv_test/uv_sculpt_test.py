@@ -1,4 +1,9 @@
+import bpy
+import bmesh
+from mathutils import Matrix, Vector
+
 from . import common
+from . import compatibility as compat
 
 
 class TestUVSculpt(common.TestBase):
@@ -8,6 +13,67 @@ class TestUVSculpt(common.TestBase):
         ('OPERATOR', "uv.muv_uv_sculpt"),
     ]
 
+    def setUpEachMethod(self):
+        obj_name = "Cube"
+
+        common.select_object_only(obj_name)
+        compat.set_active_object(bpy.data.objects[obj_name])
+        bpy.ops.object.mode_set(mode='EDIT')
+
     # modal operator can not invoke directly from cmdline
     def test_nothing(self):
         pass
+
+    def test_ok_loop_kdtree(self):
+        print("[TEST] Loop KD-Tree (OK)")
+        from magic_uv.op import uv_sculpt as muv_uv_sculpt
+
+        bpy.ops.mesh.select_all(action='SELECT')
+        bpy.ops.mesh.subdivide(number_cuts=5)
+        obj = compat.get_active_object(bpy.context)
+        bm = bmesh.from_edit_mesh(obj.data)
+        bm.faces.ensure_lookup_table()
+        for f in bm.faces:
+            f.select = f.index % 3 != 0
+
+        class Region:
+            width = 800
+            height = 600
+
+        class RegionView3D:
+            perspective_matrix = compat.matmul(
+                Matrix(((1.2, 0.0, 0.0, 0.0),
+                        (0.0, 1.6, 0.0, 0.0),
+                        (0.0, 0.0, -1.02, -0.2),
+                        (0.0, 0.0, -1.0, 0.0))),
+                Matrix.Translation((0.0, 0.0, -5.0)))
+
+        world_mat = compat.matmul(Matrix.Translation((0.3, 0.1, -0.2)),
+                                  Matrix.Rotation(0.4, 4, 'X'))
+        kdtree = muv_uv_sculpt._LoopKDTree(
+            bm, Region, RegionView3D, world_mat)
+
+        # (center, radius, some loops are in the brush)
+        for center, radius, found in [(Vector((400.0, 300.0)), 50.0, True),
+                                      (Vector((420.0, 330.0)), 150.0, True),
+                                      (Vector((10.0, 10.0)), 30.0, False)]:
+            expect = {}
+            for f in bm.faces:
+                if not f.select:
+                    continue
+                for i, l in enumerate(f.loops):
+                    co = compat.matmul(
+                        RegionView3D.perspective_matrix,
+                        compat.matmul(world_mat, l.vert.co).to_4d())
+                    loc = Vector((400.0 + 400.0 * co.x / co.w,
+                                  300.0 + 300.0 * co.y / co.w))
+                    dist = (loc - center).length
+                    if dist < radius:
+                        expect[(f.index, i)] = dist
+
+            actual = {(fidx, lidx): dist for fidx, lidx, _, dist
+                      in kdtree.find_range(center, radius)}
+            self.assertEqual(len(expect) > 0, found)
+            self.assertSetEqual(set(actual.keys()), set(expect.keys()))
+            for key, dist in expect.items():
+                self.assertAlmostEqual(actual[key], dist, places=3)
@@ -326,3 +326,53 @@ class TestWorldScaleUVProportionalToMesh(common.TestBase):
             only_selected=True
         )
         self.assertSetEqual(result, {'FINISHED'})
+
+
+@unittest.skipIf(compat.check_version(2, 80, 0) < 0, "Not supported in <2.80")
+class TestWorldScaleUVHeatmap(common.TestBase):
+    module_name = "world_scale_uv"
+    submodule_name = "heatmap"
+    idname = [
+        # World Scale UV
+        ('OPERATOR', 'uv.muv_world_scale_uv_heatmap_render'),
+        ('OPERATOR', 'uv.muv_world_scale_uv_heatmap_update'),
+    ]
+
+    def setUpEachMethod(self):
+        obj_name = "Cube"
+
+        common.select_object_only(obj_name)
+        compat.set_active_object(bpy.data.objects[obj_name])
+        self.active_obj = compat.get_active_object(bpy.context)
+        bpy.ops.object.mode_set(mode='EDIT')
+
+    def test_ng_no_uv(self):
+        # Warning: Object must have more than one UV map and texture
+        print("[TEST] (NG) No UV")
+        bpy.ops.mesh.select_all(action='SELECT')
+        result = bpy.ops.uv.muv_world_scale_uv_heatmap_update()
+        self.assertSetEqual(result, {'CANCELLED'})
+
+    def test_ok_default(self):
+        print("[TEST] (OK) Default")
+        bpy.ops.mesh.uv_texture_add()
+        bpy.ops.mesh.select_all(action='SELECT')
+        common.assign_new_image(self.active_obj, "Test")
+        result = bpy.ops.uv.muv_world_scale_uv_heatmap_update(
+            tgt_texture="Test"
+        )
+        self.assertSetEqual(result, {'FINISHED'})
+        bm = bmesh.from_edit_mesh(self.active_obj.data)
+        self.assertIsNone(bm.faces.layers.float.get("muv_texel_density"))
+
+        result = bpy.ops.uv.muv_world_scale_uv_heatmap_update(
+            tgt_texture="Test",
+            store_densities=True
+        )
+        self.assertSetEqual(result, {'FINISHED'})
+
+        bm = bmesh.from_edit_mesh(self.active_obj.data)
+        layer = bm.faces.layers.float.get("muv_texel_density")
+        self.assertIsNotNone(layer)
+        for f in bm.faces:
+            self.assertGreater(f[layer], 0.0)
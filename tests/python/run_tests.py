@@ -47,6 +47,7 @@ def test_main():
         magic_uv_test.world_scale_uv_test.TestWorldScaleUVApplyManual,
         magic_uv_test.world_scale_uv_test.TestWorldScaleUVApplyScalingDensity,
         magic_uv_test.world_scale_uv_test.TestWorldScaleUVProportionalToMesh,
+        magic_uv_test.world_scale_uv_test.TestWorldScaleUVHeatmap,
     ]
 
     suite = unittest.TestSuite()